@@ -46,6 +46,29 @@ class SNSClient:
             logger.error(f"Failed to publish message to SNS topic {topic_arn}: {e}")
             return None
 
+    def publish_batch(self, topic_arn: str, messages: list[tuple[str, str]]) -> int:
+        """
+        Publishes many messages with PublishBatch, 10 entries per API call.
+        :param topic_arn: The ARN of the SNS topic.
+        :param messages: (message, subject) pairs.
+        :return: The number of messages SNS accepted.
+        """
+        published = 0
+        for start in range(0, len(messages), 10):
+            entries = [
+                {"Id": str(start + i), "Message": message, "Subject": subject}
+                for i, (message, subject) in enumerate(messages[start:start + 10])
+            ]
+            try:
+                response = self.client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=entries)
+                published += len(response.get("Successful", []))
+                for failure in response.get("Failed", []):
+                    logger.error(f"Failed to publish batch entry {failure.get('Id')} to topic {topic_arn}: {failure.get('Message')}")
+            except ClientError as e:
+                logger.error(f"Failed to publish message batch to SNS topic {topic_arn}: {e}")
+        logger.info(f"Published {published}/{len(messages)} messages to topic {topic_arn}.")
+        return published
+
 # Singleton instance
 sns_client = SNSClient()
 
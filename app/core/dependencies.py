@@ -1,9 +1,10 @@
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 from crud.user import get_current_user
 from core.aws.sns_client import sns_client
 from datetime import datetime
 import json
 from core.settings import settings
+from core.redis.resource_version import get_resource_version
 
 async def log_activity(request: Request, user: dict = Depends(get_current_user)):
     event_data = {
@@ -21,3 +22,24 @@ async def log_activity(request: Request, user: dict = Depends(get_current_user))
         subject="UserActivity"
     )
     return user
+
+def etag_for(resource: str):
+    """
+    Dependency factory for conditional GETs on public endpoints. The ETag is built from the
+    resource's version token, which writes bump, so no body is hashed. A matching
+    If-None-Match is answered with 304 before the database or any serialization is touched;
+    otherwise the tag is left on request.state for ETagMiddleware to attach to the response.
+    Declare it in the route's `dependencies=[...]` so it runs before other dependencies.
+    """
+    async def check_etag(request: Request):
+        version = await get_resource_version(resource)
+        if version is None:
+            return
+        etag = f'W/"{resource}-{version}"'
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            if "*" in candidates or etag in candidates or etag[2:] in candidates:
+                raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        request.state.etag = etag
+    return check_etag
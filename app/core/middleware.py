@@ -27,5 +27,19 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
         logger.info(f"Response: {response.status_code} - Request ID: {request_id} - Endpoint: {function_name}")
         return response
 
+class ETagMiddleware(BaseHTTPMiddleware):
+    """Adds the ETag computed by core.dependencies.etag_for to successful responses."""
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        response = await call_next(request)
+        etag = getattr(request.state, "etag", None)
+        if etag and response.status_code == 200:
+            response.headers["ETag"] = etag
+            # Cache, but revalidate with If-None-Match on every use
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
 def setup_middleware(app):
+    app.add_middleware(ETagMiddleware)
     app.add_middleware(RequestIdMiddleware)
\ No newline at end of file
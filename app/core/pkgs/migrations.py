@@ -0,0 +1,173 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import asyncpg
+from core.app_config import logger
+
+# app/migrations, next to main.py
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "migrations"))
+
+# First line of a script that must run outside a transaction (e.g. CREATE INDEX CONCURRENTLY)
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Serializes runners across workers/deploys (arbitrary constant key)
+_ADVISORY_LOCK_KEY = 724_115_901
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.(up|down)\.sql$")
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    up_sql: str
+    down_sql: Optional[str]
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.up_sql.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_transactional(sql: str) -> bool:
+        return not sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Loads NNNN_name.up.sql / NNNN_name.down.sql pairs, ordered by version. A down script is optional."""
+    scripts: Dict[int, Dict[str, str]] = {}
+    names: Dict[int, str] = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version, name, direction = int(match.group(1)), match.group(2), match.group(3)
+        if names.setdefault(version, name) != name:
+            raise MigrationError(f"Migration version {version:04d} is used by both '{names[version]}' and '{name}'")
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            scripts.setdefault(version, {})[direction] = f.read()
+    migrations = []
+    for version in sorted(scripts):
+        if "up" not in scripts[version]:
+            raise MigrationError(f"Migration {version:04d}_{names[version]} has no .up.sql script")
+        migrations.append(Migration(version, names[version], scripts[version]["up"], scripts[version].get("down")))
+    return migrations
+
+
+def _split_statements(sql: str) -> List[str]:
+    """
+    Splits a no-transaction script into statements so each runs on its own (CONCURRENTLY
+    refuses to run inside the implicit transaction of a multi-statement query).
+    Statements must end with ';' at the end of a line; dollar-quoted bodies are not supported here.
+    """
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--") and not current:
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip()
+            if statement.rstrip(";").strip():
+                statements.append(statement)
+            current = []
+    if "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+async def _run_script(conn: asyncpg.Connection, sql: str, record: str, *record_args):
+    """Runs a script and records the result in schema_migrations, atomically unless it is marked no-transaction."""
+    if Migration.is_transactional(sql):
+        async with conn.transaction():
+            await conn.execute(sql)
+            await conn.execute(record, *record_args)
+    else:
+        for statement in _split_statements(sql):
+            await conn.execute(statement)
+        await conn.execute(record, *record_args)
+
+
+async def get_applied_migrations(conn: asyncpg.Connection) -> Dict[int, str]:
+    """Returns {version: checksum} of applied migrations."""
+    await conn.execute(_CREATE_TABLE)
+    rows = await conn.fetch("SELECT version, checksum FROM schema_migrations ORDER BY version")
+    return {row["version"]: row["checksum"] for row in rows}
+
+
+async def get_pending_migrations(conn: asyncpg.Connection, migrations: Optional[List[Migration]] = None) -> List[Migration]:
+    migrations = migrations if migrations is not None else discover_migrations()
+    applied = await get_applied_migrations(conn)
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            logger.warning(f"Migration {migration.version:04d}_{migration.name} was modified after it was applied.")
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+async def migrate_up(conn: asyncpg.Connection, target: Optional[int] = None) -> List[Migration]:
+    """Applies pending migrations in order, up to and including `target` if given. Returns those applied."""
+    await conn.execute("SELECT pg_advisory_lock($1)", _ADVISORY_LOCK_KEY)
+    try:
+        applied = []
+        for migration in await get_pending_migrations(conn):
+            if target is not None and migration.version > target:
+                break
+            logger.info(f"Applying migration {migration.version:04d}_{migration.name}...")
+            await _run_script(
+                conn, migration.up_sql,
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                migration.version, migration.name, migration.checksum,
+            )
+            applied.append(migration)
+        return applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_KEY)
+
+
+async def migrate_down(conn: asyncpg.Connection, steps: int = 1) -> List[Migration]:
+    """Rolls back the last `steps` applied migrations, newest first. Returns those rolled back."""
+    await conn.execute("SELECT pg_advisory_lock($1)", _ADVISORY_LOCK_KEY)
+    try:
+        by_version = {migration.version: migration for migration in discover_migrations()}
+        applied_versions = sorted(await get_applied_migrations(conn), reverse=True)
+        rolled_back = []
+        for version in applied_versions[:steps]:
+            migration = by_version.get(version)
+            if migration is None:
+                raise MigrationError(f"Applied migration {version:04d} has no script in {MIGRATIONS_DIR}")
+            if migration.down_sql is None:
+                raise MigrationError(f"Migration {version:04d}_{migration.name} is irreversible (no .down.sql script)")
+            logger.info(f"Rolling back migration {version:04d}_{migration.name}...")
+            await _run_script(conn, migration.down_sql, "DELETE FROM schema_migrations WHERE version = $1", version)
+            rolled_back.append(migration)
+        return rolled_back
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_KEY)
+
+
+async def check_migrations_on_startup(pool: asyncpg.Pool, auto_migrate: bool):
+    """Applies pending migrations when `auto_migrate` is set; otherwise logs an error listing them."""
+    async with pool.acquire() as conn:
+        if auto_migrate:
+            applied = await migrate_up(conn)
+            logger.info(f"Database schema up to date ({len(applied)} migrations applied at startup).")
+            return
+        pending = await get_pending_migrations(conn)
+    if pending:
+        names = ", ".join(f"{m.version:04d}_{m.name}" for m in pending)
+        logger.error(f"Database schema is behind: pending migrations {names}. Run `python scripts/migrate.py up`.")
+    else:
+        logger.info("Database schema up to date.")
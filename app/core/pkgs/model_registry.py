@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+from fastapi.concurrency import run_in_threadpool
+from core.app_config import logger
+
+
+class ModelRegistry:
+    """
+    Keeps one loaded copy of a model artifact per worker process.
+
+    `stamp` returns a cheap identifier of the artifact on disk (e.g. its mtime) or None when
+    there is none; `loader` reads and deserializes it. The stamp is re-checked at most every
+    `check_interval` seconds, and a changed stamp triggers a reload in a worker thread while
+    requests keep using the previous model. The new model replaces the old one in a single
+    assignment, so a request sees either the old or the new model, never a mix.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], stamp: Callable[[], Optional[Hashable]], check_interval: float = 5):
+        self.name = name
+        self.loader = loader
+        self.stamp = stamp
+        self.check_interval = check_interval
+        self._model: Any = None
+        self._stamp: Optional[Hashable] = None
+        self._loaded_at: Optional[datetime] = None
+        self._next_check = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Any:
+        """Returns the loaded model (None if no artifact exists), reloading it first if it changed on disk."""
+        if time.monotonic() >= self._next_check:
+            async with self._lock:
+                # Another request may have checked while this one waited for the lock
+                if time.monotonic() >= self._next_check:
+                    await self._reload()
+        return self._model
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Checks the artifact now and reloads it if its stamp changed (or unconditionally with `force`).
+        Returns True if a new model was loaded.
+        """
+        async with self._lock:
+            return await self._reload(force)
+
+    async def _reload(self, force: bool = False) -> bool:
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            stamp = await run_in_threadpool(self.stamp)
+        except Exception as e:
+            logger.error(f"Model '{self.name}': could not check the artifact on disk: {e}")
+            return False
+        if stamp is None:
+            return False
+        if stamp == self._stamp and not force:
+            return False
+        try:
+            started = time.perf_counter()
+            model = await run_in_threadpool(self.loader)
+        except Exception as e:
+            # Keep serving the previous model; the next check retries
+            logger.error(f"Model '{self.name}': failed to load version {stamp}: {e}", exc_info=True)
+            return False
+        self._model, self._stamp, self._loaded_at = model, stamp, datetime.now()
+        logger.info(f"Model '{self.name}' loaded in {time.perf_counter() - started:.3f}s (version {self.version}).")
+        return True
+
+    @property
+    def model(self) -> Any:
+        """The currently loaded model, without checking the artifact on disk."""
+        return self._model
+
+    @property
+    def version(self) -> Optional[str]:
+        if isinstance(self._model, dict) and self._model.get("version"):
+            return str(self._model["version"])
+        return str(self._stamp) if self._stamp is not None else None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "loaded": self._model is not None,
+            "version": self.version,
+            "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+        }
@@ -0,0 +1,40 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+import msgpack
+from core.app_config import logger
+from core.redis.redis_client import get_redis_binary_client
+from core.utils.enums import LlmRowCacheConfig
+
+def llm_row_cache_key(prompt_version: str, row: dict) -> str:
+    """Content address of a sanitized CSV row: identical rows under the same prompt share one entry."""
+    canonical = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(f"{prompt_version}\n{canonical}".encode("utf-8")).hexdigest()
+    return f"llm_row:{digest}"
+
+async def get_cached_rows(keys: List[str]) -> List[Optional[dict]]:
+    """Looks up cleaned rows with MGET in batches; misses (and Redis errors) come back as None."""
+    results: List[Optional[dict]] = []
+    batch_size = LlmRowCacheConfig.MGET_BATCH_SIZE.value
+    try:
+        redis_client = await get_redis_binary_client()
+        for start in range(0, len(keys), batch_size):
+            values = await redis_client.mget(keys[start:start + batch_size])
+            results.extend(msgpack.unpackb(value) if value is not None else None for value in values)
+    except Exception as e:
+        logger.warning(f"LLM row cache read failed: {e}")
+        results.extend([None] * (len(keys) - len(results)))
+    return results
+
+async def cache_rows(entries: Dict[str, dict]):
+    """Stores cleaned rows by content key in one pipeline; entries expire after LlmRowCacheConfig.TTL."""
+    if not entries:
+        return
+    try:
+        redis_client = await get_redis_binary_client()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, record in entries.items():
+                pipe.set(key, msgpack.packb(record), ex=LlmRowCacheConfig.TTL.value)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"LLM row cache write failed: {e}")
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import msgpack
+from core.app_config import logger
+from core.redis.redis_client import get_redis_binary_client
+from core.redis.resource_version import bump_resource_version
+from core.utils.enums import ProductCacheConfig
+from schemas import schemas
+import pytz
+
+VIETNAM_TZ = pytz.timezone('Asia/Ho_Chi_Minh')
+
+def product_cache_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def _ttl_for(product: schemas.Product, next_discount_start: Optional[datetime]) -> int:
+    """
+    Caps the TTL at the next moment the product's price can change on its own:
+    the end of the active discount or the start of the next scheduled one.
+    """
+    ttl = ProductCacheConfig.TTL.value
+    now = datetime.now(VIETNAM_TZ)
+    for boundary in (product.end_date, next_discount_start):
+        if boundary is not None:
+            ttl = min(ttl, int((boundary - now).total_seconds()) + 1)
+    return max(ttl, ProductCacheConfig.MIN_TTL.value)
+
+async def get_cached_product(product_id: int) -> Optional[schemas.Product]:
+    try:
+        redis_client = await get_redis_binary_client()
+        cached = await redis_client.get(product_cache_key(product_id))
+    except Exception as e:
+        logger.warning(f"Product cache read failed for product_id {product_id}: {e}")
+        return None
+    if cached is None:
+        return None
+    return schemas.Product.model_validate(msgpack.unpackb(cached))
+
+async def get_cached_products(product_ids: List[int]) -> Dict[int, schemas.Product]:
+    """Looks up many products with a single MGET; returns only the hits."""
+    if not product_ids:
+        return {}
+    try:
+        redis_client = await get_redis_binary_client()
+        values = await redis_client.mget([product_cache_key(pid) for pid in product_ids])
+    except Exception as e:
+        logger.warning(f"Product cache batch read failed: {e}")
+        return {}
+    return {
+        pid: schemas.Product.model_validate(msgpack.unpackb(value))
+        for pid, value in zip(product_ids, values) if value is not None
+    }
+
+async def cache_products(products: List[schemas.Product], next_discount_starts: Dict[int, datetime]):
+    """Writes many products in one pipeline round trip."""
+    if not products:
+        return
+    try:
+        redis_client = await get_redis_binary_client()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for product in products:
+                ttl = _ttl_for(product, next_discount_starts.get(product.id))
+                pipe.set(product_cache_key(product.id), msgpack.packb(product.model_dump(mode='json')), ex=ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Product cache batch write failed: {e}")
+
+async def cache_product(product: schemas.Product, next_discount_start: Optional[datetime] = None):
+    payload = msgpack.packb(product.model_dump(mode='json'))
+    try:
+        redis_client = await get_redis_binary_client()
+        await redis_client.set(product_cache_key(product.id), payload, ex=_ttl_for(product, next_discount_start))
+    except Exception as e:
+        logger.warning(f"Product cache write failed for product_id {product.id}: {e}")
+
+async def invalidate_products(product_ids: Iterable[Optional[int]]):
+    keys = {product_cache_key(pid) for pid in product_ids if pid is not None}
+    if not keys:
+        return
+    try:
+        redis_client = await get_redis_binary_client()
+        await redis_client.delete(*keys)
+    except Exception as e:
+        logger.error(f"Product cache invalidation failed for keys {sorted(keys)}: {e}")
+    # Whatever invalidates cached products also changes what product endpoints return
+    await bump_resource_version("products")
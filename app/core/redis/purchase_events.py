@@ -0,0 +1,24 @@
+from typing import List
+from core.app_config import logger
+from core.redis.redis_client import get_redis_client
+
+# Set of order codes whose purchases changed since the recommendation model last absorbed them
+CHANGED_ORDERS_KEY = "rec:changed_orders"
+
+async def queue_changed_orders(*order_codes: str):
+    """
+    Records that these orders started or stopped counting as purchases. Lost events are
+    harmless beyond staleness: the next full training covers every order.
+    """
+    if not order_codes:
+        return
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.sadd(CHANGED_ORDERS_KEY, *order_codes)
+    except Exception as e:
+        logger.error(f"Queueing changed orders {order_codes} for the recommendation model failed: {e}")
+
+async def take_changed_orders(limit: int) -> List[str]:
+    """Atomically removes and returns up to `limit` queued order codes."""
+    redis_client = await get_redis_client()
+    return await redis_client.spop(CHANGED_ORDERS_KEY, limit) or []
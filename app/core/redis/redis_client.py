@@ -3,6 +3,7 @@ import redis.asyncio as aioredis
 from core.settings import settings
 
 _redis_client_instance: Optional[aioredis.Redis] = None
+_redis_binary_client_instance: Optional[aioredis.Redis] = None
 
 async def get_redis_client() -> aioredis.Redis:
     global _redis_client_instance
@@ -16,6 +17,19 @@ async def get_redis_client() -> aioredis.Redis:
         )
     return _redis_client_instance
 
+async def get_redis_binary_client() -> aioredis.Redis:
+    """Client for binary payloads (e.g. msgpack); values are returned as raw bytes."""
+    global _redis_binary_client_instance
+    if _redis_binary_client_instance is None:
+        _redis_binary_client_instance = aioredis.Redis(
+            host=settings.REDIS.HOST,
+            port=settings.REDIS.PORT,
+            db=settings.REDIS.DB,
+            password=settings.REDIS.PASSWORD.get_secret_value(),
+            decode_responses=False
+        )
+    return _redis_binary_client_instance
+
 async def clear_redis_cache_data():
     client = await get_redis_client()
     try:
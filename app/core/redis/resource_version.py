@@ -0,0 +1,34 @@
+import uuid
+from typing import Optional
+from core.app_config import logger
+from core.redis.redis_client import get_redis_client
+
+# One hash field per resource, e.g. resource_version -> {"products": "3f9c...", "news": "a1b2..."}
+RESOURCE_VERSION_KEY = "resource_version"
+
+def _new_version() -> str:
+    # Random tokens rather than a counter, so a flushed Redis can never reissue an old ETag
+    return uuid.uuid4().hex[:16]
+
+async def get_resource_version(resource: str) -> Optional[str]:
+    """Returns the current version token of a resource, creating one on first use. None if Redis is unavailable."""
+    try:
+        redis_client = await get_redis_client()
+        version = await redis_client.hget(RESOURCE_VERSION_KEY, resource)
+        if version is None:
+            await redis_client.hsetnx(RESOURCE_VERSION_KEY, resource, _new_version())
+            version = await redis_client.hget(RESOURCE_VERSION_KEY, resource)
+        return version
+    except Exception as e:
+        logger.warning(f"Reading resource version for '{resource}' failed: {e}")
+        return None
+
+async def bump_resource_version(*resources: str):
+    """Marks resources as changed; every ETag issued for them stops matching. Call after the write commits."""
+    if not resources:
+        return
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.hset(RESOURCE_VERSION_KEY, mapping={resource: _new_version() for resource in resources})
+    except Exception as e:
+        logger.error(f"Bumping resource version for {resources} failed: {e}")
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import msgpack
+from core.app_config import logger
+from core.utils.responses import CachedResponse
+from core.redis.redis_client import get_redis_client, get_redis_binary_client
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Identifies this worker process so it can ignore its own invalidation broadcasts
+WORKER_ID = uuid.uuid4().hex
+
+_MISSING = object()
+
+# Stores a loaded value only if the namespace generation still equals the one read before loading
+_SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '') == ARGV[1] then
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class LRUCache:
+    """A bounded, in-process LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_items: int = 1024, ttl: float = 60):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Two-tier cache: a per-worker LRU (L1) in front of Redis (L2).
+
+    L1 holds deserialized values, so a hit costs neither a network round trip nor
+    decoding/validation. L2 holds serialized bytes shared by all workers.
+    Invalidations delete from Redis and are broadcast over pub/sub so every worker
+    evicts its L1 copy (see run_invalidation_listener).
+
+    Each invalidation also increments a generation counter, in Redis and locally. get_or_load
+    notes the generation before calling its loader and stores the result only if it is unchanged,
+    so a value loaded before a concurrent write is returned once but never cached.
+    """
+
+    _registry: Dict[str, "TieredCache"] = {}
+
+    def __init__(
+        self,
+        namespace: str,
+        serializer: Callable[[Any], bytes],
+        deserializer: Callable[[bytes], Any],
+        ttl: int = 60,
+        local_ttl: Optional[float] = None,
+        max_items: int = 1024,
+    ):
+        self.namespace = namespace
+        self.serializer = serializer
+        self.deserializer = deserializer
+        self.ttl = ttl
+        self.local = LRUCache(max_items=max_items, ttl=local_ttl if local_ttl is not None else ttl)
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self._local_generation = 0
+        TieredCache._registry[namespace] = self
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _generation_key(self) -> str:
+        # Outside the key space scanned by invalidate(prefix=...) patterns of real keys
+        return f"{self.namespace}#generation"
+
+    async def get(self, key: str) -> Any:
+        """Returns the cached value, or None on a miss in both tiers."""
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self.l1_hits += 1
+            return value
+        generation = self._local_generation
+        try:
+            redis_client = await get_redis_binary_client()
+            raw = await redis_client.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' L2 read failed for key {key}: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.l2_hits += 1
+        value = self.deserializer(raw)
+        if self._local_generation == generation:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        try:
+            redis_client = await get_redis_binary_client()
+            await redis_client.set(self._redis_key(key), self.serializer(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' L2 write failed for key {key}: {e}")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is not None:
+            return value
+        local_generation = self._local_generation
+        try:
+            redis_client = await get_redis_binary_client()
+            generation = await redis_client.get(self._generation_key()) or b""
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' generation read failed for key {key}: {e}")
+            redis_client, generation = None, None
+
+        value = await loader()
+
+        # Without Redis only the local generation can be checked
+        store_locally = True
+        if redis_client is not None:
+            try:
+                store_locally = bool(await redis_client.eval(
+                    _SET_IF_GENERATION_SCRIPT, 2, self._generation_key(), self._redis_key(key),
+                    generation, self.serializer(value), self.ttl,
+                ))
+            except Exception as e:
+                logger.warning(f"Cache '{self.namespace}' L2 write failed for key {key}: {e}")
+        if store_locally and self._local_generation == local_generation:
+            self.local.set(key, value)
+        return value
+
+    async def invalidate(self, key: Optional[str] = None, prefix: Optional[str] = None):
+        """
+        Evicts one key, every key starting with `prefix`, or (with neither) the whole namespace,
+        from both tiers and from the L1 of every other worker.
+        """
+        self._evict_local(key, prefix)
+        try:
+            redis_client = await get_redis_binary_client()
+            # First, so any load already in flight finds the generation changed when it tries to store
+            await redis_client.incr(self._generation_key())
+            if key is not None:
+                await redis_client.delete(self._redis_key(key))
+            else:
+                pattern = self._redis_key(f"{prefix or ''}*")
+                keys = [k async for k in redis_client.scan_iter(match=pattern, count=500)]
+                if keys:
+                    await redis_client.delete(*keys)
+            message = json.dumps({"ns": self.namespace, "key": key, "prefix": prefix, "origin": WORKER_ID})
+            await (await get_redis_client()).publish(INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Cache '{self.namespace}' invalidation failed (key={key}, prefix={prefix}): {e}")
+
+    def _evict_local(self, key: Optional[str], prefix: Optional[str]):
+        self._local_generation += 1
+        if key is not None:
+            self.local.delete(key)
+        elif prefix:
+            self.local.delete_prefix(prefix)
+        else:
+            self.local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else None,
+            "l1_size": len(self.local),
+            "l1_max_items": self.local.max_items,
+        }
+
+    @classmethod
+    async def invalidate_all(cls):
+        for cache in list(cls._registry.values()):
+            await cache.invalidate()
+
+    @classmethod
+    def all_stats(cls) -> dict:
+        return {namespace: cache.stats() for namespace, cache in cls._registry.items()}
+
+    @classmethod
+    def handle_invalidation_message(cls, data: str):
+        message = json.loads(data)
+        if message.get("origin") == WORKER_ID:
+            return
+        cache = cls._registry.get(message.get("ns"))
+        if cache is not None:
+            cache._evict_local(message.get("key"), message.get("prefix"))
+
+
+def _pack_response(response: CachedResponse) -> bytes:
+    return msgpack.packb([response.body, response.headers], use_bin_type=True)
+
+def _unpack_response(raw: bytes) -> CachedResponse:
+    body, headers = msgpack.unpackb(raw)
+    return CachedResponse(body, headers)
+
+def response_codec() -> Tuple[Callable[[CachedResponse], bytes], Callable[[bytes], CachedResponse]]:
+    """
+    Serializer/deserializer pair for caching pre-serialized JSON responses. Hits in either
+    tier hand back the stored body bytes, which are sent without decoding into models.
+    """
+    return _pack_response, _unpack_response
+
+
+async def run_invalidation_listener():
+    """
+    Subscribes to the invalidation channel and evicts local entries announced by other workers.
+    Runs for the lifetime of the worker; reconnects after Redis errors.
+    """
+    while True:
+        pubsub = None
+        try:
+            pubsub = (await get_redis_client()).pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            logger.info(f"Cache invalidation listener subscribed to '{INVALIDATION_CHANNEL}' (worker {WORKER_ID}).")
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    TieredCache.handle_invalidation_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache invalidation listener error: {e}. Reconnecting...")
+            # Anything may have been missed while disconnected
+            for cache in TieredCache._registry.values():
+                cache.local.clear()
+            await asyncio.sleep(1)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
@@ -0,0 +1,37 @@
+from typing import Dict, Optional
+import numpy as np
+from core.app_config import logger
+from core.redis.redis_client import get_redis_binary_client
+from core.utils.enums import RecModelConfig
+
+def user_recs_key(user_id: int) -> str:
+    return f"recs:user:{user_id}"
+
+async def get_user_recommendations(user_id: int) -> Optional[np.ndarray]:
+    """
+    Returns the precomputed recommended product ids of a user, best first, or None on a miss
+    (or a Redis error). An empty array means the model has nothing to recommend.
+    """
+    try:
+        redis_client = await get_redis_binary_client()
+        raw = await redis_client.get(user_recs_key(user_id))
+    except Exception as e:
+        logger.warning(f"Reading precomputed recommendations for user {user_id} failed: {e}")
+        return None
+    return np.frombuffer(raw, dtype=np.int32) if raw is not None else None
+
+async def cache_user_recommendations(recommendations: Dict[int, np.ndarray]):
+    """Stores {user_id: product ids} as raw int32 arrays, in pipelined batches; entries expire after USER_RECS_TTL."""
+    if not recommendations:
+        return
+    items = list(recommendations.items())
+    batch_size = RecModelConfig.USER_RECS_WRITE_BATCH.value
+    try:
+        redis_client = await get_redis_binary_client()
+        for start in range(0, len(items), batch_size):
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for user_id, product_ids in items[start:start + batch_size]:
+                    pipe.set(user_recs_key(user_id), np.asarray(product_ids, dtype=np.int32).tobytes(), ex=RecModelConfig.USER_RECS_TTL.value)
+                await pipe.execute()
+    except Exception as e:
+        logger.error(f"Writing precomputed recommendations for {len(items)} users failed: {e}")
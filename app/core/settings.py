@@ -64,6 +64,8 @@ class DatabaseSettings(BaseSettings):
     NAME: str
     MAX_POOL_SIZE: int
     MIN_POOL_SIZE: int
+    # Apply pending migrations (app/migrations) at startup; otherwise they are only reported
+    AUTO_MIGRATE: bool = False
 
     @property
     def DATABASE_URL(self) -> str:
@@ -132,6 +134,11 @@ class LocalLLMSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="LOCAL_LLM_")
     API_URL: str
     MODEL: str = "ai/gemma3n"
+    # CSV cleaning pipeline: rows are sent in chunks of roughly this many prompt tokens
+    CHUNK_TOKEN_BUDGET: int = 2000
+    MAX_CONCURRENCY: int = 4
+    MAX_RETRIES: int = 2
+    TIMEOUT: float = 120.0
 
 class CloudinarySettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="CLOUDINARY_")
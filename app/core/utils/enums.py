@@ -22,5 +22,66 @@ class RATE_LIMIT(int, Enum):
     RATE_LIMIT_WINDOW = 60  # seconds
     RATE_LIMIT_MAX_REQUESTS = 20  # requests per window
 
+class ProductCacheConfig(int, Enum):
+    TTL = 3600  # seconds; shortened so entries expire when a discount window opens or closes
+    MIN_TTL = 1
+    MAX_BATCH_IDS = 200
+
+class PriceScheduleConfig(int, Enum):
+    MAX_SLEEP = 300  # seconds; upper bound between boundary checks
+    LOOKBACK_SLACK = 5  # seconds added to the refresh window to absorb timer jitter
+    ERROR_BACKOFF = 10
+
+class ProductFacetsConfig(int, Enum):
+    CACHE_TTL = 60  # seconds
+    MAX_PRICE_BUCKETS = 20
+
+# Default price bucket boundaries (VND) for product facets
+DEFAULT_PRICE_BUCKETS = [500_000, 1_000_000, 5_000_000, 10_000_000, 20_000_000]
+
+class LlmRowCacheConfig(int, Enum):
+    TTL = 30 * 86400  # seconds; unused rows age out, Redis maxmemory eviction handles the rest
+    MGET_BATCH_SIZE = 1000
+
+class CsvImportConfig(int, Enum):
+    CHUNK_ROWS = 5000  # rows read, cleaned and inserted per batch
+    MAX_REPORTED_ERRORS = 1000  # failed records listed per report category
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ImportJobConfig(int, Enum):
+    TTL = 86400  # seconds a finished job and its report stay available
+    MAX_CONCURRENT_JOBS = 2  # per worker
+    SPOOL_CHUNK_SIZE = 1024 * 1024  # bytes read from the upload at a time
+
+class CommentTreeConfig(int, Enum):
+    DEFAULT_DEPTH = 3  # reply levels returned below each top-level comment
+    MAX_DEPTH = 10
+    MAX_PAGE_SIZE = 100
+    CACHE_TTL = 300  # seconds
+
+class SimilarProductsConfig(int, Enum):
+    TOP_K = 20  # neighbours stored per product
+    BLOCK_ROWS = 256  # rows of the similarity matrix computed at a time
+    REFRESH_INTERVAL = 60  # seconds between incremental refreshes
+    MAX_DF_MIN_CATALOG = 1000  # catalogs above this size ignore terms found in over half of the products
+    FULL_REBUILD_INTERVAL = 86400  # seconds; refits the vocabulary and IDF, which incremental refreshes keep fixed
+
+class RecModelConfig(int, Enum):
+    TOP_K = 50  # neighbours kept per product
+    BLOCK_ROWS = 1024  # rows of the item-item similarity matrix computed at a time
+    RELOAD_CHECK_INTERVAL = 5  # seconds between checks of the CURRENT pointer for a new version
+    KEEP_VERSIONS = 3  # model versions kept on disk
+    UPDATE_INTERVAL = 60  # seconds between incremental updates from changed orders
+    UPDATE_BATCH_ORDERS = 1000  # changed orders folded into the model per update
+    USER_RECS_SIZE = 20  # recommendations precomputed per user
+    USER_RECS_TTL = 172800  # seconds (2 days)
+    USER_RECS_WRITE_BATCH = 1000  # users written to Redis per pipeline
+
 class ModelPath(str, Enum):
-    MODEL_CACHE_PATH = "cache/personalized_rec_model.pkl"
+    MODEL_DIR = "cache/personalized_rec_model"  # versions/<version>/*.npy plus a CURRENT pointer
+    SIMILAR_INDEX = "cache/similar_products/index.npz"  # TF-IDF rows, vocabulary and IDF of the last similar-products build
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+# Supported sort keys for keyset pagination.
+# Each entry maps the public sort name to the value type of its leading column;
+# every sort is made stable by using the row id as a tie-breaker.
+SORT_VALUE_TYPES = {
+    "id": int,
+    "price": float,
+    "created_at": datetime,
+    "relevance": float,
+}
+
+def encode_cursor(sort: str, descending: bool, value: Any, last_id: int) -> str:
+    """Builds an opaque `after` token from the sort key of the last row of a page."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort, "d": descending, "v": value, "i": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str, sort: str, descending: bool) -> Tuple[Any, int]:
+    """
+    Decodes an `after` token into (sort value, last id).
+    Raises a 400 if the token is malformed or was issued for a different ordering.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["s"] != sort or payload["d"] != descending:
+            raise ValueError("cursor does not match the requested ordering")
+        value_type = SORT_VALUE_TYPES[sort]
+        value = payload["v"]
+        if value_type is datetime:
+            value = datetime.fromisoformat(value)
+        else:
+            value = value_type(value)
+        return value, int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid pagination cursor: {e}")
+
+def paginate(query: str, params: List[Any], column: str, id_column: str, sort: str, descending: bool, after: Optional[str] = None, skip: int = 0, limit: int = 100) -> Tuple[str, List[Any]]:
+    """
+    Appends ordering and paging to a query that already has a WHERE clause.
+    With an `after` token the page is located with a row-value seek such as
+    `(p.price, p.id) > ($3, $4)`, so deep pages cost the same as the first one.
+    Without it, OFFSET is used for backwards compatibility.
+    """
+    params = list(params)
+    param_idx = len(params) + 1
+    seek_column = id_column if sort == "id" else column
+    direction = "DESC" if descending else "ASC"
+
+    if after:
+        value, last_id = decode_cursor(after, sort, descending)
+        operator = "<" if descending else ">"
+        if seek_column == id_column:
+            query += f" AND {id_column} {operator} ${param_idx}"
+            params.append(last_id)
+            param_idx += 1
+        else:
+            query += f" AND ({seek_column}, {id_column}) {operator} (${param_idx}, ${param_idx + 1})"
+            params.extend([value, last_id])
+            param_idx += 2
+
+    if seek_column == id_column:
+        query += f" ORDER BY {id_column} {direction}"
+    else:
+        query += f" ORDER BY {seek_column} {direction}, {id_column} {direction}"
+
+    if after:
+        query += f" LIMIT ${param_idx}"
+        params.append(limit)
+    else:
+        query += f" OFFSET ${param_idx} LIMIT ${param_idx + 1}"
+        params.extend([skip, limit])
+    return query, params
+
+def next_cursor(items: List[Any], limit: int, sort: str, descending: bool, attribute: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the `after` token for the page following `items`, or None when this is the last page.
+    The sort value is read from `attribute`, which defaults to the sort key itself.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    attribute = attribute or sort
+    if isinstance(last, dict):
+        return encode_cursor(sort, descending, last[attribute], last["id"])
+    return encode_cursor(sort, descending, getattr(last, attribute), last.id)
+
+def parse_sort(sort: str, allowed: Dict[str, str]) -> Tuple[str, str, bool]:
+    """
+    Parses a public sort parameter such as `price` or `-created_at` into (sort key, SQL column, descending).
+    `allowed` maps sort keys to the SQL column they order by.
+    """
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in allowed:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort '{sort}'. Allowed: {', '.join(sorted(allowed))}")
+    return key, allowed[key], descending
@@ -0,0 +1,26 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Header carrying the keyset pagination token of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class CachedResponse(NamedTuple):
+    """An already-serialized JSON body together with the headers sent with it."""
+    body: bytes
+    headers: Dict[str, str]
+
+def json_list_response(adapter: TypeAdapter, items: List[Any], cursor: Optional[str] = None) -> CachedResponse:
+    """Serializes a page of models once, with pydantic-core, into a cacheable response."""
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+    return CachedResponse(adapter.dump_json(items), headers)
+
+def raw_json_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Sends pre-serialized JSON as-is. Returning a Response skips FastAPI's response_model
+    validation and re-encoding; the route's response_model still documents the shape.
+    """
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached_json_response(cached: CachedResponse) -> Response:
+    return raw_json_response(cached.body, cached.headers)
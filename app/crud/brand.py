@@ -1,6 +1,13 @@
 import asyncpg
 from typing import Optional, List
 from schemas import schemas
+from core.redis.resource_version import bump_resource_version
+from core.redis.product_cache import invalidate_products
+
+async def _invalidate_brand_products(db: asyncpg.Connection, brand_id: int):
+    """Cached product details embed the brand name, so the brand's products must be reloaded."""
+    rows = await db.fetch("SELECT id FROM products WHERE brand_id = $1", brand_id)
+    await invalidate_products([row['id'] for row in rows])
 
 async def get_brands(db: asyncpg.Connection) -> List[schemas.Brand]:
     rows = await db.fetch("SELECT id, name FROM brands")
@@ -14,16 +21,24 @@ async def get_brand_by_id(db: asyncpg.Connection, brand_id: int) -> Optional[sch
 
 async def create_brand(db: asyncpg.Connection, brand: schemas.BrandCreate) -> schemas.Brand:
     row = await db.fetchrow("INSERT INTO brands (name) VALUES ($1) RETURNING id, name", brand.name)
+    await bump_resource_version("brands")
     return schemas.Brand(id=row['id'], name=row['name'])
 
 async def update_brand(db: asyncpg.Connection, brand_id: int, brand: schemas.BrandCreate) -> Optional[schemas.Brand]:
     row = await db.fetchrow("UPDATE brands SET name = $1 WHERE id = $2 RETURNING id, name", brand.name, brand_id)
     if row:
+        await _invalidate_brand_products(db, brand_id)
+        # Product responses embed the brand name
+        await bump_resource_version("brands", "products")
         return schemas.Brand(id=row['id'], name=row['name'])
     return None
 
 async def delete_brand(db: asyncpg.Connection, brand_id: int) -> Optional[schemas.Brand]:
+    # Evicted while products still point at the brand
+    await _invalidate_brand_products(db, brand_id)
     row = await db.fetchrow("DELETE FROM brands WHERE id = $1 RETURNING id, name", brand_id)
     if row:
+        # Product responses embed the brand name
+        await bump_resource_version("brands", "products")
         return schemas.Brand(id=row['id'], name=row['name'])
     return None
@@ -1,6 +1,13 @@
 import asyncpg
 from typing import Optional, List
 from schemas import schemas
+from core.redis.resource_version import bump_resource_version
+from core.redis.product_cache import invalidate_products
+
+async def _invalidate_category_products(db: asyncpg.Connection, category_id: int):
+    """Cached product details embed the category name, so the category's products must be reloaded."""
+    rows = await db.fetch("SELECT id FROM products WHERE category_id = $1", category_id)
+    await invalidate_products([row['id'] for row in rows])
 
 async def get_categories(db: asyncpg.Connection) -> List[schemas.Category]:
     rows = await db.fetch("SELECT id, name FROM categories")
@@ -14,16 +21,24 @@ async def get_category_by_id(db: asyncpg.Connection, category_id: int) -> Option
 
 async def create_category(db: asyncpg.Connection, category: schemas.CategoryCreate) -> schemas.Category:
     row = await db.fetchrow("INSERT INTO categories (name) VALUES ($1) RETURNING id, name", category.name)
+    await bump_resource_version("categories")
     return schemas.Category(id=row['id'], name=row['name'])
 
 async def update_category(db: asyncpg.Connection, category_id: int, category: schemas.CategoryCreate) -> Optional[schemas.Category]:
     row = await db.fetchrow("UPDATE categories SET name = $1 WHERE id = $2 RETURNING id, name", category.name, category_id)
     if row:
+        await _invalidate_category_products(db, category_id)
+        # Product responses embed the category name
+        await bump_resource_version("categories", "products")
         return schemas.Category(id=row['id'], name=row['name'])
     return None
 
 async def delete_category(db: asyncpg.Connection, category_id: int) -> Optional[schemas.Category]:
+    # Evicted while products still point at the category
+    await _invalidate_category_products(db, category_id)
     row = await db.fetchrow("DELETE FROM categories WHERE id = $1 RETURNING id, name", category_id)
     if row:
+        # Product responses embed the category name
+        await bump_resource_version("categories", "products")
         return schemas.Category(id=row['id'], name=row['name'])
     return None
@@ -5,9 +5,17 @@ from typing import List, Optional
 from schemas import schemas
 from datetime import datetime, timezone
 import pytz
+from core.utils.pagination import paginate
+from core.redis.product_cache import invalidate_products
+from core.redis.tiered_cache import TieredCache, response_codec
+from core.redis.resource_version import bump_resource_version
+from crud.product_price import refresh_product_prices, price_schedule_changed
 
 VIETNAM_TZ = pytz.timezone('Asia/Ho_Chi_Minh')
 
+# Discount listings (admin and active); invalidated on every discount write
+discount_list_cache = TieredCache("discounts", *response_codec(), ttl=60, max_items=256)
+
 def to_vietnam_naive(dt: Optional[datetime]) -> Optional[datetime]:
     if dt is None:
         return None
@@ -29,7 +37,18 @@ def to_vietnam_aware(dt: Optional[datetime]) -> Optional[datetime]:
         return VIETNAM_TZ.localize(dt)
     return dt.astimezone(VIETNAM_TZ)
 
-async def get_discounts(db: asyncpg.Connection, skip: int = 0, limit: int = 100, is_active: Optional[bool] = None, include_expired: bool = False) -> List[schemas.Discount]:
+async def _on_discount_changed(db: asyncpg.Connection, product_ids: List[Optional[int]]):
+    """Keeps the effective-price read model and the caches in step with a discount write."""
+    product_ids = [pid for pid in set(product_ids) if pid is not None]
+    if product_ids:
+        await refresh_product_prices(db, product_ids)
+    await discount_list_cache.invalidate()
+    await bump_resource_version("discounts")
+    await invalidate_products(product_ids)
+    # The next start/end boundary may have moved; wake the price scheduler
+    price_schedule_changed.set()
+
+async def get_discounts(db: asyncpg.Connection, skip: int = 0, limit: int = 100, is_active: Optional[bool] = None, include_expired: bool = False, after: Optional[str] = None) -> List[schemas.Discount]:
     query = "SELECT id, name, percent, start_date, end_date, product_id, is_active FROM discounts WHERE 1=1"
     params = []
     param_count = 1
@@ -42,9 +61,7 @@ async def get_discounts(db: asyncpg.Connection, skip: int = 0, limit: int = 100,
     if not include_expired:
         query += f" AND start_date <= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp AND end_date >= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp"
     
-    query += f" ORDER BY id OFFSET ${param_count} LIMIT ${param_count + 1}"
-    params.append(skip)
-    params.append(limit)
+    query, params = paginate(query, params, "id", "id", "id", False, after=after, skip=skip, limit=limit)
 
     rows = await db.fetch(query, *params)
     return [schemas.Discount(
@@ -69,6 +86,7 @@ async def create_discount(db: asyncpg.Connection, discount: schemas.DiscountCrea
         """, discount.name, discount.percent, start_date_aware, end_date_aware, discount.product_id)
     except ForeignKeyViolationError:
         raise HTTPException(status_code=404, detail=f"Product with id {discount.product_id} not found.")
+    await _on_discount_changed(db, [discount.product_id])
     return schemas.Discount(
         id=row["id"], name=discount.name, percent=discount.percent, start_date=to_vietnam_aware(discount.start_date), end_date=to_vietnam_aware(discount.end_date), product_id=discount.product_id
     )
@@ -77,13 +95,16 @@ async def update_discount(db: asyncpg.Connection, discount_id: int, discount: sc
     try:
         start_date_aware = to_vietnam_naive(discount.start_date)
         end_date_aware = to_vietnam_naive(discount.end_date)
+        # The CTE reads the pre-update row so the product the discount is moved away from is invalidated too
         row = await db.fetchrow("""
+            WITH previous AS (SELECT product_id FROM discounts WHERE id=$6)
             UPDATE discounts SET name=$1, percent=$2, start_date=$3, end_date=$4, product_id=$5
-            WHERE id=$6 RETURNING id, name, percent, start_date, end_date, product_id
+            WHERE id=$6 RETURNING id, name, percent, start_date, end_date, product_id, (SELECT product_id FROM previous) AS previous_product_id
         """, discount.name, discount.percent, start_date_aware, end_date_aware, discount.product_id, discount_id)
     except ForeignKeyViolationError:
         raise HTTPException(status_code=404, detail=f"Product with id {discount.product_id} not found.")
     if row:
+        await _on_discount_changed(db, [row["product_id"], row["previous_product_id"]])
         return schemas.Discount(
             id=row["id"], name=row["name"], percent=row["percent"], start_date=to_vietnam_aware(row["start_date"]), end_date=to_vietnam_aware(row["end_date"]), product_id=row["product_id"]
         )
@@ -95,13 +116,15 @@ async def delete_discount(db: asyncpg.Connection, discount_id: int) -> Optional[
         return None
     row = await db.fetchrow("UPDATE discounts SET is_active=FALSE WHERE id = $1 RETURNING id, name, percent, start_date, end_date, product_id, is_active", discount_id)
     if row:
+        await _on_discount_changed(db, [row["product_id"]])
         return schemas.Discount(
             id=row["id"], name=row["name"], percent=row["percent"], start_date=to_vietnam_aware(row["start_date"]), end_date=to_vietnam_aware(row["end_date"]), product_id=row["product_id"], is_active=row["is_active"]
         )
     return None
 
-async def get_deleted_discounts(db: asyncpg.Connection, skip: int = 0, limit: int = 100) -> List[schemas.Discount]:
-    rows = await db.fetch("SELECT id, name, percent, start_date, end_date, product_id, is_active FROM discounts WHERE is_active=FALSE ORDER BY id OFFSET $1 LIMIT $2", skip, limit)
+async def get_deleted_discounts(db: asyncpg.Connection, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[schemas.Discount]:
+    query, params = paginate("SELECT id, name, percent, start_date, end_date, product_id, is_active FROM discounts WHERE is_active=FALSE", [], "id", "id", "id", False, after=after, skip=skip, limit=limit)
+    rows = await db.fetch(query, *params)
     return [schemas.Discount(
         id=row["id"], name=row["name"], percent=row["percent"], start_date=to_vietnam_aware(row["start_date"]), end_date=to_vietnam_aware(row["end_date"]), product_id=row["product_id"], is_active=row["is_active"]
     ) for row in rows]
@@ -112,6 +135,7 @@ async def restore_discount(db: asyncpg.Connection, discount_id: int) -> Optional
         WHERE id=$1 RETURNING id, name, percent, start_date, end_date, product_id, is_active
     """, discount_id)
     if row:
+        await _on_discount_changed(db, [row["product_id"]])
         return schemas.Discount(
             id=row["id"], name=row["name"], percent=row["percent"], start_date=to_vietnam_aware(row["start_date"]), end_date=to_vietnam_aware(row["end_date"]), product_id=row["product_id"], is_active=row["is_active"]
         )
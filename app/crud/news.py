@@ -1,8 +1,16 @@
 import asyncpg
 from typing import List, Optional
 from schemas import schemas
+from core.utils.pagination import paginate, parse_sort
+from core.redis.tiered_cache import TieredCache, response_codec
+from core.redis.resource_version import bump_resource_version
 
-async def get_news(db: asyncpg.Connection, skip: int = 0, limit: int = 100, search_query: Optional[str] = None) -> List[schemas.News]:
+NEWS_SORT_COLUMNS = {"id": "id", "created_at": "created_at"}
+
+# Public news listings; invalidated on every news write
+news_list_cache = TieredCache("news", *response_codec(), ttl=60, max_items=256)
+
+async def get_news(db: asyncpg.Connection, skip: int = 0, limit: int = 100, search_query: Optional[str] = None, sort: str = "id", after: Optional[str] = None) -> List[schemas.News]:
     query = """
         SELECT id, title, content, image_url, is_active, created_at, updated_at
         FROM news
@@ -16,9 +24,8 @@ async def get_news(db: asyncpg.Connection, skip: int = 0, limit: int = 100, sear
         params.append(f"%{search_query}%")
         param_idx += 1
 
-    query += f" ORDER BY id OFFSET ${param_idx} LIMIT ${param_idx + 1}"
-    params.append(skip)
-    params.append(limit)
+    sort_key, sort_column, descending = parse_sort(sort, NEWS_SORT_COLUMNS)
+    query, params = paginate(query, params, sort_column, "id", sort_key, descending, after=after, skip=skip, limit=limit)
 
     rows = await db.fetch(query, *params)
     return [schemas.News(
@@ -38,6 +45,8 @@ async def create_news(db: asyncpg.Connection, news: schemas.NewsCreate) -> schem
         INSERT INTO news (title, content, image_url, is_active)
         VALUES ($1, $2, $3, $4) RETURNING id, created_at, updated_at
     """, news.title, news.content, news.image_url, news.is_active)
+    await news_list_cache.invalidate()
+    await bump_resource_version("news")
     return schemas.News(
         id=row["id"], title=news.title, content=news.content, image_url=news.image_url, is_active=news.is_active, created_at=row["created_at"], updated_at=row["updated_at"]
     )
@@ -48,6 +57,8 @@ async def update_news(db: asyncpg.Connection, news_id: int, news: schemas.NewsUp
         WHERE id=$5 RETURNING id, title, content, image_url, is_active, created_at, updated_at
     """, news.title, news.content, news.image_url, news.is_active, news_id)
     if row:
+        await news_list_cache.invalidate()
+        await bump_resource_version("news")
         return schemas.News(
             id=row["id"], title=row["title"], content=row["content"], image_url=row["image_url"], is_active=row["is_active"], created_at=row["created_at"], updated_at=row["updated_at"]
         )
@@ -59,13 +70,16 @@ async def delete_news(db: asyncpg.Connection, news_id: int) -> Optional[schemas.
         return None
     row = await db.fetchrow("UPDATE news SET is_active=FALSE, updated_at=NOW() WHERE id = $1 RETURNING id, title, content, image_url, is_active, created_at, updated_at", news_id)
     if row:
+        await news_list_cache.invalidate()
+        await bump_resource_version("news")
         return schemas.News(
             id=row["id"], title=row["title"], content=row["content"], image_url=row["image_url"], is_active=row["is_active"], created_at=row["created_at"], updated_at=row["updated_at"]
         )
     return None
 
-async def get_deleted_news(db: asyncpg.Connection, skip: int = 0, limit: int = 100) -> List[schemas.News]:
-    rows = await db.fetch("SELECT id, title, content, image_url, is_active, created_at, updated_at FROM news WHERE is_active=FALSE ORDER BY id OFFSET $1 LIMIT $2", skip, limit)
+async def get_deleted_news(db: asyncpg.Connection, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[schemas.News]:
+    query, params = paginate("SELECT id, title, content, image_url, is_active, created_at, updated_at FROM news WHERE is_active=FALSE", [], "id", "id", "id", False, after=after, skip=skip, limit=limit)
+    rows = await db.fetch(query, *params)
     return [schemas.News(
         id=row["id"], title=row["title"], content=row["content"], image_url=row["image_url"], is_active=row["is_active"], created_at=row["created_at"], updated_at=row["updated_at"]
     ) for row in rows]
@@ -76,6 +90,8 @@ async def restore_news(db: asyncpg.Connection, news_id: int) -> Optional[schemas
         WHERE id=$1 RETURNING id, title, content, image_url, is_active, created_at, updated_at
     """, news_id)
     if row:
+        await news_list_cache.invalidate()
+        await bump_resource_version("news")
         return schemas.News(
             id=row["id"], title=row["title"], content=row["content"], image_url=row["image_url"], is_active=row["is_active"], created_at=row["created_at"], updated_at=row["updated_at"]
         )
@@ -10,14 +10,20 @@ from schemas import schemas
 from schemas.schemas import OrderStatusUpdateRequest
 from core.email_sender import send_email
 from crud.user import get_user_by_id
-from crud.product import get_product_by_id
+from crud.product import get_products_by_ids
 from starlette.concurrency import run_in_threadpool
 from core.app_config import logger
+from core.utils.pagination import paginate
+from core.redis.product_cache import invalidate_products
+from core.redis.purchase_events import queue_changed_orders
 from datetime import datetime
 import pytz
 
 VIETNAM_TZ = pytz.timezone('Asia/Ho_Chi_Minh')
 
+# Orders in these statuses count as purchases for recommendations
+SUCCESSFUL_STATUSES = [OrderStatus.PAID.value, OrderStatus.PROCESSING.value, OrderStatus.DELIVERED.value]
+
 def to_vietnam_aware(dt: Optional[datetime]) -> Optional[datetime]:
     if dt is None:
         return None
@@ -39,14 +45,13 @@ async def create_order(db: asyncpg.Connection, data: schemas.OrderCreate, user_i
 
     # Calculate total_amount from items, as frontend might send it, but backend should verify
     calculated_total_amount = 0
+    products_by_id = {product.id: product for product in await get_products_by_ids(db, [item.product_id for item in data.items])}
     for item in data.items:
-        product = await get_product_by_id(db, item.product_id)
+        product = products_by_id.get(item.product_id)
         if not product or not product.is_active:
             raise HTTPException(status_code=400, detail=f"Product with ID {item.product_id} not found or is inactive.")
-        # Calculate final_price on backend for comparison
-        backend_final_price = product.price
-        if product.discount_percent is not None:
-            backend_final_price = product.price * (1 - product.discount_percent / 100)
+        # final_price comes from the product_prices read model
+        backend_final_price = product.final_price
 
         if abs(backend_final_price - item.price) > 0.01: # Use a small tolerance for float comparison
             raise HTTPException(status_code=400, detail=f"Price mismatch for product ID {item.product_id}. Expected {backend_final_price:.2f}, got {item.price:.2f}.")
@@ -65,6 +70,10 @@ async def create_order(db: asyncpg.Connection, data: schemas.OrderCreate, user_i
                          order_id, item.product_id, item.quantity, item.price)
         # Deduct product quantity from stock
         await db.execute("UPDATE products SET quantity = quantity - $1 WHERE id = $2 AND quantity >= $1", item.quantity, item.product_id)
+    # Stock changed, so cached product details are stale
+    await invalidate_products([item.product_id for item in data.items])
+    if status.value in SUCCESSFUL_STATUSES:
+        await queue_changed_orders(order_code)
 
     event = {
         "event": "order_created",
@@ -90,7 +99,7 @@ async def create_order(db: asyncpg.Connection, data: schemas.OrderCreate, user_i
             # Prepare items with product names for the email
             items_for_email = []
             for item_request in data.items:
-                product = await get_product_by_id(db, item_request.product_id)
+                product = products_by_id.get(item_request.product_id)
                 item_data = item_request.model_dump()
                 item_data['product_name'] = product.name if product else "Unknown Product"
                 items_for_email.append(item_data)
@@ -169,6 +178,7 @@ async def get_order_by_code(db: asyncpg.Connection, order_code: str) -> Optional
 
 async def update_order_status(db: asyncpg.Connection, data: OrderStatusUpdateRequest):
     await db.execute("UPDATE orders SET status = $1 WHERE order_code = $2", data.status.value, data.order_code)
+    await queue_changed_orders(data.order_code)
 
 async def process_sepay_payment(db: asyncpg.Connection, order_code: str, amount: int) -> bool:
     """
@@ -227,17 +237,18 @@ async def process_sepay_payment(db: asyncpg.Connection, order_code: str, amount:
 
     return True
 
-async def get_all_orders(db: asyncpg.Connection, search_query: Optional[str] = None) -> List[dict]:
-    query = "SELECT * FROM orders"
+async def get_all_orders(db: asyncpg.Connection, search_query: Optional[str] = None, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[dict]:
+    query = "SELECT * FROM orders WHERE 1=1"
     params = []
     param_count = 1
 
     if search_query:
-        query += f" WHERE order_code ILIKE ${param_count} OR CAST(user_id AS TEXT) ILIKE ${param_count}"
+        query += f" AND (order_code ILIKE ${param_count} OR CAST(user_id AS TEXT) ILIKE ${param_count})"
         params.append(f'%{search_query}%')
         param_count += 1
 
-    query += " ORDER BY created_at DESC"
+    # Newest first, with the id as a tie-breaker so pages are stable
+    query, params = paginate(query, params, "created_at", "id", "created_at", True, after=after, skip=skip, limit=limit)
     orders = await db.fetch(query, *params)
     return [dict(order) for order in orders]
 
@@ -252,8 +263,7 @@ async def get_all_purchase_history(db: asyncpg.Connection) -> List[dict]:
         JOIN order_items oi ON o.id = oi.order_id
         WHERE o.status = ANY($1::text[])
     """
-    successful_statuses = [OrderStatus.PAID.value, OrderStatus.PROCESSING.value, OrderStatus.DELIVERED.value]
-    rows = await db.fetch(query, successful_statuses)
+    rows = await db.fetch(query, SUCCESSFUL_STATUSES)
     return [dict(row) for row in rows]
 
 async def get_purchased_product_ids_by_user(db: asyncpg.Connection, user_id: int) -> List[int]:
@@ -266,6 +276,53 @@ async def get_purchased_product_ids_by_user(db: asyncpg.Connection, user_id: int
         JOIN order_items oi ON o.id = oi.order_id
         WHERE o.user_id = $1 AND o.status = ANY($2::text[])
     """
-    successful_statuses = [OrderStatus.PAID.value, OrderStatus.PROCESSING.value, OrderStatus.DELIVERED.value]
-    rows = await db.fetch(query, user_id, successful_statuses)
+    rows = await db.fetch(query, user_id, SUCCESSFUL_STATUSES)
+    return [row['product_id'] for row in rows]
+
+async def get_order_product_ids(db: asyncpg.Connection, order_codes: List[str]) -> List[int]:
+    """Distinct product IDs in the given orders, whatever their status."""
+    rows = await db.fetch("""
+        SELECT DISTINCT oi.product_id
+        FROM orders o
+        JOIN order_items oi ON o.id = oi.order_id
+        WHERE o.order_code = ANY($1::text[])
+    """, order_codes)
     return [row['product_id'] for row in rows]
+
+async def get_co_purchases(db: asyncpg.Connection, product_ids: List[int]) -> List[asyncpg.Record]:
+    """
+    Fetches (user_id, product_id, purchases) for every successful purchase of every user who
+    successfully bought any of `product_ids`: the users whose baskets link those products to others.
+    """
+    query = """
+        WITH buyers AS (
+            SELECT DISTINCT o.user_id
+            FROM orders o
+            JOIN order_items oi ON o.id = oi.order_id
+            WHERE oi.product_id = ANY($1::int[]) AND o.status = ANY($2::text[])
+        )
+        SELECT o.user_id, oi.product_id, COUNT(*) AS purchases
+        FROM orders o
+        JOIN order_items oi ON o.id = oi.order_id
+        WHERE o.user_id IN (SELECT user_id FROM buyers) AND o.status = ANY($2::text[])
+        GROUP BY o.user_id, oi.product_id
+    """
+    return await db.fetch(query, product_ids, SUCCESSFUL_STATUSES)
+
+async def get_purchase_norms(db: asyncpg.Connection, product_ids: List[int]) -> List[asyncpg.Record]:
+    """
+    Fetches (product_id, norm) where norm is the sum over users of their squared purchase count
+    of the product, i.e. the squared length of its column in the user-item matrix.
+    """
+    query = """
+        SELECT product_id, SUM(purchases * purchases) AS norm
+        FROM (
+            SELECT o.user_id, oi.product_id, COUNT(*) AS purchases
+            FROM orders o
+            JOIN order_items oi ON o.id = oi.order_id
+            WHERE oi.product_id = ANY($1::int[]) AND o.status = ANY($2::text[])
+            GROUP BY o.user_id, oi.product_id
+        ) per_user
+        GROUP BY product_id
+    """
+    return await db.fetch(query, product_ids, SUCCESSFUL_STATUSES)
@@ -1,5 +1,6 @@
 from core.app_config import logger
 from core.utils.enums import OrderStatus
+from core.redis.purchase_events import queue_changed_orders
 import asyncpg
 
 
@@ -30,6 +31,7 @@ async def update_order_payment_status(db: asyncpg.Connection, order_id: str, sta
             status.value, order_id
         )
         logger.info(f"Order {order_id} status updated to {status.value}")
+        await queue_changed_orders(order_id)
         return True
     except Exception as e:
         logger.error(f"Failed to update order {order_id} status to {status.value}: {e}", exc_info=True)
@@ -1,27 +1,45 @@
 import asyncpg
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from schemas import schemas
 from datetime import datetime
 import json
 from core.app_config import logger
 from crud.discount import to_vietnam_aware
+from core.utils.pagination import paginate, parse_sort
+from core.redis import product_cache
+from core.redis.tiered_cache import TieredCache, response_codec
+from core.redis.redis_client import get_redis_client
+from core.utils.enums import CommentTreeConfig
+from core.redis.resource_version import bump_resource_version
+from crud.product_price import refresh_product_prices
+from crud.product_similar import mark_similar_dirty, get_similar_product_ids
 
-async def _get_full_product_details_by_id(db: asyncpg.Connection, product_id: int) -> Optional[schemas.Product]:
-    """Internal helper to fetch a product by ID, irrespective of its is_active status."""
-    row = await db.fetchrow("""
-        SELECT p.id, p.name, p.description, p.price, p.quantity, p.image_urls, p.is_active, p.created_at, p.updated_at, p.release_date,
-               c.id as category_id, c.name as category_name,
-               b.id as brand_id, b.name as brand_name,
-               d.percent as discount_percent, d.start_date, d.end_date
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN brands b ON p.brand_id = b.id
-        LEFT JOIN discounts d ON p.id = d.product_id AND d.is_active = TRUE AND d.start_date <= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp AND d.end_date >= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp
-        WHERE p.id = $1
-    """, product_id)
-    if not row:
-        return None
+# Effective (discounted) price from the product_prices read model, falling back to the list price
+# for a product whose row has not been written yet. Sorting, seeking, filtering and the cursor
+# value (Product.final_price) must all use this same expression, or pages skip or repeat rows.
+EFFECTIVE_PRICE_SQL = "COALESCE(pp.final_price, p.price)"
+
+# Public sort keys for product listings and the column each one orders by
+PRODUCT_SORT_COLUMNS = {"id": "p.id", "price": EFFECTIVE_PRICE_SQL, "created_at": "p.created_at"}
+# Product attribute holding each sort key's value, used to build the next cursor
+PRODUCT_SORT_ATTRIBUTES = {"price": "final_price"}
+
+_PRODUCT_LISTING_FROM = " FROM products p LEFT JOIN product_prices pp ON pp.product_id = p.id"
+
+_PRODUCT_DETAILS_QUERY = f"""
+    SELECT p.id, p.name, p.description, p.price, p.quantity, p.image_urls, p.is_active, p.created_at, p.updated_at, p.release_date,
+           c.id as category_id, c.name as category_name,
+           b.id as brand_id, b.name as brand_name,
+           pp.discount_percent, pp.start_date, pp.end_date, {EFFECTIVE_PRICE_SQL} AS final_price
+    FROM unnest($1::int[]) WITH ORDINALITY AS ids(id, ord)
+    JOIN products p ON p.id = ids.id
+    LEFT JOIN categories c ON p.category_id = c.id
+    LEFT JOIN brands b ON p.brand_id = b.id
+    LEFT JOIN product_prices pp ON pp.product_id = p.id
+    ORDER BY ids.ord
+"""
 
+def _row_to_product(row: asyncpg.Record) -> schemas.Product:
     product_data = dict(row)
     if product_data.get("image_urls"):
         try:
@@ -34,27 +52,65 @@ async def _get_full_product_details_by_id(db: asyncpg.Connection, product_id: in
     discount_percent = product_data.pop("discount_percent", None)
     start_date = to_vietnam_aware(product_data.pop("start_date", None))
     end_date = to_vietnam_aware(product_data.pop("end_date", None))
-    final_price = product_data["price"]
-    if discount_percent is not None:
-        final_price = product_data["price"] * (1 - discount_percent / 100)
-    
+    final_price = product_data.pop("final_price")
+
     category_data = {"id": product_data["category_id"], "name": product_data.pop("category_name")} if product_data.get("category_id") else None
     brand_data = {"id": product_data["brand_id"], "name": product_data.pop("brand_name")} if product_data.get("brand_id") else None
-    
+
     return schemas.Product(**product_data, discount_percent=discount_percent, final_price=final_price, start_date=start_date, end_date=end_date, category=category_data, brand=brand_data)
 
-async def get_products(db: asyncpg.Connection, skip: int = 0, limit: int = 100, search_query: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[schemas.Product]:
-    # This function is for public-facing queries, so it correctly filters for is_active = TRUE
-    query = """
-        SELECT p.id
-        FROM products p
-        WHERE p.is_active = TRUE
+async def _get_full_product_details_by_ids(db: asyncpg.Connection, product_ids: List[int]) -> List[schemas.Product]:
+    """
+    Internal helper to hydrate many products in a single query, irrespective of their is_active status.
+    Products are returned in the order of `product_ids`; ids that do not exist are skipped.
     """
+    if not product_ids:
+        return []
+    rows = await db.fetch(_PRODUCT_DETAILS_QUERY, list(product_ids))
+    return [_row_to_product(row) for row in rows]
+
+async def _get_full_product_details_by_id(db: asyncpg.Connection, product_id: int) -> Optional[schemas.Product]:
+    """Internal helper to fetch a product by ID, irrespective of its is_active status."""
+    products = await _get_full_product_details_by_ids(db, [product_id])
+    return products[0] if products else None
+
+async def get_products_by_ids(db: asyncpg.Connection, product_ids: List[int], include_inactive: bool = False) -> List[schemas.Product]:
+    """Fetches many products in one round trip, preserving the order of `product_ids`."""
+    products = await _get_full_product_details_by_ids(db, product_ids)
+    if include_inactive:
+        return products
+    return [product for product in products if product.is_active]
+
+def normalize_search_query(search_query: Optional[str]) -> Optional[str]:
+    """Collapses whitespace and lowercases a search string; returns None for blank input."""
+    if not search_query:
+        return None
+    normalized = " ".join(search_query.split()).lower()
+    return normalized or None
+
+def _search_tsquery(param_idx: int) -> str:
+    return f"websearch_to_tsquery('simple', f_unaccent(${param_idx}))"
+
+def _search_rank(param_idx: int) -> str:
+    # Full-text rank plus trigram word similarity so near-misses (typos) still score
+    return f"(ts_rank_cd(p.search_vector, {_search_tsquery(param_idx)}) + word_similarity(f_unaccent(${param_idx}), f_unaccent(lower(p.name))))::float8"
+
+def _build_product_filters(search_query: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None) -> Tuple[str, list, Optional[int]]:
+    """
+    Builds the WHERE clause shared by product listings and facet counts.
+    Returns (sql, params, index of the search parameter or None).
+    Search uses the accent-folded `search_vector` GIN index and the trigram index on the name,
+    so it never needs a sequential scan.
+    """
+    query = " WHERE p.is_active = TRUE"
     params = []
     param_idx = 1
+    search_param_idx = None
+    search_query = normalize_search_query(search_query)
     if search_query:
-        query += f" AND p.name ILIKE ${param_idx}"
-        params.append(f'%{search_query}%')
+        search_param_idx = param_idx
+        query += f" AND (p.search_vector @@ {_search_tsquery(param_idx)} OR f_unaccent(${param_idx}) <% f_unaccent(lower(p.name)))"
+        params.append(search_query)
         param_idx += 1
     if category_id:
         query += f" AND p.category_id = ${param_idx}"
@@ -65,31 +121,146 @@ async def get_products(db: asyncpg.Connection, skip: int = 0, limit: int = 100,
         params.append(brand_id)
         param_idx += 1
     if min_price is not None:
-        query += f" AND p.price >= ${param_idx}"
+        query += f" AND {EFFECTIVE_PRICE_SQL} >= ${param_idx}"
         params.append(min_price)
         param_idx += 1
     if max_price is not None:
-        query += f" AND p.price <= ${param_idx}"
+        query += f" AND {EFFECTIVE_PRICE_SQL} <= ${param_idx}"
         params.append(max_price)
         param_idx += 1
+    return query, params, search_param_idx
 
-    query += f" ORDER BY p.id OFFSET ${param_idx} LIMIT ${param_idx + 1}"
-    params.extend([skip, limit])
+def resolve_product_sort(sort: Optional[str], search_query: Optional[str]) -> str:
+    """Searches default to best match first; plain listings default to id order."""
+    if sort:
+        return sort
+    return "-relevance" if normalize_search_query(search_query) else "id"
+
+async def get_products(db: asyncpg.Connection, skip: int = 0, limit: int = 100, search_query: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, sort: Optional[str] = None, after: Optional[str] = None) -> List[schemas.Product]:
+    # This function is for public-facing queries, so it correctly filters for is_active = TRUE
+    where, params, search_param_idx = _build_product_filters(search_query, category_id, brand_id, min_price, max_price)
+
+    sort = resolve_product_sort(sort, search_query)
+    allowed_sorts = dict(PRODUCT_SORT_COLUMNS)
+    if search_param_idx is not None:
+        allowed_sorts["relevance"] = _search_rank(search_param_idx)
+    sort_key, sort_column, descending = parse_sort(sort, allowed_sorts)
+
+    query = f"SELECT p.id, {sort_column} AS sort_value" + _PRODUCT_LISTING_FROM + where
+    query, params = paginate(query, params, sort_column, "p.id", sort_key, descending, after=after, skip=skip, limit=limit)
 
     rows = await db.fetch(query, *params)
-    products = []
-    for row in rows:
-        product = await _get_full_product_details_by_id(db, row['id'])
-        if product:
-            products.append(product)
+    products = await _get_full_product_details_by_ids(db, [row['id'] for row in rows])
+    if sort_key == "relevance":
+        relevance = {row['id']: row['sort_value'] for row in rows}
+        for product in products:
+            product.relevance = relevance.get(product.id)
     return products
 
+async def get_product_facets(db: asyncpg.Connection, price_buckets: List[float], search_query: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None) -> schemas.ProductFacets:
+    """
+    Counts matching products per category, per brand and per price bucket in a single
+    grouped query (GROUPING SETS), using the same filters as get_products.
+    `price_buckets` are ascending boundaries; N boundaries give N + 1 buckets.
+    """
+    where, params, _ = _build_product_filters(search_query, category_id, brand_id, min_price, max_price)
+    bucket_expr = f"width_bucket({EFFECTIVE_PRICE_SQL}, ${len(params) + 1}::float8[])"
+    params.append(price_buckets)
+    rows = await db.fetch(f"""
+        SELECT GROUPING(p.category_id) AS no_category, GROUPING(p.brand_id) AS no_brand, GROUPING({bucket_expr}) AS no_bucket,
+               p.category_id, c.name AS category_name, p.brand_id, b.name AS brand_name,
+               {bucket_expr} AS bucket, COUNT(*) AS count
+        FROM products p
+        LEFT JOIN product_prices pp ON pp.product_id = p.id
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN brands b ON p.brand_id = b.id
+        {where}
+        GROUP BY GROUPING SETS ((p.category_id, c.name), (p.brand_id, b.name), ({bucket_expr}), ())
+    """, *params)
+
+    total = 0
+    categories, brands = [], []
+    bucket_counts = {}
+    for row in rows:
+        if row["no_category"] and row["no_brand"] and row["no_bucket"]:
+            total = row["count"]
+        elif not row["no_category"]:
+            categories.append(schemas.FacetCount(id=row["category_id"], name=row["category_name"], count=row["count"]))
+        elif not row["no_brand"]:
+            brands.append(schemas.FacetCount(id=row["brand_id"], name=row["brand_name"], count=row["count"]))
+        else:
+            bucket_counts[row["bucket"]] = row["count"]
+
+    # width_bucket returns 0 below the first boundary and len(boundaries) at or above the last one
+    bounds = [None] + list(price_buckets) + [None]
+    buckets = [
+        schemas.PriceBucketCount(min_price=bounds[i], max_price=bounds[i + 1], count=bucket_counts.get(i, 0))
+        for i in range(len(price_buckets) + 1)
+    ]
+    categories.sort(key=lambda f: f.count, reverse=True)
+    brands.sort(key=lambda f: f.count, reverse=True)
+    return schemas.ProductFacets(total=total, categories=categories, brands=brands, price_buckets=buckets)
+
 async def get_product_by_id(db: asyncpg.Connection, product_id: int) -> Optional[schemas.Product]:
     product = await _get_full_product_details_by_id(db, product_id)
     if product and product.is_active:
         return product
     return None
 
+async def get_product_by_id_cached(db: asyncpg.Connection, product_id: int) -> Optional[schemas.Product]:
+    """
+    Read-through cache in front of get_product_by_id. Entries are invalidated by product,
+    discount and stock writes, and expire on their own when a discount window opens or closes.
+    """
+    cached = await product_cache.get_cached_product(product_id)
+    if cached is not None:
+        return cached if cached.is_active else None
+    product = await get_product_by_id(db, product_id)
+    if product:
+        next_discount_start = await db.fetchval("""
+            SELECT MIN(start_date) FROM discounts
+            WHERE product_id = $1 AND is_active = TRUE AND start_date > (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp
+        """, product_id)
+        await product_cache.cache_product(product, next_discount_start=to_vietnam_aware(next_discount_start))
+    return product
+
+async def get_similar_products(db: asyncpg.Connection, product_id: int, limit: int = 5) -> Optional[List[schemas.Product]]:
+    """
+    Content-based recommendations from the precomputed product_similar table: one primary-key
+    lookup plus a cached batch fetch. Returns None if the product does not exist.
+    """
+    similar_ids = await get_similar_product_ids(db, product_id)
+    if similar_ids is None:
+        # No list yet (new product or index not built): distinguish that from an unknown product
+        return [] if await get_product_by_id_cached(db, product_id) else None
+    # Fetch a few spares in case some neighbours were deactivated since the last refresh
+    products, _ = await get_products_by_ids_cached(db, similar_ids[:limit * 2])
+    return products[:limit]
+
+async def get_products_by_ids_cached(db: asyncpg.Connection, product_ids: List[int]) -> Tuple[List[schemas.Product], List[int]]:
+    """
+    Batch variant of get_product_by_id_cached: one MGET for cache hits and one
+    `WHERE id = ANY($1)` query for the misses.
+    Returns (active products in input order, ids that were not found or are inactive).
+    """
+    unique_ids = list(dict.fromkeys(product_ids))
+    found = {pid: product for pid, product in (await product_cache.get_cached_products(unique_ids)).items() if product.is_active}
+
+    miss_ids = [pid for pid in unique_ids if pid not in found]
+    if miss_ids:
+        loaded = await get_products_by_ids(db, miss_ids)
+        rows = await db.fetch("""
+            SELECT product_id, MIN(start_date) AS next_start FROM discounts
+            WHERE product_id = ANY($1::int[]) AND is_active = TRUE AND start_date > (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp
+            GROUP BY product_id
+        """, [product.id for product in loaded])
+        await product_cache.cache_products(loaded, {row["product_id"]: to_vietnam_aware(row["next_start"]) for row in rows})
+        found.update({product.id: product for product in loaded})
+
+    products = [found[pid] for pid in unique_ids if pid in found]
+    missing_ids = [pid for pid in unique_ids if pid not in found]
+    return products, missing_ids
+
 async def create_product(db: asyncpg.Connection, product: schemas.ProductCreate) -> schemas.Product:
     image_urls_json = json.dumps(product.image_urls) if product.image_urls else None
     release_date = product.release_date
@@ -102,22 +273,103 @@ async def create_product(db: asyncpg.Connection, product: schemas.ProductCreate)
     """,
         product.name, product.description, product.price, product.quantity, image_urls_json, product.is_active, release_date, product.brand_id, product.category_id
     )
+    await refresh_product_prices(db, [row["id"]])
+    await mark_similar_dirty(db, [row["id"]])
+    await bump_resource_version("products")
     return await _get_full_product_details_by_id(db, row["id"])
 
+_BULK_INSERT_QUERY = """
+    INSERT INTO products (name, description, price, quantity, image_urls, is_active, release_date, brand_id, category_id)
+    SELECT name, description, price, quantity, image_urls::jsonb, is_active, release_date, brand_id, category_id
+    FROM unnest($1::text[], $2::text[], $3::float8[], $4::int[], $5::text[], $6::bool[], $7::timestamp[], $8::int[], $9::int[])
+        AS rows(name, description, price, quantity, image_urls, is_active, release_date, brand_id, category_id)
+    RETURNING id
+"""
+
+def _product_insert_values(product: schemas.ProductCreate) -> tuple:
+    release_date = product.release_date
+    if release_date and release_date.tzinfo:
+        release_date = release_date.replace(tzinfo=None)
+    image_urls_json = json.dumps(product.image_urls) if product.image_urls else None
+    return (product.name, product.description, product.price, product.quantity, image_urls_json, product.is_active, release_date, product.brand_id, product.category_id)
+
+async def create_products_bulk(db: asyncpg.Connection, products: List[schemas.ProductCreate]) -> Tuple[List[schemas.Product], List[dict]]:
+    """
+    Inserts many products in one transaction with a single unnest-based INSERT ... RETURNING.
+    Rows referencing unknown brands/categories are rejected up front; if the batch insert
+    still fails, rows are retried one by one under savepoints so one bad row cannot abort the rest.
+    Returns (created products, [{"record": ..., "errors": [...]}] for rejected rows).
+    """
+    if not products:
+        return [], []
+
+    brand_ids = list({p.brand_id for p in products if p.brand_id is not None})
+    category_ids = list({p.category_id for p in products if p.category_id is not None})
+    known_brands = {row["id"] for row in await db.fetch("SELECT id FROM brands WHERE id = ANY($1::int[])", brand_ids)} if brand_ids else set()
+    known_categories = {row["id"] for row in await db.fetch("SELECT id FROM categories WHERE id = ANY($1::int[])", category_ids)} if category_ids else set()
+
+    failed = []
+    insertable = []
+    for product in products:
+        errors = []
+        if product.brand_id is not None and product.brand_id not in known_brands:
+            errors.append({"msg": f"Brand with id {product.brand_id} not found."})
+        if product.category_id is not None and product.category_id not in known_categories:
+            errors.append({"msg": f"Category with id {product.category_id} not found."})
+        if errors:
+            failed.append({"record": product.model_dump(mode='json'), "errors": errors})
+        else:
+            insertable.append(product)
+    if not insertable:
+        return [], failed
+
+    async with db.transaction():
+        values = [_product_insert_values(product) for product in insertable]
+        try:
+            async with db.transaction():
+                rows = await db.fetch(_BULK_INSERT_QUERY, *[list(column) for column in zip(*values)])
+            new_ids = [row["id"] for row in rows]
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Bulk product insert failed ({e}); retrying {len(values)} rows individually.")
+            new_ids = []
+            for product, row_values in zip(insertable, values):
+                try:
+                    async with db.transaction():
+                        rows = await db.fetch(_BULK_INSERT_QUERY, *[[value] for value in row_values])
+                    new_ids.append(rows[0]["id"])
+                except asyncpg.PostgresError as row_error:
+                    failed.append({"record": product.model_dump(mode='json'), "errors": [{"msg": str(row_error)}]})
+        await refresh_product_prices(db, new_ids)
+        await mark_similar_dirty(db, new_ids)
+
+    if new_ids:
+        await bump_resource_version("products")
+    created = await _get_full_product_details_by_ids(db, new_ids)
+    return created, failed
+
 async def update_product(db: asyncpg.Connection, product_id: int, product: schemas.ProductUpdate) -> Optional[schemas.Product]:
     # This function can update an inactive product, so it uses the helper directly
     image_urls_json = json.dumps(product.image_urls) if product.image_urls else None
     release_date = product.release_date
     if release_date and release_date.tzinfo:
         release_date = release_date.replace(tzinfo=None)
+    # `old` is the row as it was before this UPDATE, locked so the comparison cannot race another edit
     row = await db.fetchrow("""
-        UPDATE products SET name=$1, description=$2, price=$3, quantity=$4, image_urls=$5, is_active=$6, release_date=$7, brand_id=$8, category_id=$9, updated_at=NOW()
-        WHERE id = $10
-        RETURNING id
+        WITH old AS (SELECT name, description, is_active FROM products WHERE id = $10 FOR UPDATE)
+        UPDATE products p SET name=$1, description=$2, price=$3, quantity=$4, image_urls=$5, is_active=$6, release_date=$7, brand_id=$8, category_id=$9, updated_at=NOW()
+        FROM old
+        WHERE p.id = $10
+        RETURNING p.id, (p.name, p.description, p.is_active) IS DISTINCT FROM (old.name, old.description, old.is_active) AS text_changed
     """,
         product.name, product.description, product.price, product.quantity, image_urls_json, product.is_active, release_date, product.brand_id, product.category_id, product_id
     )
     if row:
+        # The price may have changed, so the effective price must be recomputed
+        await refresh_product_prices(db, [product_id])
+        # Similar products depend only on the name, description and status
+        if row["text_changed"]:
+            await mark_similar_dirty(db, [product_id])
+        await product_cache.invalidate_products([product_id])
         return await _get_full_product_details_by_id(db, product_id)
     return None
 
@@ -128,31 +380,64 @@ async def delete_product(db: asyncpg.Connection, product_id: int) -> Optional[sc
         return None
     # Then, deactivate it
     await db.execute("UPDATE products SET is_active=FALSE, updated_at=NOW() WHERE id = $1", product_id)
+    await mark_similar_dirty(db, [product_id])
+    await product_cache.invalidate_products([product_id])
     # Return the full details of the now-inactive product
     return await _get_full_product_details_by_id(db, product_id)
 
-async def get_deleted_products(db: asyncpg.Connection, skip: int = 0, limit: int = 100) -> List[schemas.Product]:
-    rows = await db.fetch("SELECT id FROM products WHERE is_active=FALSE ORDER BY id OFFSET $1 LIMIT $2", skip, limit)
-    products = []
-    for row in rows:
-        # CORRECTED: Use the internal helper that fetches regardless of status
-        product = await _get_full_product_details_by_id(db, row['id'])
-        if product:
-            products.append(product)
-    return products
+async def get_deleted_products(db: asyncpg.Connection, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[schemas.Product]:
+    query, params = paginate("SELECT id FROM products WHERE is_active=FALSE", [], "id", "id", "id", False, after=after, skip=skip, limit=limit)
+    rows = await db.fetch(query, *params)
+    # Use the internal helper that fetches regardless of status
+    return await _get_full_product_details_by_ids(db, [row['id'] for row in rows])
 
 async def restore_product(db: asyncpg.Connection, product_id: int) -> Optional[schemas.Product]:
     await db.execute("UPDATE products SET is_active=TRUE, updated_at=NOW() WHERE id = $1", product_id)
+    await mark_similar_dirty(db, [product_id])
+    await product_cache.invalidate_products([product_id])
     # CORRECTED: Use the internal helper to return the now-active product
     return await _get_full_product_details_by_id(db, product_id)
 
 # ... (rest of the comment functions remain the same)
 
-async def create_comment(db: asyncpg.Connection, comment: schemas.CommentCreate) -> schemas.Comment:
+# Page of top-level comments (and their replies down to a depth) per product, as response bytes.
+# Keys embed a per-product version that every comment write increments, so a write makes all
+# of the product's cached pages unreachable in O(1); they then age out via the TTL.
+comment_tree_cache = TieredCache("comment_tree", *response_codec(), ttl=CommentTreeConfig.CACHE_TTL.value, max_items=512)
+
+def _comment_tree_version_key(product_id: int) -> str:
+    # Outside the "comment_tree:" namespace, so clearing the cache never resets a version
+    return f"comment_tree_version:{product_id}"
+
+async def get_comment_tree_version(product_id: int) -> Optional[int]:
+    """Current cache version of a product's comment tree, or None when Redis is unavailable."""
+    try:
+        redis_client = await get_redis_client()
+        return int(await redis_client.get(_comment_tree_version_key(product_id)) or 0)
+    except Exception as e:
+        logger.warning(f"Reading the comment tree version of product {product_id} failed: {e}")
+        return None
+
+def comment_tree_cache_key(product_id: int, version: int, depth: int, limit: int, cursor: Optional[Tuple[datetime, int]]) -> str:
+    """Key of one cached page; `cursor` is the decoded `after` token, so the key stays bounded."""
+    after = f"{cursor[0].isoformat()}/{cursor[1]}" if cursor else ""
+    return f"{product_id}:v{version}:{depth}:{limit}:{after}"
+
+async def invalidate_comment_tree(product_id: Optional[int]):
+    if product_id is None:
+        return
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.incr(_comment_tree_version_key(product_id))
+    except Exception as e:
+        logger.error(f"Bumping the comment tree version of product {product_id} failed: {e}")
+
+async def create_comment(db: asyncpg.Connection, comment: schemas.CommentCreate, user_id: Optional[int] = None) -> schemas.Comment:
     row = await db.fetchrow("""
-        INSERT INTO comments (product_id, content, user_name, parent_comment_id, created_at)
-        VALUES ($1, $2, $3, $4, NOW()) RETURNING id, product_id, content, user_name, parent_comment_id, created_at
-    """, comment.product_id, comment.content, comment.user_name, comment.parent_comment_id)
+        INSERT INTO comments (product_id, content, user_name, parent_comment_id, user_id, created_at)
+        VALUES ($1, $2, $3, $4, $5, NOW()) RETURNING id, product_id, content, user_name, parent_comment_id, created_at
+    """, comment.product_id, comment.content, comment.user_name, comment.parent_comment_id, user_id)
+    await invalidate_comment_tree(row["product_id"])
     return schemas.Comment(
         id=row["id"], product_id=row["product_id"], content=row["content"], user_name=row["user_name"], parent_comment_id=row["parent_comment_id"], created_at=row["created_at"]
     )
@@ -161,13 +446,56 @@ async def get_comments(db: asyncpg.Connection, product_id: int) -> list[schemas.
     rows = await db.fetch("""
         SELECT c.id, c.product_id, c.content, c.user_name, c.parent_comment_id, c.created_at, u.avatar_url as user_avatar_url
         FROM comments c
-        LEFT JOIN users u ON c.user_name = u.username
+        LEFT JOIN users u ON u.id = c.user_id
         WHERE c.product_id=$1 ORDER BY c.created_at DESC
     """, product_id)
     return [schemas.Comment(id=row["id"], product_id=row["product_id"], content=row["content"], user_name=row["user_name"], parent_comment_id=row["parent_comment_id"], created_at=row["created_at"], user_avatar_url=row["user_avatar_url"]) for row in rows]
 
+async def get_comment_tree(db: asyncpg.Connection, product_id: int, limit: int = 20, depth: int = CommentTreeConfig.DEFAULT_DEPTH.value, after: Optional[str] = None) -> List[schemas.CommentThread]:
+    """
+    Returns one page of a product's top-level comments, newest first, each with its replies
+    (oldest first) down to `depth` levels, using a single recursive query.
+    Top-level comments are paged with a (created_at, id) keyset, so every page costs the same.
+    """
+    top_query, params = paginate(
+        "SELECT c.id FROM comments c WHERE c.product_id = $1 AND c.parent_comment_id IS NULL AND c.is_active = TRUE",
+        [product_id], "c.created_at", "c.id", "created_at", True, after=after, limit=limit,
+    )
+    depth_idx = len(params) + 1
+    rows = await db.fetch(f"""
+        WITH RECURSIVE top_level AS ({top_query}),
+        tree AS (
+            SELECT c.id, 0 AS depth
+            FROM comments c JOIN top_level t ON t.id = c.id
+            UNION ALL
+            SELECT c.id, tree.depth + 1
+            FROM comments c JOIN tree ON c.parent_comment_id = tree.id
+            WHERE tree.depth < ${depth_idx} AND c.is_active = TRUE
+        )
+        SELECT c.id, c.product_id, c.content, c.user_name, c.parent_comment_id, c.created_at, tree.depth, u.avatar_url AS user_avatar_url
+        FROM tree
+        JOIN comments c ON c.id = tree.id
+        LEFT JOIN users u ON u.id = c.user_id
+        ORDER BY tree.depth, c.created_at, c.id
+    """, *params, depth)
+
+    nodes = {}
+    top_level = []
+    for row in rows:
+        node = schemas.CommentThread(**dict(row))
+        nodes[node.id] = node
+        if node.depth == 0:
+            top_level.append(node)
+        else:
+            # Rows are ordered by depth, so the parent has already been seen
+            nodes[node.parent_comment_id].replies.append(node)
+    top_level.sort(key=lambda node: (node.created_at, node.id), reverse=True)
+    return top_level
+
 async def delete_comment(db: asyncpg.Connection, comment_id: int) -> bool:
-    row = await db.fetchrow("DELETE FROM comments WHERE id=$1 RETURNING id", comment_id)
+    row = await db.fetchrow("DELETE FROM comments WHERE id=$1 RETURNING id, product_id", comment_id)
+    if row:
+        await invalidate_comment_tree(row["product_id"])
     return bool(row)
 
 async def get_comment_by_id(db: asyncpg.Connection, comment_id: int) -> schemas.Comment | None:
@@ -179,6 +507,7 @@ async def get_comment_by_id(db: asyncpg.Connection, comment_id: int) -> schemas.
 async def update_comment(db: asyncpg.Connection, comment_id: int, new_content: str) -> Optional[schemas.Comment]:
     row = await db.fetchrow("UPDATE comments SET content=$1, created_at=NOW() WHERE id=$2 RETURNING id, product_id, content, user_name, created_at", new_content, comment_id)
     if row:
+        await invalidate_comment_tree(row["product_id"])
         return schemas.Comment(id=row["id"], product_id=row["product_id"], content=row["content"], user_name=row["user_name"], created_at=row["created_at"])
     return None
 
@@ -188,6 +517,7 @@ async def restore_comment(db: asyncpg.Connection, comment_id: int) -> Optional[s
         WHERE id=$1 RETURNING id, product_id, content, user_name, created_at
     """, comment_id)
     if row:
+        await invalidate_comment_tree(row["product_id"])
         return schemas.Comment(
             id=row["id"], product_id=row["product_id"], content=row["content"], user_name=row["user_name"], created_at=row["created_at"]
         )
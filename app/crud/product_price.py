@@ -0,0 +1,69 @@
+import asyncio
+import asyncpg
+from typing import List, Optional, Tuple
+
+# Set whenever a discount schedule changes so the boundary scheduler re-computes its next wake-up
+price_schedule_changed = asyncio.Event()
+
+_ACTIVE_DISCOUNT_JOIN = """
+    LEFT JOIN LATERAL (
+        SELECT id, percent, start_date, end_date
+        FROM discounts
+        WHERE product_id = p.id AND is_active = TRUE AND start_date <= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp AND end_date >= (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp
+        ORDER BY id
+        LIMIT 1
+    ) d ON TRUE
+"""
+
+async def refresh_product_prices(db: asyncpg.Connection, product_ids: Optional[List[int]] = None) -> List[int]:
+    """
+    Recomputes the product_prices read model (active discount and final price) for the given
+    products, or for the whole catalog when `product_ids` is None.
+    Only rows whose values actually changed are written; returns their product ids.
+    """
+    rows = await db.fetch(f"""
+        INSERT INTO product_prices (product_id, discount_id, discount_percent, final_price, start_date, end_date, refreshed_at)
+        SELECT p.id, d.id, d.percent, p.price * (1 - COALESCE(d.percent, 0) / 100), d.start_date, d.end_date, NOW()
+        FROM products p
+        {_ACTIVE_DISCOUNT_JOIN}
+        WHERE $1::int[] IS NULL OR p.id = ANY($1::int[])
+        ON CONFLICT (product_id) DO UPDATE SET
+            discount_id = EXCLUDED.discount_id,
+            discount_percent = EXCLUDED.discount_percent,
+            final_price = EXCLUDED.final_price,
+            start_date = EXCLUDED.start_date,
+            end_date = EXCLUDED.end_date,
+            refreshed_at = EXCLUDED.refreshed_at
+        WHERE (product_prices.discount_id, product_prices.discount_percent, product_prices.final_price, product_prices.start_date, product_prices.end_date)
+              IS DISTINCT FROM (EXCLUDED.discount_id, EXCLUDED.discount_percent, EXCLUDED.final_price, EXCLUDED.start_date, EXCLUDED.end_date)
+        RETURNING product_id
+    """, product_ids)
+    return [row["product_id"] for row in rows]
+
+async def get_seconds_until_next_price_boundary(db: asyncpg.Connection) -> Optional[float]:
+    """
+    Seconds until the next discount window opens (start_date) or closes (just after end_date,
+    which is inclusive). Returns None when no boundary is scheduled.
+    """
+    return await db.fetchval("""
+        WITH now_vn AS (SELECT (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp AS ts)
+        SELECT EXTRACT(EPOCH FROM (MIN(boundary) - (SELECT ts FROM now_vn)))::float8
+        FROM (
+            SELECT MIN(start_date) AS boundary FROM discounts WHERE is_active = TRUE AND start_date > (SELECT ts FROM now_vn)
+            UNION ALL
+            SELECT MIN(end_date) + INTERVAL '1 second' FROM discounts WHERE is_active = TRUE AND end_date + INTERVAL '1 second' > (SELECT ts FROM now_vn)
+        ) boundaries
+    """)
+
+async def get_discount_boundaries_since(db: asyncpg.Connection, seconds: float) -> Tuple[bool, List[int]]:
+    """
+    Discount windows that opened or closed within the last `seconds` seconds. Returns whether
+    any did (including discounts not tied to a product) and the products they apply to.
+    """
+    rows = await db.fetch("""
+        WITH now_vn AS (SELECT (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh')::timestamp AS ts)
+        SELECT DISTINCT product_id FROM discounts
+        WHERE start_date BETWEEN (SELECT ts FROM now_vn) - make_interval(secs => $1) AND (SELECT ts FROM now_vn)
+           OR end_date + INTERVAL '1 second' BETWEEN (SELECT ts FROM now_vn) - make_interval(secs => $1) AND (SELECT ts FROM now_vn)
+    """, seconds)
+    return bool(rows), [row["product_id"] for row in rows if row["product_id"] is not None]
@@ -0,0 +1,50 @@
+import asyncpg
+from typing import Dict, List, Optional, Tuple
+
+async def mark_similar_dirty(db: asyncpg.Connection, product_ids: List[int]):
+    """Queues products whose name, description or status changed for the next similar-products refresh."""
+    if not product_ids:
+        return
+    await db.execute("""
+        INSERT INTO product_similar_dirty (product_id)
+        SELECT unnest($1::int[])
+        ON CONFLICT (product_id) DO NOTHING
+    """, product_ids)
+
+async def claim_dirty_products(db: asyncpg.Connection) -> List[int]:
+    """Atomically takes the queued product ids; changes made while a build runs are queued again."""
+    rows = await db.fetch("DELETE FROM product_similar_dirty RETURNING product_id")
+    return [row["product_id"] for row in rows]
+
+async def get_catalog_texts(db: asyncpg.Connection, product_ids: Optional[List[int]] = None) -> List[asyncpg.Record]:
+    """Name and description of active products in id order; of the whole catalog when `product_ids` is None."""
+    return await db.fetch("""
+        SELECT id, name, description FROM products
+        WHERE is_active = TRUE AND ($1::int[] IS NULL OR id = ANY($1::int[]))
+        ORDER BY id
+    """, product_ids)
+
+async def get_products_listing_any(db: asyncpg.Connection, product_ids: List[int]) -> List[int]:
+    """Products whose stored neighbour list contains any of `product_ids`."""
+    rows = await db.fetch("SELECT product_id FROM product_similar WHERE similar_ids && $1::int[]", product_ids)
+    return [row["product_id"] for row in rows]
+
+async def save_similar_products(db: asyncpg.Connection, neighbours: Dict[int, Tuple[List[int], List[float]]], removed_ids: List[int], keep_only: Optional[List[int]] = None):
+    """
+    Upserts neighbour lists and deletes the lists of `removed_ids` in one transaction.
+    With `keep_only`, every list whose product is not in it is deleted as well (full rebuilds).
+    """
+    async with db.transaction():
+        if removed_ids:
+            await db.execute("DELETE FROM product_similar WHERE product_id = ANY($1::int[])", removed_ids)
+        if keep_only is not None:
+            await db.execute("DELETE FROM product_similar WHERE NOT (product_id = ANY($1::int[]))", keep_only)
+        await db.executemany("""
+            INSERT INTO product_similar (product_id, similar_ids, scores, built_at)
+            VALUES ($1, $2, $3, NOW())
+            ON CONFLICT (product_id) DO UPDATE SET similar_ids = EXCLUDED.similar_ids, scores = EXCLUDED.scores, built_at = NOW()
+        """, [(product_id, ids, scores) for product_id, (ids, scores) in neighbours.items()])
+
+async def get_similar_product_ids(db: asyncpg.Connection, product_id: int) -> Optional[List[int]]:
+    """The precomputed neighbours of a product, best first; None if no list has been built for it."""
+    return await db.fetchval("SELECT similar_ids FROM product_similar WHERE product_id = $1", product_id)
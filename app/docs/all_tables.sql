@@ -1,3 +1,6 @@
+-- Reference schema. Changes are applied with versioned migrations in app/migrations
+-- (python scripts/migrate.py up); keep this file in sync when adding one.
+
 -- Cart table
 CREATE TABLE IF NOT EXISTS cart (
     id SERIAL PRIMARY KEY,
@@ -92,5 +95,67 @@ CREATE TABLE IF NOT EXISTS comments (
     user_name VARCHAR(255),
     parent_comment_id INTEGER REFERENCES comments(id),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    is_active BOOLEAN DEFAULT TRUE
-);
\ No newline at end of file
+    is_active BOOLEAN DEFAULT TRUE,
+    user_id INTEGER REFERENCES users(id) -- migrations/0005_comments_user_id
+);
+
+-- Product search: accent-folded full-text and trigram indexes
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE; pinning the dictionary makes it usable in indexes and generated columns.
+-- The default rules fold Vietnamese diacritics, including đ -> d.
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', f_unaccent(lower(coalesce(name, '')))), 'A') ||
+    setweight(to_tsvector('simple', f_unaccent(lower(coalesce(description, '')))), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (f_unaccent(lower(name)) gin_trgm_ops);
+
+-- Effective price read model, maintained by crud.product_price.refresh_product_prices
+-- (on product/discount writes and at every discount start_date/end_date boundary)
+CREATE TABLE IF NOT EXISTS product_prices (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id),
+    discount_id INTEGER REFERENCES discounts(id),
+    discount_percent FLOAT,
+    final_price FLOAT NOT NULL,
+    start_date TIMESTAMP,
+    end_date TIMESTAMP,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_prices_final_price ON product_prices (final_price, product_id);
+
+-- Secondary indexes for hot predicates (migrations/0004_secondary_indexes, built CONCURRENTLY)
+-- Catalog listing filters, paged by id (migrations/0008_products_listing_index replaced the former ..._price index)
+CREATE INDEX IF NOT EXISTS idx_products_active_category_brand_id ON products (is_active, category_id, brand_id, id);
+CREATE INDEX IF NOT EXISTS idx_discounts_product_active_window ON discounts (product_id, is_active, start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_cart_user_product ON cart (user_id, product_id);
+CREATE INDEX IF NOT EXISTS idx_comments_product_created ON comments (product_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_comments_product_top_level ON comments (product_id, created_at DESC, id DESC) WHERE parent_comment_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments (parent_comment_id, created_at);
+
+-- Precomputed similar products (migrations/0006_product_similar, maintained by services.RecommendationService)
+CREATE TABLE IF NOT EXISTS product_similar (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id),
+    similar_ids INTEGER[] NOT NULL,
+    scores REAL[] NOT NULL,
+    built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_similar_similar_ids ON product_similar USING GIN (similar_ids);
+
+CREATE TABLE IF NOT EXISTS product_similar_dirty (
+    product_id INTEGER PRIMARY KEY,
+    marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Buyers of a product, for incremental recommendation model updates (migrations/0007_order_items_product)
+CREATE INDEX IF NOT EXISTS idx_order_items_product_order ON order_items (product_id, order_id);
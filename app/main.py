@@ -1,15 +1,25 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
+import asyncio
 from contextlib import asynccontextmanager
 from core.app_config import settings, logger, get_printable_settings
 from core.middleware import setup_middleware
 from router import product, news, discount, tryon, auth, cart, order, payment, chatbot, admin, upload, recommendation, user, brand, category
 from core.limiter import limiter
 from core.aws.setup import setup_aws_resources
+from core.pkgs.database import connection_pool
+from core.pkgs.migrations import check_migrations_on_startup
+from core.redis.tiered_cache import run_invalidation_listener
+from core.utils.responses import NEXT_CURSOR_HEADER
+from services.PriceScheduleService import run_price_boundary_scheduler
+from services.CsvImportJobService import cancel_import_jobs
+from services.RecommendationService import run_similar_products_refresher
+from services.PersonalizedRecService import model_registry, run_rec_model_updater
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,11 +29,24 @@ async def lifespan(app: FastAPI):
     logger.info(f"\n{get_printable_settings(settings)}")
     logger.info("---------------------------------")
     await setup_aws_resources()
+    await check_migrations_on_startup(await connection_pool.get_pool(), settings.DB.AUTO_MIGRATE)
+    # Load the recommendation model before serving so the first request does not pay for it
+    await model_registry.refresh()
+    background_tasks = [
+        asyncio.create_task(run_invalidation_listener()),
+        asyncio.create_task(run_price_boundary_scheduler()),
+        asyncio.create_task(run_similar_products_refresher()),
+        asyncio.create_task(run_rec_model_updater()),
+    ]
     yield
     # On shutdown
     logger.info("--- Application Shutting Down ---")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await cancel_import_jobs()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Add state and exception handler for slowapi
 app.state.limiter = limiter
@@ -42,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 @app.get("/")
@@ -0,0 +1,4 @@
+DROP INDEX IF EXISTS idx_products_name_trgm;
+DROP INDEX IF EXISTS idx_products_search_vector;
+ALTER TABLE products DROP COLUMN IF EXISTS search_vector;
+DROP FUNCTION IF EXISTS f_unaccent(text);
@@ -0,0 +1,17 @@
+-- Product search: accent-folded full-text and trigram indexes
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE; pinning the dictionary makes it usable in indexes and generated columns.
+-- The default rules fold Vietnamese diacritics, including đ -> d.
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', f_unaccent(lower(coalesce(name, '')))), 'A') ||
+    setweight(to_tsvector('simple', f_unaccent(lower(coalesce(description, '')))), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (f_unaccent(lower(name)) gin_trgm_ops);
@@ -0,0 +1,13 @@
+-- Effective price read model, maintained by crud.product_price.refresh_product_prices
+-- (on product/discount writes and at every discount start_date/end_date boundary)
+CREATE TABLE IF NOT EXISTS product_prices (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id),
+    discount_id INTEGER REFERENCES discounts(id),
+    discount_percent FLOAT,
+    final_price FLOAT NOT NULL,
+    start_date TIMESTAMP,
+    end_date TIMESTAMP,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_prices_final_price ON product_prices (final_price, product_id);
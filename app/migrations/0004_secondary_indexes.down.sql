@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+DROP INDEX CONCURRENTLY IF EXISTS idx_comments_product_created;
+DROP INDEX CONCURRENTLY IF EXISTS idx_cart_user_product;
+DROP INDEX CONCURRENTLY IF EXISTS idx_orders_user_created;
+DROP INDEX CONCURRENTLY IF EXISTS idx_order_items_order_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_discounts_product_active_window;
+DROP INDEX CONCURRENTLY IF EXISTS idx_products_active_category_brand_price;
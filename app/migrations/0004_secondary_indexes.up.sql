@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- Secondary indexes for hot predicates, built without blocking writes.
+-- If a build is interrupted, Postgres leaves an INVALID index that IF NOT EXISTS would skip:
+-- roll this migration back (scripts/migrate.py down) and apply it again.
+
+-- Catalog listing filters (crud.product.get_products)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_active_category_brand_price ON products (is_active, category_id, brand_id, price);
+
+-- Active discount lookup per product (crud.product_price, crud.discount)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_discounts_product_active_window ON discounts (product_id, is_active, start_date, end_date);
+
+-- Order detail and purchase history joins
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+
+-- A user's orders, newest first (crud.order.get_orders_by_user)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at DESC);
+
+-- Cart reads and upserts by user and product (crud.cart)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_cart_user_product ON cart (user_id, product_id);
+
+-- Product comments in posting order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_product_created ON comments (product_id, created_at);
@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+DROP INDEX CONCURRENTLY IF EXISTS idx_comments_parent;
+DROP INDEX CONCURRENTLY IF EXISTS idx_comments_product_top_level;
+ALTER TABLE comments DROP COLUMN IF EXISTS user_id;
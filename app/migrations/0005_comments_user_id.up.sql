@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- Comments reference their author by id; user_name is kept as the display name.
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id);
+
+UPDATE comments c SET user_id = u.id FROM users u WHERE c.user_id IS NULL AND u.username = c.user_name;
+
+-- Top-level comments of a product, newest first (keyset pagination of the comment tree)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_product_top_level ON comments (product_id, created_at DESC, id DESC) WHERE parent_comment_id IS NULL;
+
+-- Replies of a comment (recursive step of the comment tree)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_parent ON comments (parent_comment_id, created_at);
@@ -0,0 +1,2 @@
+DROP TABLE IF EXISTS product_similar_dirty;
+DROP TABLE IF EXISTS product_similar;
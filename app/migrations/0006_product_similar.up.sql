@@ -0,0 +1,17 @@
+-- Precomputed content-based neighbours (TF-IDF cosine) per active product,
+-- maintained by services.RecommendationService; read by /products/{id}/recommendations.
+CREATE TABLE IF NOT EXISTS product_similar (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id),
+    similar_ids INTEGER[] NOT NULL,
+    scores REAL[] NOT NULL,
+    built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Finds lists that mention a changed product during incremental rebuilds
+CREATE INDEX IF NOT EXISTS idx_product_similar_similar_ids ON product_similar USING GIN (similar_ids);
+
+-- Products whose text or status changed since the last build
+CREATE TABLE IF NOT EXISTS product_similar_dirty (
+    product_id INTEGER PRIMARY KEY,
+    marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Buyers of a product (crud.order.get_co_purchases / get_purchase_norms, used by the
+-- incremental recommendation model updater). Built without blocking writes.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_product_order ON order_items (product_id, order_id);
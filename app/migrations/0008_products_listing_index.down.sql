@@ -0,0 +1,3 @@
+-- migrate: no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_active_category_brand_price ON products (is_active, category_id, brand_id, price);
+DROP INDEX CONCURRENTLY IF EXISTS idx_products_active_category_brand_id;
@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Catalog listings filter on is_active/category_id/brand_id and page by p.id (or by the effective
+-- price from product_prices, see crud.product.EFFECTIVE_PRICE_SQL); products.price was never read
+-- from idx_products_active_category_brand_price. Replace it with an index whose trailing column
+-- serves the default id order, so a filtered listing is an ordered index scan.
+-- If a build is interrupted, roll this migration back (scripts/migrate.py down) and apply it again.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_active_category_brand_id ON products (is_active, category_id, brand_id, id);
+DROP INDEX CONCURRENTLY IF EXISTS idx_products_active_category_brand_price;
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from core.redis.redis_client import clear_redis_cache_data
+from core.redis.tiered_cache import TieredCache, WORKER_ID
 from crud import user as crud_user
 from crud import order as crud_order
 from crud import news as crud_news
@@ -10,8 +11,14 @@ from crud.user import require_admin
 from schemas.schemas import UserUpdate, NewsCreate, NewsUpdate, ProductCreate, ProductUpdate, AINewsGenerateRequest, DiscountCreate, DiscountUpdate
 from services import NewsAIService
 from typing import Optional
+from core.utils.pagination import next_cursor
+from core.utils.responses import NEXT_CURSOR_HEADER
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+def _set_next_cursor(response: Response, cursor: Optional[str]):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
 @router.post("/clear-redis-cache", summary="Clear Redis Cache (Admin Only)")
 async def clear_redis_cache(
     current_user: dict = Depends(require_admin)
@@ -22,6 +29,8 @@ async def clear_redis_cache(
     """
     try:
         await clear_redis_cache_data()
+        # Drop the in-process copies on every worker as well
+        await TieredCache.invalidate_all()
         return {"message": "Redis cache cleared successfully.", "admin": current_user["username"]}
     except Exception as e:
         raise HTTPException(
@@ -29,6 +38,14 @@ async def clear_redis_cache(
             detail=f"Failed to clear Redis cache: {e}"
         )
 
+@router.get("/cache-stats", summary="Get in-process cache statistics (Admin Only)")
+async def get_cache_stats(current_user: dict = Depends(require_admin)):
+    """
+    Returns hit/miss counters of the two-tier caches for the worker that serves this request.
+    Counters are per worker process and reset on restart.
+    """
+    return {"worker_id": WORKER_ID, "caches": TieredCache.all_stats()}
+
 @router.get("/users", summary="Get all users (Admin Only)")
 async def get_all_users_endpoint(db=Depends(database.get_db), admin: dict = Depends(require_admin)):
     users = await crud_user.get_all_users(db)
@@ -49,9 +66,9 @@ async def delete_user_endpoint(user_id: int, db=Depends(database.get_db), admin:
     return {"message": "User deleted successfully"}
 
 @router.get("/all_orders", summary="Get all orders (Admin Only)")
-async def get_all_orders_endpoint(search: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    orders = await crud_order.get_all_orders(db, search_query=search)
-    return {"orders": orders}
+async def get_all_orders_endpoint(search: Optional[str] = None, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    orders = await crud_order.get_all_orders(db, search_query=search, skip=skip, limit=limit, after=after)
+    return {"orders": orders, "next_cursor": next_cursor(orders, limit, "created_at", True)}
 
 @router.post("/news", summary="Create news (Admin Only)")
 async def create_news_endpoint(news: NewsCreate, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
@@ -59,13 +76,15 @@ async def create_news_endpoint(news: NewsCreate, db=Depends(database.get_db), ad
     return created_news
 
 @router.get("/news", summary="Get all news (Admin Only)")
-async def get_all_news_endpoint(search: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    all_news = await crud_news.get_news(db, skip=0, limit=100, search_query=search) # Assuming get_news fetches all news for admin
+async def get_all_news_endpoint(response: Response, search: Optional[str] = None, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    all_news = await crud_news.get_news(db, skip=skip, limit=limit, search_query=search, after=after)
+    _set_next_cursor(response, next_cursor(all_news, limit, "id", False))
     return all_news
 
 @router.get("/news/deleted", summary="Get all deleted news (Admin Only)")
-async def get_deleted_news_endpoint(db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    deleted_news = await crud_news.get_deleted_news(db)
+async def get_deleted_news_endpoint(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    deleted_news = await crud_news.get_deleted_news(db, skip=skip, limit=limit, after=after)
+    _set_next_cursor(response, next_cursor(deleted_news, limit, "id", False))
     return deleted_news
 
 @router.put("/news/{news_id}/restore", summary="Restore a news item (Admin Only)")
@@ -102,13 +121,16 @@ async def create_product_endpoint(product: ProductCreate, db=Depends(database.ge
     return created_product
 
 @router.get("/products", summary="Get all products (Admin Only)")
-async def get_all_products_endpoint(search: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    all_products = await crud_product.get_products(db, search_query=search)
+async def get_all_products_endpoint(response: Response, search: Optional[str] = None, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    # Id order even when searching (the public listing ranks searches by relevance), so the cursor matches the query
+    all_products = await crud_product.get_products(db, skip=skip, limit=limit, search_query=search, sort="id", after=after)
+    _set_next_cursor(response, next_cursor(all_products, limit, "id", False))
     return all_products
 
 @router.get("/products/deleted", summary="Get all deleted products (Admin Only)")
-async def get_deleted_products_endpoint(db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    deleted_products = await crud_product.get_deleted_products(db)
+async def get_deleted_products_endpoint(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    deleted_products = await crud_product.get_deleted_products(db, skip=skip, limit=limit, after=after)
+    _set_next_cursor(response, next_cursor(deleted_products, limit, "id", False))
     return deleted_products
 
 @router.put("/products/{product_id}/restore", summary="Restore a product (Admin Only)")
@@ -157,13 +179,15 @@ async def create_discount_endpoint(discount: DiscountCreate, db=Depends(database
     return created_discount
 
 @router.get("/discounts", summary="Get all discounts (Admin Only)")
-async def get_all_discounts_endpoint(db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    all_discounts = await crud_discount.get_discounts(db, skip=0, limit=100) # Assuming get_discounts fetches all discounts for admin
+async def get_all_discounts_endpoint(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    all_discounts = await crud_discount.get_discounts(db, skip=skip, limit=limit, after=after)
+    _set_next_cursor(response, next_cursor(all_discounts, limit, "id", False))
     return all_discounts
 
 @router.get("/discounts/deleted", summary="Get all deleted discounts (Admin Only)")
-async def get_deleted_discounts_endpoint(db=Depends(database.get_db), admin: dict = Depends(require_admin)):
-    deleted_discounts = await crud_discount.get_deleted_discounts(db)
+async def get_deleted_discounts_endpoint(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db=Depends(database.get_db), admin: dict = Depends(require_admin)):
+    deleted_discounts = await crud_discount.get_deleted_discounts(db, skip=skip, limit=limit, after=after)
+    _set_next_cursor(response, next_cursor(deleted_discounts, limit, "id", False))
     return deleted_discounts
 
 @router.put("/discounts/{discount_id}/restore", summary="Restore a discount (Admin Only)")
@@ -4,6 +4,7 @@ from crud import brand as brand_crud
 from core.pkgs.database import get_db
 import asyncpg
 from typing import List
+from core.dependencies import etag_for
 
 router = APIRouter(prefix="/brands", tags=["Brands"])
 
@@ -11,11 +12,11 @@ router = APIRouter(prefix="/brands", tags=["Brands"])
 async def create_brand(brand: schemas.BrandCreate, db: asyncpg.Connection = Depends(get_db)):
     return await brand_crud.create_brand(db, brand)
 
-@router.get("/", response_model=List[schemas.Brand])
+@router.get("/", response_model=List[schemas.Brand], dependencies=[Depends(etag_for("brands"))])
 async def read_brands(db: asyncpg.Connection = Depends(get_db)):
     return await brand_crud.get_brands(db)
 
-@router.get("/{brand_id}", response_model=schemas.Brand)
+@router.get("/{brand_id}", response_model=schemas.Brand, dependencies=[Depends(etag_for("brands"))])
 async def read_brand(brand_id: int, db: asyncpg.Connection = Depends(get_db)):
     db_brand = await brand_crud.get_brand_by_id(db, brand_id=brand_id)
     if db_brand is None:
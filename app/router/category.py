@@ -4,6 +4,7 @@ from crud import category as category_crud
 from core.pkgs.database import get_db
 import asyncpg
 from typing import List
+from core.dependencies import etag_for
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
@@ -11,11 +12,11 @@ router = APIRouter(prefix="/categories", tags=["Categories"])
 async def create_category(category: schemas.CategoryCreate, db: asyncpg.Connection = Depends(get_db)):
     return await category_crud.create_category(db, category)
 
-@router.get("/", response_model=List[schemas.Category])
+@router.get("/", response_model=List[schemas.Category], dependencies=[Depends(etag_for("categories"))])
 async def read_categories(db: asyncpg.Connection = Depends(get_db)):
     return await category_crud.get_categories(db)
 
-@router.get("/{category_id}", response_model=schemas.Category)
+@router.get("/{category_id}", response_model=schemas.Category, dependencies=[Depends(etag_for("categories"))])
 async def read_category(category_id: int, db: asyncpg.Connection = Depends(get_db)):
     db_category = await category_crud.get_category_by_id(db, category_id=category_id)
     if db_category is None:
@@ -1,40 +1,45 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 from schemas import schemas
 from crud import discount
 from core.pkgs import database
 from crud.user import require_admin
-from core.redis.redis_client import get_redis_client
 from core.aws.sns_client import sns_client
 from core.settings import settings
 import json
+from core.utils.pagination import next_cursor
+from core.dependencies import etag_for
+from core.utils.responses import json_list_response, cached_json_response
+from pydantic import TypeAdapter
+from typing import List
 
 router = APIRouter(prefix="/discounts", tags=["discounts"])
 
+_DISCOUNT_LIST = TypeAdapter(List[schemas.Discount])
+
 @router.get("/", response_model=list[schemas.Discount])
-async def read_discounts(skip: int = 0, limit: int = 100, is_active: Optional[bool] = None, db: Session = Depends(database.get_db), redis_client: Redis = Depends(get_redis_client), user=Depends(require_admin)):
-    cache_key = f"discounts:{skip}:{limit}:{is_active}"
-    cached = await redis_client.get(cache_key)
-    if cached:
-        return [schemas.Discount(**p) for p in json.loads(cached)]
-    result = await discount.get_discounts(db, skip=skip, limit=limit, is_active=is_active, include_expired=True) # Admin can see all, including expired
-    await redis_client.setex(cache_key, 60, json.dumps([r.model_dump(mode='json') for r in result]))
-    return result
+async def read_discounts(skip: int = 0, limit: int = 100, is_active: Optional[bool] = None, after: Optional[str] = None, db: Session = Depends(database.get_db), user=Depends(require_admin)):
+    cache_key = f"all:{skip}:{limit}:{is_active}:{after}"
 
-@router.get("/active", response_model=list[schemas.Discount])
-async def read_active_discounts(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), redis_client: Redis = Depends(get_redis_client)):
-    cache_key = f"active_discounts:{skip}:{limit}"
-    cached = await redis_client.get(cache_key)
-    if cached:
-        return [schemas.Discount(**p) for p in json.loads(cached)]
-    result = await discount.get_discounts(db, skip=skip, limit=limit, is_active=True, include_expired=False)
-    await redis_client.setex(cache_key, 60, json.dumps([r.model_dump(mode='json') for r in result]))
-    return result
+    async def load():
+        items = await discount.get_discounts(db, skip=skip, limit=limit, is_active=is_active, include_expired=True, after=after) # Admin can see all, including expired
+        return json_list_response(_DISCOUNT_LIST, items, next_cursor(items, limit, "id", False))
+
+    return cached_json_response(await discount.discount_list_cache.get_or_load(cache_key, load))
+
+@router.get("/active", response_model=list[schemas.Discount], dependencies=[Depends(etag_for("discounts"))])
+async def read_active_discounts(skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(database.get_db)):
+    cache_key = f"active:{skip}:{limit}:{after}"
+
+    async def load():
+        items = await discount.get_discounts(db, skip=skip, limit=limit, is_active=True, include_expired=False, after=after)
+        return json_list_response(_DISCOUNT_LIST, items, next_cursor(items, limit, "id", False))
+
+    return cached_json_response(await discount.discount_list_cache.get_or_load(cache_key, load))
 
 
-@router.get("/{discount_id}", response_model=schemas.Discount)
+@router.get("/{discount_id}", response_model=schemas.Discount, dependencies=[Depends(etag_for("discounts"))])
 async def read_discount(discount_id: int, db: Session = Depends(database.get_db)):
     db_discount = await discount.get_discount(db, discount_id)
     if not db_discount:
@@ -1,33 +1,38 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 from schemas import schemas
 from crud import news
 from core.pkgs import database
 from crud.user import require_admin
-from core.redis.redis_client import get_redis_client
 from core.aws.sns_client import sns_client
 from core.settings import settings
 import json
 from services.NewsAIService import generate_news_content
 from schemas.schemas import AINewsGenerateRequest
+from core.utils.pagination import next_cursor, parse_sort
+from core.dependencies import etag_for
+from core.utils.responses import json_list_response, cached_json_response
+from pydantic import TypeAdapter
 
 router = APIRouter(prefix="/news", tags=["news"])
 
-@router.get("/", response_model=list[schemas.News])
-async def read_news(skip: int = 0, limit: int = 100, search: Optional[str] = None, db: Session = Depends(database.get_db), redis_client: Redis = Depends(get_redis_client)):
-    cache_key = f"news:{skip}:{limit}:{search}"
-    cached = await redis_client.get(cache_key)
-    if cached:
-        return [schemas.News(**p) for p in json.loads(cached)]
-    result = await news.get_news(db, skip=skip, limit=limit, search_query=search)
-    await redis_client.setex(cache_key, 60, json.dumps([r.model_dump(mode='json') for r in result]))
-    return result
+_NEWS_LIST = TypeAdapter(List[schemas.News])
+
+@router.get("/", response_model=list[schemas.News], dependencies=[Depends(etag_for("news"))])
+async def read_news(skip: int = 0, limit: int = 100, search: Optional[str] = None, sort: str = "id", after: Optional[str] = None, db: Session = Depends(database.get_db)):
+    sort_key, _, descending = parse_sort(sort, news.NEWS_SORT_COLUMNS)
+    cache_key = f"{skip}:{limit}:{search}:{sort}:{after}"
+
+    async def load():
+        items = await news.get_news(db, skip=skip, limit=limit, search_query=search, sort=sort, after=after)
+        return json_list_response(_NEWS_LIST, items, next_cursor(items, limit, sort_key, descending))
+
+    return cached_json_response(await news.news_list_cache.get_or_load(cache_key, load))
 
 
-@router.get("/{news_id}", response_model=schemas.News)
+@router.get("/{news_id}", response_model=schemas.News, dependencies=[Depends(etag_for("news"))])
 async def read_news_item(news_id: int, db: Session = Depends(database.get_db)):
     db_news = await news.get_news_item(db, news_id)
     if not db_news:
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response, Query
 from schemas import schemas
 from crud import product as product_crud
 from core.pkgs.database import get_db
 import asyncpg
 from typing import List
-from services.CsvProcessingService import process_csv_and_save
-from services.RecommendationService import get_recommendations
+from services.CsvImportJobService import start_import_job, get_import_job
 from core.app_config import logger
 from core.redis.redis_client import get_redis_client
 import json
 from core.aws.sns_client import sns_client
 from core.settings import settings
 from datetime import datetime
-from typing import Optional
-from core.dependencies import log_activity
+from typing import Optional, Union
+from core.dependencies import log_activity, etag_for
+from core.utils.pagination import decode_cursor, next_cursor, parse_sort
+from core.utils.enums import ProductFacetsConfig, ProductCacheConfig, CommentTreeConfig, DEFAULT_PRICE_BUCKETS
+from core.utils.responses import NEXT_CURSOR_HEADER, json_list_response, cached_json_response, raw_json_response
+from pydantic import TypeAdapter
+import hashlib
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+_PRODUCT_LIST = TypeAdapter(List[schemas.Product])
+_COMMENT_TREE = TypeAdapter(List[schemas.CommentThread])
+
 
 # Add POST /products/ endpoint for creating a product
 @router.post("/", response_model=schemas.Product)
@@ -41,14 +48,72 @@ async def create_product(product: schemas.ProductCreate, db: asyncpg.Connection
 
     return new_product
 
-@router.get("/", response_model=List[schemas.Product])
-async def read_products(skip: int = 0, limit: int = 100, search: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, db: asyncpg.Connection = Depends(get_db)):
-    products = await product_crud.get_products(db, skip=skip, limit=limit, search_query=search, category_id=category_id, brand_id=brand_id, min_price=min_price, max_price=max_price)
-    return products
+def _parse_price_buckets(price_buckets: Optional[str]) -> List[float]:
+    if not price_buckets:
+        return list(DEFAULT_PRICE_BUCKETS)
+    try:
+        bounds = sorted({float(value) for value in price_buckets.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="price_buckets must be a comma-separated list of numbers")
+    if not bounds or len(bounds) > ProductFacetsConfig.MAX_PRICE_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"price_buckets must contain between 1 and {ProductFacetsConfig.MAX_PRICE_BUCKETS.value} boundaries")
+    return bounds
+
+async def _get_cached_facets(db: asyncpg.Connection, price_buckets: List[float], search: Optional[str], category_id: Optional[int], brand_id: Optional[int], min_price: Optional[float], max_price: Optional[float]) -> schemas.ProductFacets:
+    # Normalize the filter set so equivalent requests share one cache entry
+    filter_key = json.dumps({
+        "search": product_crud.normalize_search_query(search),
+        "category_id": category_id or None,
+        "brand_id": brand_id or None,
+        "min_price": min_price,
+        "max_price": max_price,
+        "buckets": price_buckets,
+    }, sort_keys=True)
+    cache_key = f"product_facets:{hashlib.sha1(filter_key.encode('utf-8')).hexdigest()}"
+    redis_client = await get_redis_client()
+    cached = await redis_client.get(cache_key)
+    if cached:
+        return schemas.ProductFacets.model_validate_json(cached)
+    facets = await product_crud.get_product_facets(db, price_buckets, search_query=search, category_id=category_id, brand_id=brand_id, min_price=min_price, max_price=max_price)
+    await redis_client.setex(cache_key, ProductFacetsConfig.CACHE_TTL.value, facets.model_dump_json())
+    return facets
+
+@router.get("/", response_model=Union[List[schemas.Product], schemas.ProductFacetedList], dependencies=[Depends(etag_for("products"))])
+async def read_products(skip: int = 0, limit: int = 100, search: Optional[str] = None, category_id: Optional[int] = None, brand_id: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, sort: Optional[str] = None, after: Optional[str] = None, facets: bool = False, price_buckets: Optional[str] = None, db: asyncpg.Connection = Depends(get_db)):
+    """
+    Lists active products. Pass the `X-Next-Cursor` response header back as `after`
+    to fetch the next page with keyset pagination; `skip` is kept for compatibility.
+    With `search`, results are ranked by relevance unless another sort is requested.
+    With `facets=true`, the response also carries per-category, per-brand and per-price-bucket
+    counts for the same filters (`price_buckets` is a comma-separated list of boundaries).
+    """
+    products = await product_crud.get_products(db, skip=skip, limit=limit, search_query=search, category_id=category_id, brand_id=brand_id, min_price=min_price, max_price=max_price, sort=sort, after=after)
+    sort_key, _, descending = parse_sort(product_crud.resolve_product_sort(sort, search), {**product_crud.PRODUCT_SORT_COLUMNS, "relevance": ""})
+    cursor = next_cursor(products, limit, sort_key, descending, attribute=product_crud.PRODUCT_SORT_ATTRIBUTES.get(sort_key))
+    if facets:
+        facet_counts = await _get_cached_facets(db, _parse_price_buckets(price_buckets), search, category_id, brand_id, min_price, max_price)
+        body = schemas.ProductFacetedList(items=products, facets=facet_counts, next_cursor=cursor).model_dump_json().encode("utf-8")
+        return raw_json_response(body, {NEXT_CURSOR_HEADER: cursor} if cursor else None)
+    return cached_json_response(json_list_response(_PRODUCT_LIST, products, cursor))
+
+@router.get("/batch", response_model=schemas.ProductBatchResponse, dependencies=[Depends(etag_for("products"))])
+async def read_products_batch(ids: str, db: asyncpg.Connection = Depends(get_db)):
+    """
+    Fetches many products in one request, e.g. `/products/batch?ids=3,1,2`.
+    Products are returned in input order; unknown or inactive ids are listed in `missing_ids`.
+    """
+    try:
+        product_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(product_ids) > ProductCacheConfig.MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {ProductCacheConfig.MAX_BATCH_IDS.value} ids can be requested at once")
+    products, missing_ids = await product_crud.get_products_by_ids_cached(db, product_ids)
+    return schemas.ProductBatchResponse(products=products, missing_ids=missing_ids)
 
-@router.get("/{product_id}", response_model=schemas.Product)
+@router.get("/{product_id}", response_model=schemas.Product, dependencies=[Depends(etag_for("products"))])
 async def read_product(product_id: int, db: asyncpg.Connection = Depends(get_db)):
-    db_product = await product_crud.get_product_by_id(db, product_id=product_id)
+    db_product = await product_crud.get_product_by_id_cached(db, product_id=product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return db_product
@@ -116,12 +181,37 @@ async def create_comment_for_product(product_id: int, comment: schemas.CommentCr
     # Set user_name from current_user if not provided
     if not comment.user_name:
         comment.user_name = current_user.get('username', 'Anonymous')
-    return await product_crud.create_comment(db, comment)
+    return await product_crud.create_comment(db, comment, user_id=current_user.get('id'))
 
 @router.get("/{product_id}/comments", response_model=List[schemas.Comment])
 async def read_product_comments(product_id: int, db: asyncpg.Connection = Depends(get_db)):
     return await product_crud.get_comments(db, product_id)
 
+@router.get("/{product_id}/comments/tree", response_model=List[schemas.CommentThread])
+async def read_product_comment_tree(
+    product_id: int,
+    limit: int = Query(20, ge=1, le=CommentTreeConfig.MAX_PAGE_SIZE.value),
+    depth: int = Query(CommentTreeConfig.DEFAULT_DEPTH.value, ge=0, le=CommentTreeConfig.MAX_DEPTH.value),
+    after: Optional[str] = None,
+    db: asyncpg.Connection = Depends(get_db),
+):
+    """
+    Top-level comments of a product, newest first, each with nested `replies` down to `depth`
+    levels. Pass the `X-Next-Cursor` response header back as `after` for the next page.
+    """
+    async def load():
+        threads = await product_crud.get_comment_tree(db, product_id, limit=limit, depth=depth, after=after)
+        return json_list_response(_COMMENT_TREE, threads, next_cursor(threads, limit, "created_at", True))
+
+    # Rejects a malformed cursor with a 400 before it can reach the cache key
+    cursor = decode_cursor(after, "created_at", True) if after else None
+    version = await product_crud.get_comment_tree_version(product_id)
+    if version is None:
+        # Without the version, a cached page could predate a write
+        return cached_json_response(await load())
+    cache_key = product_crud.comment_tree_cache_key(product_id, version, depth, limit, cursor)
+    return cached_json_response(await product_crud.comment_tree_cache.get_or_load(cache_key, load))
+
 @router.put("/{product_id}/comments/{comment_id}", response_model=schemas.Comment)
 async def update_product_comment(
     product_id: int,
@@ -165,31 +255,27 @@ async def delete_product_comment(
     return
 
 @router.get("/{product_id}/recommendations", response_model=List[schemas.Product])
-async def get_product_recommendations(product_id: int, db: asyncpg.Connection = Depends(get_db)):
-    target_product = await product_crud.get_product_by_id(db, product_id=product_id)
-    if target_product is None:
+async def get_product_recommendations(product_id: int, limit: int = Query(5, ge=1, le=20), db: asyncpg.Connection = Depends(get_db)):
+    """Products with the most similar name and description, from the precomputed similar-products index."""
+    recommended_products = await product_crud.get_similar_products(db, product_id, limit=limit)
+    if recommended_products is None:
         raise HTTPException(status_code=404, detail="Product not found")
-
-    all_products = await product_crud.get_products(db)
-    
-    recommended_products = get_recommendations(target_product, all_products)
-    
-    if not recommended_products:
-        # Optional: Return a default list of popular products or latest products if no specific recommendations are found
-        # For now, we return an empty list.
-        return []
     return recommended_products
 
-@router.post("/upload")
-async def upload_products_from_csv(file: UploadFile = File(...), db: asyncpg.Connection = Depends(get_db)):
+@router.post("/upload", response_model=schemas.ImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def upload_products_from_csv(file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV file.")
 
     try:
-        result = await process_csv_and_save(file, db)
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return await start_import_job(file)
     except Exception as e:
-        logger.error(f"Failed to process CSV file {file.filename}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="An unexpected error occurred during CSV processing.")
+        logger.error(f"Failed to queue CSV import for {file.filename}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start the CSV import.")
+
+@router.get("/upload/{job_id}", response_model=schemas.ImportJob)
+async def get_upload_job(job_id: str):
+    job = await get_import_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found or expired")
+    return job
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from core.dependencies import log_activity
 from crud.user import require_admin
-from services import PersonalizedRecService
+from services import PersonalizedRecService, RecommendationService
 from core.pkgs.database import get_db
+from core.redis.tiered_cache import WORKER_ID
 import asyncpg
 from typing import List
 
@@ -17,6 +18,24 @@ async def train_model_endpoint(background_tasks: BackgroundTasks, admin: dict =
     background_tasks.add_task(PersonalizedRecService.train_and_cache_model)
     return {"message": "Recommendation model training has been started in the background."}
 
+@router.get("/model", summary="Get Loaded Recommendation Model (Admin Only)")
+async def get_model_info_endpoint(admin: dict = Depends(require_admin)):
+    """
+    Returns the version and load time of the recommendation model held by the worker that serves this request.
+    Workers pick up a newly trained model within a few seconds of it being written.
+    """
+    await PersonalizedRecService.model_registry.get()
+    return {"worker_id": WORKER_ID, **PersonalizedRecService.model_registry.info()}
+
+@router.post("/similar/rebuild", summary="Rebuild Similar Products Index (Admin Only)")
+async def rebuild_similar_products_endpoint(background_tasks: BackgroundTasks, admin: dict = Depends(require_admin)):
+    """
+    Recomputes the TF-IDF similar-products lists for the whole active catalog in the background.
+    Product changes are otherwise applied incrementally every minute.
+    """
+    background_tasks.add_task(RecommendationService.refresh_similar_products, True)
+    return {"message": "Similar products rebuild has been started in the background."}
+
 @router.get("/", summary="Get Personalized Recommendations")
 async def get_recommendations_for_user(db: asyncpg.Connection = Depends(get_db), current_user: dict = Depends(log_activity)) -> List[dict]:
     """
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime
-from core.utils.enums import OrderStatus, PaymentMethod
+from core.utils.enums import OrderStatus, PaymentMethod, ImportJobStatus
 
 class BrandBase(BaseModel):
     name: str
@@ -55,9 +55,50 @@ class Product(ProductBase):
     end_date: Optional[datetime] = None
     brand: Optional[Brand] = None
     category: Optional[Category] = None
+    relevance: Optional[float] = None # Only set for search results
     class Config:
         from_attributes = True
 
+class ProductBatchResponse(BaseModel):
+    products: List[Product]
+    missing_ids: List[int]
+
+class FacetCount(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+class PriceBucketCount(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    count: int
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[FacetCount]
+    brands: List[FacetCount]
+    price_buckets: List[PriceBucketCount]
+
+class ProductFacetedList(BaseModel):
+    items: List[Product]
+    facets: ProductFacets
+    next_cursor: Optional[str] = None
+
+class ImportJob(BaseModel):
+    job_id: str
+    status: ImportJobStatus
+    filename: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    total_rows: int = 0
+    cleaned_rows: int = 0
+    successful_imports: int = 0
+    raw_failed_imports: int = 0
+    llm_failed_imports: int = 0
+    llm_cache_hits: int = 0
+    error: Optional[str] = None
+    report: Optional[dict] = None
+
 class RegisterRequest(BaseModel):
     email: EmailStr
     username: str
@@ -124,6 +165,10 @@ class Comment(CommentBase):
     class Config:
         from_attributes = True
 
+class CommentThread(Comment):
+    depth: int = 0
+    replies: List["CommentThread"] = []
+
 class CartAddRequest(BaseModel):
     user_id: int
     product_id: int
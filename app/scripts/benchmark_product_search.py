@@ -0,0 +1,114 @@
+"""
+Seeds a large synthetic catalog and compares the legacy `name ILIKE '%q%'` product search
+with the indexed full-text/trigram search used by crud.product.get_products.
+
+Usage (from the app directory):
+    python scripts/benchmark_product_search.py --rows 1000000
+    python scripts/benchmark_product_search.py --skip-seed --repeat 20
+    python scripts/benchmark_product_search.py --cleanup
+
+Requires the search DDL from docs/all_tables.sql (unaccent, pg_trgm, products.search_vector).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import asyncpg
+
+# Add the project root to the Python path to allow importing from 'core' and 'crud'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.settings import settings
+from crud.product import _build_product_filters, _search_rank
+
+SEED_MARKER = '["bench-seed"]'
+
+# Queries cover exact words, accent-free input for accented names and a typo
+BENCH_QUERIES = ["điện thoại", "dien thoai", "tai nghe bluetooth", "laptp gaming", "áo khoác"]
+
+SEED_SQL = """
+    INSERT INTO products (name, description, price, quantity, image_urls, is_active)
+    SELECT
+        (ARRAY['Điện thoại', 'Tai nghe', 'Laptop', 'Áo khoác', 'Giày chạy bộ', 'Đồng hồ', 'Máy ảnh', 'Bàn phím'])[1 + (g % 8)]
+            || ' ' || (ARRAY['Samsung', 'Apple', 'Xiaomi', 'Sony', 'Asus', 'Nike', 'Adidas', 'Logitech'])[1 + ((g / 8) % 8)]
+            || ' ' || (ARRAY['bluetooth', 'gaming', 'chính hãng', 'cao cấp', 'mini', 'pro', 'thể thao', 'không dây'])[1 + ((g / 64) % 8)]
+            || ' #' || g,
+        'Sản phẩm mẫu số ' || g || ' dùng cho kiểm thử hiệu năng tìm kiếm',
+        (10000 + (g % 5000) * 1000)::float,
+        g % 100,
+        $2::jsonb,
+        TRUE
+    FROM generate_series(1, $1) AS g
+"""
+
+LEGACY_QUERY = "SELECT p.id FROM products p WHERE p.is_active = TRUE AND p.name ILIKE $1 ORDER BY p.id LIMIT 20"
+
+
+async def seed(conn: asyncpg.Connection, rows: int):
+    print(f"Seeding {rows} products...")
+    started = time.perf_counter()
+    await conn.execute(SEED_SQL, rows, SEED_MARKER)
+    await conn.execute("ANALYZE products")
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+
+async def time_query(conn: asyncpg.Connection, query: str, params: list, repeat: int) -> tuple[float, int]:
+    await conn.fetch(query, *params)  # warm-up
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await conn.fetch(query, *params)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(rows)
+
+
+async def plan_summary(conn: asyncpg.Connection, query: str, params: list) -> str:
+    plan = await conn.fetch("EXPLAIN " + query, *params)
+    nodes = [line[0].strip().lstrip("->").strip().split("  ")[0] for line in plan if "Scan" in line[0]]
+    return ", ".join(nodes)
+
+
+async def benchmark(conn: asyncpg.Connection, repeat: int):
+    total = await conn.fetchval("SELECT COUNT(*) FROM products")
+    print(f"\nCatalog size: {total} products, {repeat} runs per query (median shown)\n")
+    print(f"{'query':<22} {'legacy ms':>10} {'hits':>5}   {'indexed ms':>10} {'hits':>5}   plan")
+    for q in BENCH_QUERIES:
+        legacy_ms, legacy_hits = await time_query(conn, LEGACY_QUERY, [f"%{q}%"], repeat)
+
+        where, params, search_idx = _build_product_filters(search_query=q)
+        indexed_query = f"SELECT p.id FROM products p{where} ORDER BY {_search_rank(search_idx)} DESC, p.id DESC LIMIT 20"
+        indexed_ms, indexed_hits = await time_query(conn, indexed_query, params, repeat)
+        plan = await plan_summary(conn, indexed_query, params)
+
+        print(f"{q:<22} {legacy_ms:>10.2f} {legacy_hits:>5}   {indexed_ms:>10.2f} {indexed_hits:>5}   {plan}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seed and benchmark product search.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of synthetic products to insert.")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per query.")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark the existing catalog without seeding.")
+    parser.add_argument("--cleanup", action="store_true", help="Delete previously seeded products and exit.")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(dsn=settings.DB.DATABASE_URL)
+    try:
+        if args.cleanup:
+            deleted = await conn.execute("DELETE FROM products WHERE image_urls = $1::jsonb", SEED_MARKER)
+            print(f"Cleanup: {deleted}")
+            return
+        if not args.skip_seed:
+            await seed(conn, args.rows)
+        await benchmark(conn, args.repeat)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
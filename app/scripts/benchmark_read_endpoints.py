@@ -0,0 +1,83 @@
+"""
+Measures request throughput of the hot read endpoints against a running server.
+Run it once on the commit before the orjson/pre-serialized response change and once after,
+with the same data, worker count and concurrency, to get before/after numbers.
+
+The news and discount lists are the endpoints whose responses the change pre-serializes; pass
+`--endpoints /news/ /discounts/active` to measure just those. Responses are served from the
+list caches after the warm-up, so the numbers reflect the serialized-response path.
+
+scripts/seed_read_benchmark.py fills a scratch database with the data the published numbers
+were measured on; flush Redis before each run so both commits start from cold caches.
+
+Usage (from the app directory, with the API running):
+    python scripts/benchmark_read_endpoints.py --base-url http://localhost:8000
+    python scripts/benchmark_read_endpoints.py --duration 30 --concurrency 64 --limit 100
+    python scripts/benchmark_read_endpoints.py --endpoints /news/ /discounts/active
+
+    git checkout <commit before the change>   # restart the API, then run the script
+    git checkout <commit with the change>     # restart the API, run it again and compare req/s
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = ["/products/", "/news/", "/discounts/active"]
+
+
+async def worker(client: httpx.AsyncClient, path: str, params: dict, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            await response.aread()
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def bench_endpoint(base_url: str, path: str, params: dict, duration: float, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm up caches and connections
+        for _ in range(10):
+            await client.get(path, params=params)
+        latencies: list = []
+        errors: list = []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, path, params, deadline, latencies, errors) for _ in range(concurrency)))
+    if not latencies:
+        print(f"{path:<20} no successful requests ({len(errors)} errors)")
+        return
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{path:<20} {len(latencies) / duration:>10.1f} {statistics.median(latencies):>9.2f} "
+        f"{p99:>9.2f} {len(errors):>7}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark read endpoint throughput.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per endpoint.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=100, help="Page size passed to every endpoint.")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, help="Paths to benchmark.")
+    args = parser.parse_args()
+
+    print(f"{args.base_url}: {args.concurrency} concurrent clients, {args.duration:.0f}s per endpoint, limit={args.limit}\n")
+    print(f"{'endpoint':<20} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for path in args.endpoints:
+        await bench_endpoint(args.base_url, path, {"limit": args.limit}, args.duration, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
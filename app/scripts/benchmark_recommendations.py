@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of personalized recommendation scoring: the former per-item Python loop over
+dense similarity rows versus the vectorized services.PersonalizedRecService.top_n_candidates
+over top-k neighbour arrays, on synthetic models for catalogs of 10k and 100k items.
+
+The legacy loop gets the dense rows of the purchased items only (a dense 100k x 100k matrix
+would not fit in memory), which is all it reads.
+
+Usage (from the app directory):
+    python scripts/benchmark_recommendations.py
+    python scripts/benchmark_recommendations.py --items 10000 100000 --purchases 20 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the Python path to allow importing from 'services'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from services.PersonalizedRecService import top_n_candidates
+
+
+def legacy_scores(similarity_rows: np.ndarray, purchased_idx: np.ndarray, product_ids: np.ndarray, n: int) -> list:
+    """The scoring loop get_personalized_recommendations used before vectorization."""
+    purchased = {product_ids[i] for i in purchased_idx}
+    scores = {pid: 0.0 for pid in product_ids}
+    for row in similarity_rows:
+        for i, score in enumerate(row):
+            candidate_pid = product_ids[i]
+            if candidate_pid not in purchased:
+                scores[candidate_pid] += score
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [pid for pid, score in ranked if score > 0][:n]
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation scoring.")
+    parser.add_argument("--items", type=int, nargs="+", default=[10_000, 100_000], help="Catalog sizes.")
+    parser.add_argument("--purchases", type=int, default=20, help="Items purchased by the user.")
+    parser.add_argument("--top", type=int, default=10, help="Recommendations returned.")
+    parser.add_argument("--neighbours", type=int, default=50, help="Neighbours kept per item by the model.")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs of the vectorized scorer.")
+    parser.add_argument("--legacy-repeat", type=int, default=1, help="Timed runs of the legacy loop (0 to skip).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{args.purchases} purchased items, top {args.top}\n")
+    print(f"{'items':>9} {'legacy ms':>11} {'vectorized ms':>14} {'speedup':>9}")
+    for items in args.items:
+        product_ids = np.arange(1, items + 1)
+        purchased_idx = rng.choice(items, size=args.purchases, replace=False)
+        neighbour_idx = np.stack([rng.choice(items, size=args.neighbours, replace=False) for _ in range(items)]).astype(np.int32)
+        neighbour_scores = np.sort(rng.random((items, args.neighbours), dtype=np.float32), axis=1)[:, ::-1]
+
+        def vectorized_top():
+            return product_ids[top_n_candidates(neighbour_idx, neighbour_scores, purchased_idx, args.top)]
+
+        vectorized = timed(vectorized_top, args.repeat)
+        if args.legacy_repeat:
+            rows = np.zeros((args.purchases, items))
+            for j, position in enumerate(purchased_idx):
+                rows[j, neighbour_idx[position]] = neighbour_scores[position]
+            expected = set(vectorized_top().tolist())
+            if set(legacy_scores(rows, purchased_idx, product_ids, args.top)) != expected:
+                print(f"{items:>9} warning: legacy and vectorized top {args.top} differ (ties?)")
+            legacy = timed(lambda: legacy_scores(rows, purchased_idx, product_ids, args.top), args.legacy_repeat)
+            print(f"{items:>9} {legacy:>11.2f} {vectorized:>14.3f} {legacy / vectorized:>8.0f}x")
+        else:
+            print(f"{items:>9} {'-':>11} {vectorized:>14.3f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Applies or rolls back schema migrations from app/migrations.
+
+Usage (from the app directory):
+    python scripts/migrate.py status
+    python scripts/migrate.py up [--target 4]
+    python scripts/migrate.py down [--steps 1]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import asyncpg
+
+# Add the project root to the Python path to allow importing from 'core'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.settings import settings
+from core.pkgs.migrations import discover_migrations, get_applied_migrations, migrate_up, migrate_down
+
+
+async def status(conn: asyncpg.Connection):
+    applied = await get_applied_migrations(conn)
+    for migration in discover_migrations():
+        if migration.version not in applied:
+            state = "pending"
+        elif applied[migration.version] != migration.checksum:
+            state = "applied (modified since)"
+        else:
+            state = "applied"
+        print(f"{migration.version:04d}_{migration.name:<40} {state}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Manage database schema migrations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="List migrations and whether they are applied.")
+    up_parser = subparsers.add_parser("up", help="Apply pending migrations.")
+    up_parser.add_argument("--target", type=int, default=None, help="Stop after this version.")
+    down_parser = subparsers.add_parser("down", help="Roll back applied migrations.")
+    down_parser.add_argument("--steps", type=int, default=1, help="Number of migrations to roll back.")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(dsn=settings.DB.DATABASE_URL)
+    try:
+        if args.command == "status":
+            await status(conn)
+        elif args.command == "up":
+            applied = await migrate_up(conn, target=args.target)
+            print(f"Applied {len(applied)} migrations: {', '.join(f'{m.version:04d}_{m.name}' for m in applied) or '-'}")
+        else:
+            rolled_back = await migrate_down(conn, steps=args.steps)
+            print(f"Rolled back {len(rolled_back)} migrations: {', '.join(f'{m.version:04d}_{m.name}' for m in rolled_back) or '-'}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Seeds an empty database with the synthetic data used by scripts/benchmark_read_endpoints.py:
+20 categories, 50 brands, products with descriptions and images, news articles and active
+discounts on some of the products, then fills the product_prices read model.
+
+Usage (from the app directory, against a scratch database with the schema applied):
+    python scripts/seed_read_benchmark.py
+    python scripts/seed_read_benchmark.py --products 100000 --news 5000 --discounts 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import asyncpg
+
+# Add the project root to the Python path to allow importing from 'core' and 'crud'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.settings import settings
+from crud.product_price import refresh_product_prices
+
+# (statement, names of the command line arguments bound to $1, $2, ...)
+SEED_STATEMENTS = [
+    ("INSERT INTO categories (name) SELECT 'Category ' || g FROM generate_series(1, 20) g", []),
+    ("INSERT INTO brands (name) SELECT 'Brand ' || g FROM generate_series(1, 50) g", []),
+    ("""
+    INSERT INTO products (name, description, price, quantity, image_urls, is_active, release_date, category_id, brand_id)
+    SELECT 'Product ' || g || ' ' || (ARRAY['laptop', 'phone', 'mouse', 'keyboard', 'monitor', 'headset'])[1 + g % 6],
+           repeat('Detailed description of product ' || g || '. ', 8),
+           10 + (g * 7919) % 2000, g % 100,
+           jsonb_build_array('https://img.example.com/' || g || '/1.jpg', 'https://img.example.com/' || g || '/2.jpg'),
+           TRUE, NOW() - (g || ' hours')::interval, 1 + g % 20, 1 + g % 50
+    FROM generate_series(1, $1::int) g
+    """, ["products"]),
+    ("""
+    INSERT INTO news (title, content, image_url, is_active)
+    SELECT 'News headline number ' || g, repeat('News body paragraph ' || g || '. ', 40),
+           'https://img.example.com/news/' || g || '.jpg', TRUE
+    FROM generate_series(1, $1::int) g
+    """, ["news"]),
+    # Discount windows are stored in Vietnam local time, like the admin endpoints write them
+    ("""
+    INSERT INTO discounts (name, percent, start_date, end_date, product_id, is_active)
+    SELECT 'Discount ' || g, 5 + g % 40,
+           (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh') - INTERVAL '1 day',
+           (NOW() AT TIME ZONE 'Asia/Ho_Chi_Minh') + INTERVAL '30 days',
+           1 + (g * 19) % $2::int, TRUE
+    FROM generate_series(1, $1::int) g
+    """, ["discounts", "products"]),
+]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seed data for the read endpoint benchmark.")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--news", type=int, default=1_000)
+    parser.add_argument("--discounts", type=int, default=500)
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(dsn=settings.DB.DATABASE_URL)
+    try:
+        if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM products)"):
+            sys.exit("The products table is not empty; seed a scratch database instead.")
+        started = time.perf_counter()
+        async with conn.transaction():
+            for statement, arg_names in SEED_STATEMENTS:
+                await conn.execute(statement, *[getattr(args, name) for name in arg_names])
+            await refresh_product_prices(conn)
+        await conn.execute("ANALYZE")
+        print(f"Seeded {args.products} products, {args.news} news and {args.discounts} discounts in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Checks with EXPLAIN that the hot queries can use the secondary indexes from
+migrations/0004_secondary_indexes
+(and 0008_products_listing_index). Exits non-zero if a query does not use its index.
+
+On small tables Postgres rightly prefers sequential scans, so by default sequential scans
+are disabled for the check (this verifies the index is usable, not that it is chosen).
+Pass --natural to see the plans the planner picks on the current data instead.
+
+Usage (from the app directory):
+    python scripts/verify_indexes.py
+    python scripts/verify_indexes.py --natural --verbose
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import asyncpg
+
+# Add the project root to the Python path to allow importing from 'core'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.settings import settings
+
+# (description, expected index, query, params)
+CHECKS = [
+    (
+        "active products by category/brand, in id order",
+        "idx_products_active_category_brand_id",
+        "SELECT id FROM products WHERE is_active = TRUE AND category_id = $1 AND brand_id = $2 ORDER BY id LIMIT 20",
+        [1, 1],
+    ),
+    (
+        "active discount of a product",
+        "idx_discounts_product_active_window",
+        "SELECT id, percent FROM discounts WHERE product_id = $1 AND is_active = TRUE AND start_date <= NOW() AND end_date >= NOW()",
+        [1],
+    ),
+    (
+        "items of an order",
+        "idx_order_items_order_id",
+        "SELECT product_id, quantity, price FROM order_items WHERE order_id = $1",
+        [1],
+    ),
+    (
+        "orders of a user, newest first",
+        "idx_orders_user_created",
+        "SELECT id FROM orders WHERE user_id = $1 ORDER BY created_at DESC LIMIT 20",
+        [1],
+    ),
+    (
+        "cart line by user and product",
+        "idx_cart_user_product",
+        "SELECT quantity FROM cart WHERE user_id = $1 AND product_id = $2",
+        [1, 1],
+    ),
+    (
+        "comments of a product",
+        "idx_comments_product_created",
+        "SELECT id FROM comments WHERE product_id = $1 ORDER BY created_at LIMIT 50",
+        [1],
+    ),
+]
+
+
+def plan_indexes(node: dict) -> set:
+    """Collects every index name referenced anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    names = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", []):
+        names |= plan_indexes(child)
+    return names
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Verify hot queries use their secondary indexes.")
+    parser.add_argument("--natural", action="store_true", help="Keep sequential scans enabled.")
+    parser.add_argument("--verbose", action="store_true", help="Print the full plan of every query.")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(dsn=settings.DB.DATABASE_URL)
+    failures = 0
+    try:
+        if not args.natural:
+            await conn.execute("SET enable_seqscan = off")
+        for description, index, query, params in CHECKS:
+            raw_plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + query, *params)
+            plan = (json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan)[0]["Plan"]
+            used = plan_indexes(plan)
+            ok = index in used
+            failures += not ok
+            print(f"[{'OK' if ok else 'MISSING'}] {description:<34} expected {index}; plan uses {', '.join(sorted(used)) or 'no index'}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+    finally:
+        await conn.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Optional, Set
+from fastapi import UploadFile
+from core.app_config import logger
+from core.pkgs.database import connection_pool
+from core.redis.redis_client import get_redis_client
+from core.utils.enums import ImportJobConfig, ImportJobStatus
+from schemas import schemas
+from services.CsvProcessingService import process_csv_and_save
+
+# Bounds how many imports a worker runs at once so they cannot starve request handling
+_job_semaphore = asyncio.Semaphore(ImportJobConfig.MAX_CONCURRENT_JOBS.value)
+# Strong references to running jobs (asyncio only keeps weak ones)
+_running_jobs: Set[asyncio.Task] = set()
+
+_COUNTER_FIELDS = ("total_rows", "cleaned_rows", "successful_imports", "raw_failed_imports", "llm_failed_imports", "llm_cache_hits")
+
+
+def _job_key(job_id: str) -> str:
+    return f"import_job:{job_id}"
+
+
+async def _update_job(job_id: str, **fields):
+    fields["updated_at"] = datetime.now().isoformat()
+    redis_client = await get_redis_client()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(_job_key(job_id), mapping={k: str(v) for k, v in fields.items()})
+        pipe.expire(_job_key(job_id), ImportJobConfig.TTL.value)
+        await pipe.execute()
+
+
+async def get_import_job(job_id: str) -> Optional[schemas.ImportJob]:
+    redis_client = await get_redis_client()
+    data = await redis_client.hgetall(_job_key(job_id))
+    if not data:
+        return None
+    report = data.pop("report", None)
+    return schemas.ImportJob(
+        job_id=job_id,
+        report=json.loads(report) if report else None,
+        **{k: v for k, v in data.items() if v != ""},
+    )
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    """Copies the upload to a temporary file chunk by chunk, so the job outlives the request."""
+    fd, path = tempfile.mkstemp(prefix="product_import_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(ImportJobConfig.SPOOL_CHUNK_SIZE.value):
+                spool.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+async def _run_import_job(job_id: str, path: str, filename: str):
+    try:
+        async with _job_semaphore:
+            await _update_job(job_id, status=ImportJobStatus.RUNNING.value)
+
+            async def progress(**counters):
+                await _update_job(job_id, **counters)
+
+            pool = await connection_pool.get_pool()
+            async with pool.acquire() as db:
+                report = await process_csv_and_save(path, filename, db, progress)
+
+            await _update_job(
+                job_id,
+                status=ImportJobStatus.COMPLETED.value,
+                successful_imports=report["successful_imports"],
+                raw_failed_imports=report["raw_failed_imports"],
+                llm_failed_imports=report["llm_failed_imports"],
+                llm_cache_hits=report["llm_cache_hits"],
+                report=json.dumps(report, ensure_ascii=False, default=str),
+            )
+            logger.info(f"Import job {job_id} ({filename}) completed: {report['successful_imports']} products imported.")
+    except asyncio.CancelledError:
+        await _update_job(job_id, status=ImportJobStatus.FAILED.value, error="Import was interrupted by a server shutdown.")
+        raise
+    except ValueError as e:
+        await _update_job(job_id, status=ImportJobStatus.FAILED.value, error=str(e))
+    except Exception as e:
+        logger.error(f"Import job {job_id} ({filename}) failed: {e}", exc_info=True)
+        await _update_job(job_id, status=ImportJobStatus.FAILED.value, error="An unexpected error occurred during CSV processing.")
+    finally:
+        os.remove(path)
+
+
+async def start_import_job(file: UploadFile) -> schemas.ImportJob:
+    """Spools the upload to disk, records a queued job in Redis and schedules it in the background."""
+    job_id = uuid.uuid4().hex
+    path = await _spool_upload(file)
+    now = datetime.now().isoformat()
+    try:
+        await _update_job(
+            job_id,
+            status=ImportJobStatus.QUEUED.value,
+            filename=file.filename,
+            created_at=now,
+            **{field: 0 for field in _COUNTER_FIELDS},
+        )
+        task = asyncio.create_task(_run_import_job(job_id, path, file.filename))
+    except BaseException:
+        # The job never started, so its finally block will not remove the spooled file
+        os.remove(path)
+        raise
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    logger.info(f"Queued import job {job_id} for file {file.filename}.")
+    return await get_import_job(job_id)
+
+
+async def cancel_import_jobs():
+    """Cancels jobs still running at shutdown; they are marked failed so clients stop polling."""
+    for task in list(_running_jobs):
+        task.cancel()
+    await asyncio.gather(*_running_jobs, return_exceptions=True)
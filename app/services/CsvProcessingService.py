@@ -1,15 +1,23 @@
+import asyncio
+import hashlib
+import numpy as np
 import pandas as pd
 import asyncpg
 import httpx
 import json
-import io
 import math
-from fastapi import UploadFile
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
 from pydantic import ValidationError
 from core.settings import settings
 from core.app_config import logger
 from schemas import schemas
 from crud import product as product_crud
+from core.aws.sns_client import sns_client
+from core.utils.enums import CsvImportConfig
+from core.redis.llm_row_cache import llm_row_cache_key, get_cached_rows, cache_rows
 
 def sanitize_record(record: dict) -> dict:
     """Replace NaN/Infinity values with safe defaults before JSON serialization or DB insert."""
@@ -26,148 +34,362 @@ def sanitize_record(record: dict) -> dict:
             clean_record[key] = value
     return clean_record
 
-async def process_csv_and_save(file: UploadFile, db: asyncpg.Connection):
+LLM_SYSTEM_PROMPT = (
+    "Bạn là một chuyên gia xử lý dữ liệu. "
+    "Nhiệm vụ của bạn là làm sạch và chuẩn hóa mảng JSON các sản phẩm."
+    "QUY TẮC QUAN TRỌNG:"
+    "1. Mỗi sản phẩm PHẢI có 'name' (str), 'price' (float), và 'quantity' (int)."
+    "2. 'description' (Text) nếu thiếu thì tự sinh mô tả ngắn gọn."
+    "3. 'image_url' (str) nếu thiếu thì để null."
+    "4. Cắt bỏ khoảng trắng thừa ở các trường văn bản."
+    "5. Nếu thiếu 'quantity' thì mặc định là 0."
+    "6. Không bao giờ được trả về NaN, Infinity hoặc -Infinity."
+    "7. Giữ nguyên trường '_row_id' của mỗi sản phẩm."
+    "ĐẦU RA: Chỉ trả về JSON object có key 'products', giá trị là một mảng sản phẩm hợp lệ."
+)
+
+# Part of every LLM row cache key: changing the prompt or the model invalidates cached results
+LLM_PROMPT_VERSION = hashlib.sha256(f"{settings.LOCAL_LLM.MODEL}\n{LLM_SYSTEM_PROMPT}".encode("utf-8")).hexdigest()[:16]
+
+# Pre-validation error messages, in the order they are reported for a row
+MISSING_NAME_ERROR = "Missing 'name'"
+INVALID_PRICE_ERROR = "Invalid 'price' (must be a number)"
+INVALID_QUANTITY_ERROR = "Invalid 'quantity' (must be an integer)"
+
+def _blank_mask(column: pd.Series) -> pd.Series:
+    """True where a cell is NaN/None or a whitespace-only string."""
+    blank = column.isna()
+    if column.dtype == object:
+        blank |= column.astype("string").str.strip().eq("").fillna(False).astype(bool)
+    return blank
+
+def _coerce_numeric(df: pd.DataFrame, column: str) -> Tuple[Optional[pd.Series], pd.Series]:
     """
-    Reads a CSV file, validates raw data, sends valid records to LLM for cleaning,
-    validates again, and saves to the DB.
-    Returns a detailed report of all successful and failed imports.
+    Coerces a column with pd.to_numeric. Returns (numeric values, invalid mask); blank cells
+    count as missing rather than invalid, non-numeric or infinite values as invalid.
     """
+    if column not in df.columns:
+        return None, pd.Series(False, index=df.index)
+    raw = df[column]
+    blank = _blank_mask(raw)
+    if raw.dtype == object:
+        raw = raw.astype("string").str.strip().astype(object)
+    values = pd.to_numeric(raw.where(~blank), errors="coerce").astype("float64")
+    invalid = ~blank & (values.isna() | np.isinf(values))
+    return values.where(~invalid), invalid
+
+def _frame_to_records(df: pd.DataFrame) -> List[dict]:
+    """Materializes rows as dicts with NaN/Infinity replaced by None, so they are JSON-safe."""
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+def prevalidate_frame(df: pd.DataFrame) -> Tuple[List[dict], List[dict]]:
+    """
+    Validates name, price and quantity column-wise. Returns (valid rows ready for the LLM,
+    failed records with their error reasons); only those rows are converted to dicts.
+    Valid rows carry the coerced numbers, with a missing price/quantity defaulting to 0.
+    """
+    if "name" in df.columns:
+        missing_name = _blank_mask(df["name"])
+    else:
+        missing_name = pd.Series(True, index=df.index)
+    price, invalid_price = _coerce_numeric(df, "price")
+    quantity, invalid_quantity = _coerce_numeric(df, "quantity")
+
+    reasons = pd.DataFrame({
+        MISSING_NAME_ERROR: missing_name,
+        INVALID_PRICE_ERROR: invalid_price,
+        INVALID_QUANTITY_ERROR: invalid_quantity,
+    })
+    failed_mask = reasons.any(axis=1)
+
+    failed_reasons = reasons[failed_mask]
+    raw_failed_records = [
+        {"record": record, "errors": [message for message, failed in zip(failed_reasons.columns, flags) if failed]}
+        for record, flags in zip(_frame_to_records(df[failed_mask]), failed_reasons.itertuples(index=False, name=None))
+    ]
+
+    valid = df[~failed_mask].copy()
+    if price is not None:
+        valid["price"] = price[~failed_mask].fillna(0.0)
+    if quantity is not None:
+        valid["quantity"] = quantity[~failed_mask].fillna(0).astype("int64")
+    return _frame_to_records(valid), raw_failed_records
+
+# Awaited with keyword counters (e.g. total_rows=..., cleaned_rows=...) as an import advances
+ProgressCallback = Callable[..., Awaitable[None]]
+
+def estimate_tokens(row: dict) -> int:
+    """Rough prompt-token estimate for one row (~4 characters per token)."""
+    return len(json.dumps(row, ensure_ascii=False)) // 4 + 1
+
+def chunk_rows(rows: List[dict], token_budget: int) -> List[List[dict]]:
+    """Splits rows into consecutive chunks whose estimated prompt size stays within token_budget."""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for row in rows:
+        tokens = estimate_tokens(row)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(row)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _clean_chunk(client: httpx.AsyncClient, chunk: List[dict]) -> List[dict]:
+    """Sends one chunk to the LLM and returns the cleaned product dicts."""
+    llm_payload = {
+        "model": settings.LOCAL_LLM.MODEL,
+        "messages": [
+            {"role": "system", "content": LLM_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(chunk, ensure_ascii=False)},
+        ],
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"}
+    }
+    response = await client.post(settings.LOCAL_LLM.API_URL, json=llm_payload)
+    response.raise_for_status()
+    llm_response_content = response.json()["choices"][0]["message"]["content"].strip()
+
     try:
-        content = await file.read()
+        processed_data = json.loads(llm_response_content).get("products", [])
+        if not isinstance(processed_data, list):
+            raise ValueError("LLM did not return a list of products under 'products' key.")
+    except (json.JSONDecodeError, ValueError, AttributeError) as e:
+        logger.debug(f"Raw LLM response: {llm_response_content}")
+        raise ValueError(f"Could not extract valid products list from LLM response: {e}")
+    return processed_data
+
+async def _clean_chunk_with_retry(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, index: int, chunk: List[dict]) -> Tuple[int, List[dict], Optional[str]]:
+    """Cleans one chunk, retrying only this chunk on failure. Returns (chunk index, cleaned rows, last error)."""
+    last_error = None
+    for attempt in range(settings.LOCAL_LLM.MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(2 ** (attempt - 1))
         try:
-            df = pd.read_csv(io.BytesIO(content))
-        except pd.errors.ParserError as e:
-            logger.error(f"Failed to parse CSV file {file.filename}: {e}")
-            raise ValueError(f"The uploaded file '{file.filename}' is not a valid CSV or is malformed.")
+            async with semaphore:
+                return index, await _clean_chunk(client, chunk), None
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            last_error = str(e) or e.__class__.__name__
+            logger.warning(f"LLM cleaning of chunk {index} ({len(chunk)} rows) failed on attempt {attempt + 1}: {last_error}")
+    return index, [], last_error
 
-        raw_records = df.to_dict(orient='records')
-        logger.info(f"Processing {len(raw_records)} records from CSV file: {file.filename}")
+def _match_chunk_records(chunk: List[dict], cleaned: List[Any]) -> List[Tuple[int, int, Any, Optional[str]]]:
+    """
+    Pairs the records the LLM returned for a chunk with the rows that were sent, by `_row_id`.
+    Returns (row position, order within the row's output, record, error) tuples; error is None
+    only for a record matched one-to-one with a sent row. Records with a missing, unknown or
+    repeated `_row_id` are errors (kept at the end of their chunk), and every sent row the
+    model returned nothing for is reported as failed with its original values.
+    """
+    sent = {row["_row_id"]: row for row in chunk}
+    row_ids = [record.pop("_row_id", None) if isinstance(record, dict) else None for record in cleaned]
+    counts = Counter(row_id for row_id in row_ids if isinstance(row_id, int))
+    last_position = chunk[-1]["_row_id"]
 
-        # ---------------------------
-        # STEP 1: Pre-validation (CSV level)
-        # ---------------------------
-        valid_rows = []
-        raw_failed_records = []
-
-        for row in raw_records:
-            errors = []
-
-            if not row.get("name") or str(row.get("name")).strip() == "":
-                errors.append("Missing 'name'")
-
-            try:
-                if row.get("price") not in (None, "", " "):
-                    float(row["price"])
-            except Exception:
-                errors.append("Invalid 'price' (must be a number)")
-
-            try:
-                if row.get("quantity") not in (None, "", " "):
-                    int(float(row["quantity"]))  # float trước để xử lý 1.0
-            except Exception:
-                errors.append("Invalid 'quantity' (must be an integer)")
-
-            if errors:
-                sanitized_row = sanitize_record(row)
-                raw_failed_records.append({"record": sanitized_row, "errors": errors})
-            else:
-                valid_rows.append(row)
+    matched = []
+    for seq, (row_id, record) in enumerate(zip(row_ids, cleaned)):
+        if not isinstance(row_id, int) or row_id not in sent:
+            matched.append((last_position, seq + 1, record, f"LLM returned a record with an unknown _row_id: {row_id!r}"))
+        elif counts[row_id] > 1:
+            matched.append((row_id, seq + 1, record, f"LLM returned {counts[row_id]} records for the same row"))
+        else:
+            matched.append((row_id, seq + 1, record, None))
+    for row_id, row in sent.items():
+        if row_id not in counts:
+            record = {k: v for k, v in row.items() if k != "_row_id"}
+            matched.append((row_id, 0, record, "LLM returned no record for this row"))
+    return matched
 
-        logger.info(f"Pre-validation result: {len(valid_rows)} valid, {len(raw_failed_records)} invalid from CSV")
+def validate_cleaned_record(record: dict) -> Tuple[Optional[schemas.ProductCreate], Optional[dict]]:
+    """Validates one LLM-cleaned record with Pydantic. Returns (product, None) or (None, failed record with errors)."""
+    try:
+        # sanitize lần nữa (phòng LLM vẫn trả về NaN/Infinity)
+        record = sanitize_record(record)
+        return schemas.ProductCreate(**record), None
+    except ValidationError as e:
+        logger.warning(f"Validation failed after LLM for record: {record}. Error: {e.errors()}")
+        return None, {"record": record, "errors": e.errors()}
+    except Exception as e:
+        logger.error(f"Unexpected error validating record {record}: {e}")
+        return None, {"record": record, "errors": [{"msg": str(e)}]}
 
-        if not valid_rows:
-            return {
-                "message": "No valid records found in CSV file.",
-                "successful_imports": 0,
-                "raw_failed_imports": len(raw_failed_records),
-                "llm_failed_imports": 0,
-                "errors": raw_failed_records,
-            }
+async def clean_and_validate_rows(rows: List[dict], progress: Optional[ProgressCallback] = None) -> Tuple[List[schemas.ProductCreate], List[dict], int]:
+    """
+    Cleans rows with the LLM in token-budgeted chunks processed concurrently (bounded by
+    LOCAL_LLM.MAX_CONCURRENCY). Each chunk is validated as soon as its response arrives, and
+    results are merged back in the original row order. Rows of chunks that still fail after
+    LOCAL_LLM.MAX_RETRIES are reported as failed instead of aborting the import, as are rows
+    the model dropped and records whose `_row_id` does not match exactly one sent row.
 
-        # 🔥 sanitize trước khi gửi sang LLM
-        valid_rows = [sanitize_record(row) for row in valid_rows]
+    Rows cleaned before under the same prompt are served from the content-addressed
+    LLM row cache and never reach the model; newly cleaned valid rows are added to it.
+    `progress`, if given, is awaited with the running `cleaned_rows` count after each chunk.
+    Returns (products, failed records, cache hits).
+    """
+    keys = [llm_row_cache_key(LLM_PROMPT_VERSION, row) for row in rows]
+    # (row position, order within the row's output, product or failed record)
+    results: List[Tuple[int, int, Optional[schemas.ProductCreate], Optional[dict]]] = []
+    pending = []
+    for position, (row, cached) in enumerate(zip(rows, await get_cached_rows(keys))):
+        if cached is None:
+            pending.append({**row, "_row_id": position})
+        else:
+            results.append((position, 0, *validate_cleaned_record(cached)))
+    cache_hits = len(rows) - len(pending)
 
-        # ---------------------------
-        # STEP 2: Send valid rows to LLM
-        # ---------------------------
-        async with httpx.AsyncClient(timeout=None) as client:
-            system_message = {
-                "role": "system",
-                "content": (
-                    "Bạn là một chuyên gia xử lý dữ liệu. "
-                    "Nhiệm vụ của bạn là làm sạch và chuẩn hóa mảng JSON các sản phẩm."
-                    "QUY TẮC QUAN TRỌNG:"
-                    "1. Mỗi sản phẩm PHẢI có 'name' (str), 'price' (float), và 'quantity' (int)."
-                    "2. 'description' (Text) nếu thiếu thì tự sinh mô tả ngắn gọn."
-                    "3. 'image_url' (str) nếu thiếu thì để null."
-                    "4. Cắt bỏ khoảng trắng thừa ở các trường văn bản."
-                    "5. Nếu thiếu 'quantity' thì mặc định là 0."
-                    "6. Không bao giờ được trả về NaN, Infinity hoặc -Infinity."
-                    "ĐẦU RA: Chỉ trả về JSON object có key 'products', giá trị là một mảng sản phẩm hợp lệ."
-                )
-            }
-            user_message = {
-                "role": "user",
-                "content": json.dumps(valid_rows, indent=2, ensure_ascii=False)
-            }
-
-            llm_payload = {
-                "model": settings.LOCAL_LLM.MODEL,
-                "messages": [system_message, user_message],
-                "temperature": 0.2,
-                "response_format": {"type": "json_object"}
-            }
-
-            response = await client.post(settings.LOCAL_LLM.API_URL, json=llm_payload)
-            response.raise_for_status()
-
-            llm_response_content = response.json()["choices"][0]["message"]["content"].strip()
-
-            try:
-                json_objects = json.loads(llm_response_content)
-                processed_data = json_objects.get("products", [])
-                if not isinstance(processed_data, list):
-                    raise ValueError("LLM did not return a list of products under 'products' key.")
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Error parsing LLM response: {e}")
-                logger.debug(f"Raw LLM response: {llm_response_content}")
-                raise ValueError("Could not extract valid products list from LLM response.")
+    chunks = chunk_rows(pending, settings.LOCAL_LLM.CHUNK_TOKEN_BUDGET)
+    logger.info(f"LLM row cache: {cache_hits} hits; cleaning {len(pending)} rows with the LLM in {len(chunks)} chunks.")
+    cleaned_rows = cache_hits
+    if progress is not None:
+        await progress(cleaned_rows=cleaned_rows, llm_cache_hits=cache_hits)
+    semaphore = asyncio.Semaphore(settings.LOCAL_LLM.MAX_CONCURRENCY)
 
-        # ---------------------------
-        # STEP 3: Validate with Pydantic and save
-        # ---------------------------
-        created_products = []
-        llm_failed_records = []
+    async with httpx.AsyncClient(timeout=settings.LOCAL_LLM.TIMEOUT) as client:
+        tasks = [asyncio.create_task(_clean_chunk_with_retry(client, semaphore, i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, cleaned, error = await finished
+                chunk = chunks[index]
+                if error is not None:
+                    for row in chunk:
+                        record = {k: v for k, v in row.items() if k != "_row_id"}
+                        results.append((row["_row_id"], 0, None, {"record": record, "errors": [{"msg": f"LLM cleaning failed: {error}"}]}))
+                else:
+                    to_cache = {}
+                    for position, seq, record, error in _match_chunk_records(chunk, cleaned):
+                        if error is not None:
+                            results.append((position, seq, None, {"record": record, "errors": [{"msg": error}]}))
+                            continue
+                        product, failed = validate_cleaned_record(record)
+                        results.append((position, seq, product, failed))
+                        # Only records matched one-to-one with a sent row are cached under that row
+                        if product is not None:
+                            to_cache[keys[position]] = product.model_dump(mode='json')
+                    await cache_rows(to_cache)
+                cleaned_rows += len(chunk)
+                if progress is not None:
+                    await progress(cleaned_rows=cleaned_rows)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    results.sort(key=lambda result: (result[0], result[1]))
+    products = [product for _, _, product, _ in results if product is not None]
+    failed_records = [failed for _, _, _, failed in results if failed is not None]
+    return products, failed_records, cache_hits
+
+def publish_products_created(products: List[schemas.Product]):
+    """Publishes one ProductCreated event per imported product using SNS batch publishing."""
+    if not products:
+        return
+    timestamp = datetime.now().isoformat()
+    messages = [
+        (json.dumps({
+            "product_id": product.id,
+            "operation_type": "create",
+            "timestamp": timestamp,
+            "product_data": json.loads(product.model_dump_json())
+        }), "ProductCreated")
+        for product in products
+    ]
+    sns_client.publish_batch(topic_arn=settings.AWS.SNS_PRODUCT_EVENTS_TOPIC_ARN, messages=messages)
+
+def _append_capped(report_list: List[dict], records: List[dict]):
+    """Keeps at most CsvImportConfig.MAX_REPORTED_ERRORS records per report list; counters stay exact."""
+    room = CsvImportConfig.MAX_REPORTED_ERRORS.value - len(report_list)
+    if room > 0:
+        report_list.extend(records[:room])
+
+async def process_csv_and_save(path: str, filename: str, db: asyncpg.Connection, progress: Optional[ProgressCallback] = None):
+    """
+    Streams a CSV file in chunks of CsvImportConfig.CHUNK_ROWS rows. Each chunk is validated,
+    sent to the LLM for cleaning, validated again and saved to the DB before the next one is
+    read, so memory use does not grow with the file size.
+    `progress`, if given, is awaited with updated counters after each stage.
+    Returns a report of the import; at most CsvImportConfig.MAX_REPORTED_ERRORS failed
+    records are listed per category, while the counts cover every row.
+    """
+    total_rows = 0
+    valid_rows_count = 0
+    successful_imports = 0
+    raw_failed_count = 0
+    llm_failed_count = 0
+    llm_cache_hits = 0
+    raw_failed_records = []
+    llm_failed_records = []
+
+    async def chunk_progress(**counters):
+        # Chunk-level counters are offset by what earlier chunks already reported
+        if "cleaned_rows" in counters:
+            counters["cleaned_rows"] += valid_rows_count
+        if "llm_cache_hits" in counters:
+            counters["llm_cache_hits"] += llm_cache_hits
+        await progress(**counters)
+
+    try:
+        try:
+            with pd.read_csv(path, chunksize=CsvImportConfig.CHUNK_ROWS.value) as reader:
+                logger.info(f"Processing CSV file: {filename}")
+                for df in reader:
+                    # ---------------------------
+                    # STEP 1: Pre-validation (CSV level, vectorized)
+                    # ---------------------------
+                    valid_rows, chunk_raw_failed = prevalidate_frame(df)
+                    total_rows += len(df)
+                    raw_failed_count += len(chunk_raw_failed)
+                    _append_capped(raw_failed_records, chunk_raw_failed)
+                    del df, chunk_raw_failed
+                    if progress is not None:
+                        await progress(total_rows=total_rows, raw_failed_imports=raw_failed_count)
+                    if not valid_rows:
+                        continue
 
-        for record in processed_data:
-            try:
-                # sanitize lần nữa (phòng LLM vẫn trả về NaN/Infinity)
-                record = sanitize_record(record)
+                    # ---------------------------
+                    # STEP 2 + 3: Clean rows with the LLM chunk by chunk and validate each chunk with Pydantic
+                    # ---------------------------
+                    product_batch, chunk_llm_failed, chunk_cache_hits = await clean_and_validate_rows(
+                        valid_rows, chunk_progress if progress is not None else None
+                    )
 
-                product_data = schemas.ProductCreate(**record)
-                created_product = await product_crud.create_product(db=db, product=product_data)
-                created_products.append(created_product)
+                    # ---------------------------
+                    # STEP 4: Bulk insert and publish events
+                    # ---------------------------
+                    created_products, insert_failed_records = await product_crud.create_products_bulk(db, product_batch)
+                    chunk_llm_failed.extend(insert_failed_records)
+                    await run_in_threadpool(publish_products_created, created_products)
 
-            except ValidationError as e:
-                logger.warning(f"Validation failed after LLM for record: {record}. Error: {e.errors()}")
-                llm_failed_records.append({"record": record, "errors": e.errors()})
-            except Exception as e:
-                logger.error(f"Unexpected error saving record {record}: {e}")
-                llm_failed_records.append({"record": record, "errors": [{"msg": str(e)}]})
+                    valid_rows_count += len(valid_rows)
+                    successful_imports += len(created_products)
+                    llm_failed_count += len(chunk_llm_failed)
+                    llm_cache_hits += chunk_cache_hits
+                    _append_capped(llm_failed_records, chunk_llm_failed)
+                    if progress is not None:
+                        await progress(successful_imports=successful_imports, llm_failed_imports=llm_failed_count)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            logger.error(f"Failed to parse CSV file {filename}: {e}")
+            raise ValueError(f"The uploaded file '{filename}' is not a valid CSV or is malformed.")
 
         # ---------------------------
         # Summary
         # ---------------------------
         logger.info(
-            f"CSV Processing Summary: {len(created_products)} successful, "
-            f"{len(raw_failed_records)} raw failed, {len(llm_failed_records)} LLM failed."
+            f"CSV Processing Summary: {successful_imports}/{total_rows} successful, "
+            f"{raw_failed_count} raw failed, {llm_failed_count} LLM failed, "
+            f"{llm_cache_hits}/{valid_rows_count} rows served from the LLM row cache."
         )
 
         return {
-            "message": "CSV processing complete.",
-            "successful_imports": len(created_products),
-            "raw_failed_imports": len(raw_failed_records),
-            "llm_failed_imports": len(llm_failed_records),
+            "message": "CSV processing complete." if valid_rows_count else "No valid records found in CSV file.",
+            "successful_imports": successful_imports,
+            "raw_failed_imports": raw_failed_count,
+            "llm_failed_imports": llm_failed_count,
+            "llm_cache_hits": llm_cache_hits,
+            "llm_cache_misses": valid_rows_count - llm_cache_hits,
             "errors": {
                 "raw_failed_records": raw_failed_records,
                 "llm_failed_records": llm_failed_records,
@@ -176,4 +398,4 @@ async def process_csv_and_save(file: UploadFile, db: asyncpg.Connection):
 
     except Exception as e:
         logger.error(f"An error occurred during CSV processing: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
@@ -1,111 +1,434 @@
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict
+import asyncio
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from typing import List, Dict, Optional, Tuple
 import asyncpg
+from datetime import datetime
 from crud import order as order_crud
 from crud import product as product_crud
+from core.app_config import logger
 from core.pkgs.database import connection_pool
+from core.pkgs.model_registry import ModelRegistry
+from core.redis.purchase_events import queue_changed_orders, take_changed_orders
+from core.redis.user_recs import cache_user_recommendations, get_user_recommendations
 import os
-import pickle
-from core.utils.enums import ModelPath
+import shutil
+from fastapi.concurrency import run_in_threadpool
+from core.utils.enums import ModelPath, RecModelConfig
 
+# Arrays of a model version, each stored as <name>.npy
+_MODEL_ARRAYS = ("product_ids", "neighbour_idx", "neighbour_scores")
 
+# Serializes writers of the model (full training and incremental updates) across workers (arbitrary constant key)
+_MODEL_WRITE_LOCK_KEY = 724_115_903
+
+def build_interaction_matrix(user_ids: np.ndarray, product_ids: np.ndarray) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Builds the sparse item x user purchase-count matrix straight from (user, product) pairs;
+    repeated purchases add up. Returns the matrix and the sorted product ids labelling its rows.
+    """
+    items, item_idx = np.unique(product_ids, return_inverse=True)
+    _, user_idx = np.unique(user_ids, return_inverse=True)
+    counts = np.ones(len(item_idx), dtype=np.float32)
+    matrix = sparse.coo_matrix((counts, (item_idx, user_idx)), shape=(len(items), int(user_idx.max()) + 1))
+    return matrix.tocsr(), items
+
+def _write_top_k(neighbour_idx: np.ndarray, neighbour_scores: np.ndarray, row: int, columns: np.ndarray, scores: np.ndarray):
+    """Stores the best k of (columns, scores) in `row`, highest score first, zero-padded."""
+    k = neighbour_idx.shape[1]
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[top], scores[top]
+    order = np.argsort(-scores, kind="stable")
+    neighbour_idx[row] = 0
+    neighbour_scores[row] = 0
+    neighbour_idx[row, :len(order)] = columns[order]
+    neighbour_scores[row, :len(order)] = scores[order]
+
+def top_k_item_neighbours(item_vectors: sparse.csr_matrix, k: int, block_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cosine top-k neighbours of every item, computed block by block so only a `block_rows` x items
+    sparse slice of the similarity matrix exists at a time. Returns (neighbour indices int32,
+    scores float32), both items x k; rows with fewer than k neighbours are padded with index 0
+    and score 0, which add nothing when scoring.
+    """
+    item_vectors = normalize(item_vectors, norm="l2", axis=1, copy=False)
+    n_items = item_vectors.shape[0]
+    neighbour_idx = np.zeros((n_items, k), dtype=np.int32)
+    neighbour_scores = np.zeros((n_items, k), dtype=np.float32)
+    transposed = item_vectors.T.tocsr()
+    for start in range(0, n_items, block_rows):
+        similarities = (item_vectors[start:start + block_rows] @ transposed).tocsr()
+        for i in range(similarities.shape[0]):
+            row_start, row_end = similarities.indptr[i], similarities.indptr[i + 1]
+            columns = similarities.indices[row_start:row_end]
+            scores = similarities.data[row_start:row_end]
+            keep = (columns != start + i) & (scores > 0)
+            _write_top_k(neighbour_idx, neighbour_scores, start + i, columns[keep], scores[keep])
+    return neighbour_idx, neighbour_scores
+
+def update_item_neighbours(model_data: Dict, affected_ids: np.ndarray, co_purchases: List[Tuple[int, int, int]], norms: List[Tuple[int, int]]) -> Tuple[Dict, np.ndarray]:
+    """
+    Returns a new model in which the neighbour lists touched by purchases of `affected_ids` are
+    updated, and the product ids whose neighbour lists changed.
+
+    `co_purchases` holds (user_id, product_id, purchases) for every buyer of an affected product and
+    `norms` holds (product_id, sum of squared purchase counts) for every product in them, which
+    together give the exact current similarity of each affected product to every other product.
+    Lists of affected products are recomputed; other lists get their entries for affected products
+    replaced. A product pushed out of a truncated list cannot be replaced by one that never made
+    the top k, so lists drift slightly until the next full training.
+    """
+    k = model_data['neighbour_idx'].shape[1]
+    old_ids = model_data['product_ids']
+    co_users = np.fromiter((row[0] for row in co_purchases), dtype=np.int64, count=len(co_purchases))
+    co_items = np.fromiter((row[1] for row in co_purchases), dtype=np.int64, count=len(co_purchases))
+    co_counts = np.fromiter((row[2] for row in co_purchases), dtype=np.float64, count=len(co_purchases))
+
+    # Products bought for the first time get rows of their own; existing indices shift accordingly
+    ids = np.union1d(old_ids, np.concatenate([co_items, affected_ids]))
+    remap = np.searchsorted(ids, old_ids).astype(np.int32)
+    neighbour_idx = np.zeros((len(ids), k), dtype=np.int32)
+    neighbour_scores = np.zeros((len(ids), k), dtype=np.float32)
+    neighbour_idx[remap] = remap[model_data['neighbour_idx']]
+    neighbour_scores[remap] = model_data['neighbour_scores']
+
+    squared_norms = np.zeros(len(ids))
+    if norms:
+        squared_norms[np.searchsorted(ids, [row[0] for row in norms])] = [float(row[1]) for row in norms]
+    inverse_norms = np.divide(1.0, np.sqrt(squared_norms), out=np.zeros_like(squared_norms), where=squared_norms > 0)
+
+    affected_pos = np.searchsorted(ids, np.unique(affected_ids))
+    affected_set = set(affected_pos.tolist())
+    _, user_idx = np.unique(co_users, return_inverse=True)
+    purchases = sparse.csc_matrix(
+        (co_counts, (user_idx, np.searchsorted(ids, co_items))),
+        shape=(int(user_idx.max()) + 1 if len(user_idx) else 0, len(ids)),
+    )
+    similarities = (purchases[:, affected_pos].T @ purchases).tocsr()
+    similarities = similarities.multiply(inverse_norms[affected_pos][:, None]).multiply(inverse_norms[None, :]).tocsr()
+
+    new_entries: Dict[int, Dict[int, float]] = {}
+    for i, position in enumerate(affected_pos):
+        row_start, row_end = similarities.indptr[i], similarities.indptr[i + 1]
+        columns = similarities.indices[row_start:row_end]
+        scores = similarities.data[row_start:row_end].astype(np.float32)
+        keep = (columns != position) & (scores > 0)
+        columns, scores = columns[keep], scores[keep]
+        _write_top_k(neighbour_idx, neighbour_scores, position, columns, scores)
+        # Similarity is symmetric: the affected product's score in the other product's list
+        for column, score in zip(columns.tolist(), scores.tolist()):
+            if column not in affected_set:
+                new_entries.setdefault(column, {})[int(position)] = score
+
+    listing_affected = np.flatnonzero((np.isin(neighbour_idx, affected_pos) & (neighbour_scores > 0)).any(axis=1))
+    touched_rows = (set(listing_affected.tolist()) | set(new_entries)) - affected_set
+    for row in touched_rows:
+        keep = (neighbour_scores[row] > 0) & ~np.isin(neighbour_idx[row], affected_pos)
+        entries = new_entries.get(row, {})
+        columns = np.concatenate([neighbour_idx[row][keep], np.fromiter(entries.keys(), dtype=np.int32, count=len(entries))])
+        scores = np.concatenate([neighbour_scores[row][keep], np.fromiter(entries.values(), dtype=np.float32, count=len(entries))])
+        _write_top_k(neighbour_idx, neighbour_scores, row, columns, scores)
+
+    changed_ids = ids[sorted(affected_set | touched_rows)]
+    return {
+        "version": datetime.now().strftime("%Y%m%d%H%M%S%f"),
+        "product_ids": ids,
+        "neighbour_idx": neighbour_idx,
+        "neighbour_scores": neighbour_scores,
+    }, changed_ids
+
+def _purchase_arrays(purchase_rows: List) -> Tuple[np.ndarray, np.ndarray]:
+    """(user ids, product ids) columns of purchase rows."""
+    user_ids = np.fromiter((row['user_id'] for row in purchase_rows), dtype=np.int64, count=len(purchase_rows))
+    product_ids = np.fromiter((row['product_id'] for row in purchase_rows), dtype=np.int64, count=len(purchase_rows))
+    return user_ids, product_ids
+
+def _build_model(purchase_history: List[dict]) -> Dict:
+    """CPU-bound part of training; memory grows with the number of purchases and items x k, not items squared."""
+    user_ids, product_ids = _purchase_arrays(purchase_history)
+    item_vectors, items = build_interaction_matrix(user_ids, product_ids)
+    neighbour_idx, neighbour_scores = top_k_item_neighbours(
+        item_vectors, RecModelConfig.TOP_K.value, RecModelConfig.BLOCK_ROWS.value
+    )
+    return {
+        "version": datetime.now().strftime("%Y%m%d%H%M%S%f"),
+        "product_ids": items,
+        "neighbour_idx": neighbour_idx,
+        "neighbour_scores": neighbour_scores,
+    }
 
 async def train_and_cache_model():
     """
-    Fetches purchase history, builds the item-item similarity model,
+    Fetches purchase history, builds the top-k item-item similarity model,
     and caches it to a file.
     """
-    print("Starting recommendation model training...")
+    logger.info("Starting recommendation model training...")
     pool = await connection_pool.get_pool()
     async with pool.acquire() as db:
-        purchase_history = await order_crud.get_all_purchase_history(db)
-        if not purchase_history:
-            print("No purchase history found. Skipping model training.")
-            return
-
-        df = pd.DataFrame(purchase_history)
-        df['purchased'] = 1
-
-        # Create the user-item matrix
-        user_item_matrix = pd.crosstab(df['user_id'], df['product_id'], df['purchased'], aggfunc='sum').fillna(0)
-
-        # Calculate item-item similarity using cosine similarity
-        item_similarity_matrix = cosine_similarity(user_item_matrix.T)
-
-        # Create a mapping from product_id to matrix index and vice-versa
-        product_ids = user_item_matrix.columns
-        product_id_to_idx = {product_id: i for i, product_id in enumerate(product_ids)}
-
-        model_data = {
-            "item_similarity": item_similarity_matrix,
-            "product_ids": product_ids,
-            "product_id_to_idx": product_id_to_idx
-        }
-
-        # Ensure cache directory exists
-        os.makedirs(os.path.dirname(ModelPath.MODEL_CACHE_PATH), exist_ok=True)
-
-        # Cache the model data
-        with open(ModelPath.MODEL_CACHE_PATH, 'wb') as f:
-            pickle.dump(model_data, f)
-        
-        print(f"Model training complete. Cached to {ModelPath.MODEL_CACHE_PATH}")
-
-def load_model_from_cache() -> Dict:
-    """Loads the pre-computed model from cache."""
-    if not os.path.exists(ModelPath.MODEL_CACHE_PATH):
+        # Waits for a running incremental update so neither overwrites the other's model
+        await db.execute("SELECT pg_advisory_lock($1)", _MODEL_WRITE_LOCK_KEY)
+        try:
+            purchase_history = await order_crud.get_all_purchase_history(db)
+            if not purchase_history:
+                logger.info("No purchase history found. Skipping model training.")
+                return
+
+            model_data = await run_in_threadpool(_build_model, purchase_history)
+            await run_in_threadpool(_write_model, model_data)
+            # Serve the new model from this worker right away; the others notice the new version on their next check
+            await model_registry.refresh(force=True)
+            logger.info(
+                f"Model training complete. Version {model_data['version']} ({len(model_data['product_ids'])} products) "
+                f"saved to {ModelPath.MODEL_DIR.value}"
+            )
+            # Still under the lock, so an incremental update cannot write lists from a newer model first
+            users = await precompute_user_recommendations(model_data, purchase_history)
+            logger.info(f"Precomputed recommendations for {users} users.")
+        finally:
+            await db.execute("SELECT pg_advisory_unlock($1)", _MODEL_WRITE_LOCK_KEY)
+
+def _versions_dir() -> str:
+    return os.path.join(ModelPath.MODEL_DIR.value, "versions")
+
+def _current_pointer() -> str:
+    return os.path.join(ModelPath.MODEL_DIR.value, "CURRENT")
+
+def _write_model(model_data: Dict):
+    """
+    Saves the arrays as .npy files in a new version directory, then points CURRENT at it.
+    Both steps are renames, so readers see either the previous version or the complete new one.
+    """
+    version_dir = os.path.join(_versions_dir(), model_data["version"])
+    tmp_dir = f"{version_dir}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name in _MODEL_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(model_data[name]))
+    os.replace(tmp_dir, version_dir)
+
+    tmp_pointer = f"{_current_pointer()}.tmp"
+    with open(tmp_pointer, "w") as f:
+        f.write(model_data["version"])
+    os.replace(tmp_pointer, _current_pointer())
+    _prune_versions(model_data["version"])
+
+def _prune_versions(current: str):
+    """Deletes all but the newest versions. Workers still mapping a deleted version keep reading it until they swap."""
+    versions = sorted(name for name in os.listdir(_versions_dir()) if not name.endswith(".tmp"))
+    for name in versions[:-RecModelConfig.KEEP_VERSIONS.value]:
+        if name != current:
+            shutil.rmtree(os.path.join(_versions_dir(), name), ignore_errors=True)
+
+def _current_version() -> Optional[str]:
+    try:
+        with open(_current_pointer()) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
         return None
-    with open(ModelPath.MODEL_CACHE_PATH, 'rb') as f:
-        return pickle.load(f)
+
+def load_model_from_cache() -> Optional[Dict]:
+    """
+    Opens the current model version as read-only memory maps: loading reads only the array headers,
+    and workers on the same host share one page-cached copy of the data.
+    """
+    version = _current_version()
+    if version is None:
+        return None
+    version_dir = os.path.join(_versions_dir(), version)
+    model_data = {"version": version}
+    for name in _MODEL_ARRAYS:
+        model_data[name] = np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+    return model_data
+
+def product_positions(model_product_ids: np.ndarray, product_ids: List[int]) -> np.ndarray:
+    """Row positions of `product_ids` in the model (sorted ids); products the model has not seen are dropped."""
+    wanted = np.unique(np.asarray(product_ids, dtype=np.int64))
+    positions = np.minimum(np.searchsorted(model_product_ids, wanted), len(model_product_ids) - 1)
+    return positions[model_product_ids[positions] == wanted]
+
+def top_n_candidates(neighbour_idx: np.ndarray, neighbour_scores: np.ndarray, purchased_idx: np.ndarray, n: int) -> np.ndarray:
+    """
+    Scores every item as the sum of its similarity to the purchased items (scattered from their
+    neighbour lists), drops the purchased items and non-positive scores, and returns the
+    indices of the `n` best, highest score first.
+    """
+    scores = np.bincount(
+        neighbour_idx[purchased_idx].ravel(),
+        weights=neighbour_scores[purchased_idx].ravel().astype(np.float64),
+        minlength=neighbour_idx.shape[0],
+    )
+    scores[purchased_idx] = 0.0
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > n:
+        candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def top_n_for_users(model_data: Dict, user_ids: np.ndarray, product_ids: np.ndarray, n: int) -> Dict[int, np.ndarray]:
+    """
+    Batch counterpart of get_personalized_recommendations for every user in (user_ids, product_ids)
+    purchase pairs: scores a block of users at a time as one sparse (users x items) @ (items x items)
+    product over the neighbour lists. Returns {user_id: up to `n` recommended product ids, best first}.
+    """
+    model_ids = model_data['product_ids']
+    n_items, k = model_data['neighbour_idx'].shape
+    # Drop the zero padding with a mask: the result is a fresh array, so the model's arrays
+    # (read-only memory maps shared with request handling) are never modified
+    flat_scores = np.asarray(model_data['neighbour_scores']).ravel()
+    keep = flat_scores > 0
+    similarity = sparse.csr_matrix(
+        (flat_scores[keep], np.asarray(model_data['neighbour_idx']).ravel()[keep], np.concatenate([[0], np.cumsum(keep.reshape(n_items, k).sum(axis=1))])),
+        shape=(n_items, n_items),
+    )
+
+    # Users' distinct purchases of products the model knows, as a 0/1 users x items matrix
+    positions = np.minimum(np.searchsorted(model_ids, product_ids), n_items - 1)
+    known = model_ids[positions] == product_ids
+    users, user_idx = np.unique(user_ids, return_inverse=True)
+    purchases = sparse.csr_matrix(
+        (np.ones(int(known.sum()), dtype=np.float32), (user_idx[known], positions[known])),
+        shape=(len(users), n_items),
+    )
+    purchases.sum_duplicates()
+    purchases.data[:] = 1.0
+
+    recommendations: Dict[int, np.ndarray] = {}
+    block_rows = RecModelConfig.BLOCK_ROWS.value
+    for start in range(0, len(users), block_rows):
+        block = purchases[start:start + block_rows]
+        scores = (block @ similarity).tocsr()
+        scores.sort_indices()
+        for i in range(scores.shape[0]):
+            columns = scores.indices[scores.indptr[i]:scores.indptr[i + 1]]
+            values = scores.data[scores.indptr[i]:scores.indptr[i + 1]]
+            bought = block.indices[block.indptr[i]:block.indptr[i + 1]]
+            keep = (values > 0) & ~np.isin(columns, bought)
+            columns, values = columns[keep], values[keep]
+            if len(values) > n:
+                top = np.argpartition(-values, n - 1)[:n]
+                columns, values = columns[top], values[top]
+            order = np.argsort(-values, kind="stable")
+            recommendations[int(users[start + i])] = model_ids[columns[order]].astype(np.int32)
+    return recommendations
+
+async def precompute_user_recommendations(model_data: Dict, purchase_rows: List) -> int:
+    """Computes and stores in Redis the recommendations of every user with rows in `purchase_rows`. Returns the user count."""
+    user_ids, product_ids = _purchase_arrays(purchase_rows)
+    recommendations = await run_in_threadpool(
+        top_n_for_users, model_data, user_ids, product_ids, RecModelConfig.USER_RECS_SIZE.value
+    )
+    await cache_user_recommendations(recommendations)
+    return len(recommendations)
+
+# One mapped copy of the model per worker, swapped in when CURRENT points at a new version
+model_registry = ModelRegistry(
+    "personalized_rec",
+    loader=load_model_from_cache,
+    stamp=_current_version,
+    check_interval=RecModelConfig.RELOAD_CHECK_INTERVAL.value,
+)
 
 async def get_personalized_recommendations(db: asyncpg.Connection, user_id: int, num_recommendations: int = 10) -> List[Dict]:
     """
     Generates personalized recommendations for a given user.
+    Served from the list precomputed after training; scored online (and cached) only on a miss.
     """
-    model_data = load_model_from_cache()
-    if not model_data:
-        print("Model not found. Please train the model first.")
+    recommended_ids = None
+    if num_recommendations <= RecModelConfig.USER_RECS_SIZE.value:
+        recommended_ids = await get_user_recommendations(user_id)
+    if recommended_ids is None:
+        recommended_ids = await _score_user_online(db, user_id, max(num_recommendations, RecModelConfig.USER_RECS_SIZE.value))
+        if recommended_ids is None:
+            return []
+    recommended_ids = recommended_ids[:num_recommendations]
+    if not len(recommended_ids):
         return []
 
-    item_similarity = model_data['item_similarity']
-    product_ids = model_data['product_ids']
-    product_id_to_idx = model_data['product_id_to_idx']
+    # Product details come from the product cache; only misses hit the database
+    recommended_products, _ = await product_crud.get_products_by_ids_cached(db, [int(pid) for pid in recommended_ids])
+    return [product.model_dump() for product in recommended_products]
 
-    # Get products purchased by the user
+async def _score_user_online(db: asyncpg.Connection, user_id: int, num_recommendations: int) -> Optional[np.ndarray]:
+    """Scores a user against the loaded model and caches the result; None when no model is loaded."""
+    model_data = await model_registry.get()
+    if not model_data:
+        logger.warning("Recommendation model not found. Please train the model first.")
+        return None
+
+    product_ids = model_data['product_ids']
     purchased_product_ids = await order_crud.get_purchased_product_ids_by_user(db, user_id)
-    if not purchased_product_ids:
-        return []
+    # Products that were not in the training set have no neighbour list
+    purchased_idx = product_positions(product_ids, purchased_product_ids) if purchased_product_ids else np.empty(0, dtype=np.intp)
+    if len(purchased_idx):
+        top_idx = top_n_candidates(model_data['neighbour_idx'], model_data['neighbour_scores'], purchased_idx, num_recommendations)
+        recommended_ids = product_ids[top_idx].astype(np.int32)
+    else:
+        recommended_ids = np.empty(0, dtype=np.int32)
+    await cache_user_recommendations({user_id: recommended_ids[:RecModelConfig.USER_RECS_SIZE.value]})
+    return recommended_ids
+
+async def apply_purchase_updates() -> int:
+    """
+    Folds orders queued by crud.order (paid, delivered, cancelled, ...) into the current model
+    and writes it as a new version. Returns the number of orders applied.
+
+    Queued orders only name the products to revisit; their similarities are recomputed from the
+    database, so repeated or out-of-order events are harmless.
+    """
+    pool = await connection_pool.get_pool()
+    async with pool.acquire() as db:
+        if not await db.fetchval("SELECT pg_try_advisory_lock($1)", _MODEL_WRITE_LOCK_KEY):
+            return 0
+        try:
+            # Under the lock this sees the latest version, including one just written by another worker
+            await model_registry.refresh()
+            model_data = model_registry.model
+            if model_data is None:
+                # Nothing to update yet; the first full training covers these orders
+                return 0
+            order_codes = await take_changed_orders(RecModelConfig.UPDATE_BATCH_ORDERS.value)
+            if not order_codes:
+                return 0
+            try:
+                affected_ids = await order_crud.get_order_product_ids(db, order_codes)
+                if not affected_ids:
+                    return len(order_codes)
+                co_purchases = await order_crud.get_co_purchases(db, affected_ids)
+                candidate_ids = list({row['product_id'] for row in co_purchases} | set(affected_ids))
+                norms = await order_crud.get_purchase_norms(db, candidate_ids)
+                updated, changed_ids = await run_in_threadpool(
+                    update_item_neighbours,
+                    model_data,
+                    np.asarray(affected_ids, dtype=np.int64),
+                    [(row['user_id'], row['product_id'], row['purchases']) for row in co_purchases],
+                    [(row['product_id'], row['norm']) for row in norms],
+                )
+                await run_in_threadpool(_write_model, updated)
+                await model_registry.refresh(force=True)
+                # A user's list depends on the neighbour lists of the products they bought, so every
+                # buyer of a product whose list changed is rescored (with all of their purchases)
+                buyers_purchases = await order_crud.get_co_purchases(db, changed_ids.tolist())
+                users = await precompute_user_recommendations(updated, buyers_purchases)
+            except Exception:
+                # Put the claimed orders back so the next run retries them
+                await queue_changed_orders(*order_codes)
+                raise
+        finally:
+            await db.execute("SELECT pg_advisory_unlock($1)", _MODEL_WRITE_LOCK_KEY)
+
+    logger.info(
+        f"Recommendation model updated from {len(order_codes)} orders ({len(affected_ids)} products, "
+        f"{users} users' lists refreshed): version {updated['version']}."
+    )
+    return len(order_codes)
 
-    purchased_product_ids = set(purchased_product_ids)
-
-    # Calculate recommendation scores
-    scores = {pid: 0.0 for pid in product_ids}
-    
-    for purchased_pid in purchased_product_ids:
-        if purchased_pid not in product_id_to_idx:
-            continue # This product was not in the training set
-        
-        purchased_idx = product_id_to_idx[purchased_pid]
-        # Get similarity scores for this item with all other items
-        similarity_scores = item_similarity[purchased_idx]
-
-        for i, score in enumerate(similarity_scores):
-            # Add the score to the item if it's not one the user already bought
-            candidate_pid = product_ids[i]
-            if candidate_pid not in purchased_product_ids:
-                scores[candidate_pid] += score
-
-    # Sort and get top N recommendations
-    sorted_recommendations = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-    
-    recommended_ids = [pid for pid, score in sorted_recommendations if score > 0][:num_recommendations]
-
-    # Fetch product details for the recommended IDs
-    recommended_products = []
-    for pid in recommended_ids:
-        product = await product_crud.get_product_by_id(db, product_id=pid)
-        if product:
-            recommended_products.append(product.model_dump())
-            
-    return recommended_products
+async def run_rec_model_updater():
+    """Background loop: every UPDATE_INTERVAL seconds applies queued order changes to the recommendation model."""
+    while True:
+        await asyncio.sleep(RecModelConfig.UPDATE_INTERVAL.value)
+        try:
+            await apply_purchase_updates()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Incremental recommendation model update failed: {e}", exc_info=True)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from core.app_config import logger
+from core.pkgs.database import connection_pool
+from core.redis.product_cache import invalidate_products
+from core.redis.resource_version import bump_resource_version
+from core.utils.enums import PriceScheduleConfig
+from crud.discount import discount_list_cache
+from crud.product_price import (
+    refresh_product_prices,
+    get_seconds_until_next_price_boundary,
+    get_discount_boundaries_since,
+    price_schedule_changed,
+)
+
+
+async def _refresh_boundary_products(seconds_since_last_run: float):
+    pool = await connection_pool.get_pool()
+    async with pool.acquire() as db:
+        crossed, product_ids = await get_discount_boundaries_since(db, seconds_since_last_run + PriceScheduleConfig.LOOKBACK_SLACK.value)
+        if not crossed:
+            return
+        changed = await refresh_product_prices(db, product_ids) if product_ids else []
+    if changed:
+        logger.info(f"Discount boundary reached: refreshed effective prices for {len(changed)} products.")
+        await invalidate_products(changed)
+    # The set of active discounts changed even when no product price did
+    await discount_list_cache.invalidate()
+    await bump_resource_version("discounts")
+
+
+async def run_price_boundary_scheduler():
+    """
+    Keeps product_prices current without polling: sleeps until the next discount
+    start_date/end_date boundary, then refreshes only the products whose window opened
+    or closed. Discount writes set `price_schedule_changed` to re-plan the wake-up.
+    Every worker runs one; refreshes are idempotent, so overlapping runs are harmless.
+    """
+    try:
+        pool = await connection_pool.get_pool()
+        async with pool.acquire() as db:
+            # Catch up on anything that changed while the app was down (only differing rows are written)
+            changed = await refresh_product_prices(db)
+        if changed:
+            await invalidate_products(changed)
+        logger.info(f"Price scheduler started; reconciled {len(changed)} product prices.")
+    except Exception as e:
+        logger.error(f"Initial product price reconciliation failed: {e}", exc_info=True)
+
+    last_run = time.monotonic()
+    while True:
+        try:
+            pool = await connection_pool.get_pool()
+            async with pool.acquire() as db:
+                delay = await get_seconds_until_next_price_boundary(db)
+            if delay is None or delay > PriceScheduleConfig.MAX_SLEEP:
+                delay = PriceScheduleConfig.MAX_SLEEP.value
+            price_schedule_changed.clear()
+            try:
+                await asyncio.wait_for(price_schedule_changed.wait(), timeout=max(delay, 0))
+                # A discount was written; its products are already refreshed, just re-plan
+                continue
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            await _refresh_boundary_products(now - last_run)
+            last_run = now
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Price boundary scheduler error: {e}", exc_info=True)
+            await asyncio.sleep(PriceScheduleConfig.ERROR_BACKOFF.value)
@@ -1,40 +1,284 @@
-from typing import List
-from schemas import schemas
-import re
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from fastapi.concurrency import run_in_threadpool
+from core.app_config import logger
+from core.pkgs.database import connection_pool
+from core.pkgs.model_registry import ModelRegistry
+from core.utils.enums import ModelPath, SimilarProductsConfig
+from crud import product_similar as similar_crud
 
-def get_recommendations(target_product: schemas.Product, all_products: List[schemas.Product], num_recommendations: int = 5) -> List[schemas.Product]:
+# Only one worker at a time rebuilds the similar-products table (arbitrary constant key)
+_REFRESH_LOCK_KEY = 724_115_902
+
+# Share of products a term may appear in, on catalogs larger than MAX_DF_MIN_CATALOG
+_MAX_DF = 0.5
+
+_VECTORIZER_OPTIONS = dict(strip_accents="unicode", lowercase=True, sublinear_tf=True, dtype=np.float32)
+
+Neighbours = Dict[int, Tuple[List[int], List[float]]]
+
+
+def _product_text(name: str, description: Optional[str]) -> str:
+    # The name is repeated so it weighs more than the description
+    return f"{name} {name} {description or ''}"
+
+
+def fit_tfidf(texts: List[str]) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
     """
-    Recommends products based on keyword matching in name and description.
+    Fits TF-IDF on the catalog and returns (rows, vocabulary, idf). Rows are L2-normalized, so
+    the dot product of two rows is their cosine similarity. The vocabulary is the terms in column
+    order, stored as newline-separated UTF-8 bytes (tokens never contain whitespace).
+    A catalog without a single usable term yields a matrix with no columns (no neighbours).
+
+    On large catalogs, terms found in more than half of the products are dropped: they barely
+    tell products apart, and each one would link every pair of products sharing it, making
+    every block of the similarity product nearly dense. Small catalogs keep every term, since
+    there a common term may be all two products have in common.
     """
-    if not target_product:
-        return []
+    max_df = _MAX_DF if len(texts) > SimilarProductsConfig.MAX_DF_MIN_CATALOG.value else 1.0
+    vectorizer = TfidfVectorizer(max_df=max_df, **_VECTORIZER_OPTIONS)
+    try:
+        matrix = vectorizer.fit_transform(texts).tocsr()
+    except ValueError:
+        # Empty vocabulary, e.g. names made only of one-character tokens or only very common terms
+        return sparse.csr_matrix((len(texts), 0), dtype=np.float32), np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.float32)
+    vocabulary = np.frombuffer("\n".join(vectorizer.get_feature_names_out()).encode("utf-8"), dtype=np.uint8)
+    return matrix, vocabulary, vectorizer.idf_.astype(np.float32)
+
 
-    # Extract keywords from the target product's name and description
-    target_text = f"{target_product.name} {target_product.description or ''}".lower()
-    target_keywords = set(re.findall(r'\w+', target_text))
+def _vectorizer(vocabulary: np.ndarray, idf: np.ndarray) -> Optional[TfidfVectorizer]:
+    """Rebuilds the fitted vectorizer of a build from its vocabulary and IDF; None for an empty vocabulary."""
+    if not len(idf):
+        return None
+    terms = vocabulary.tobytes().decode("utf-8").split("\n")
+    vectorizer = TfidfVectorizer(vocabulary={term: column for column, term in enumerate(terms)}, **_VECTORIZER_OPTIONS)
+    vectorizer.idf_ = idf
+    return vectorizer
 
-    if not target_keywords:
-        return []
 
-    recommendations = []
-    for product in all_products:
-        # Skip the target product itself
-        if product.id == target_product.id:
-            continue
+def top_k_neighbours(matrix: sparse.csr_matrix, ids: np.ndarray, positions: List[int], k: int, block_rows: int) -> Neighbours:
+    """
+    Computes the k most similar products for the rows at `positions`, block by block, so only
+    a `block_rows` x catalog sparse slice of the similarity matrix exists at any time.
+    """
+    neighbours: Neighbours = {}
+    transposed = matrix.T.tocsr()
+    for start in range(0, len(positions), block_rows):
+        block = positions[start:start + block_rows]
+        similarities = (matrix[block] @ transposed).tocsr()
+        for i, position in enumerate(block):
+            row_start, row_end = similarities.indptr[i], similarities.indptr[i + 1]
+            columns = similarities.indices[row_start:row_end]
+            scores = similarities.data[row_start:row_end]
+            keep = (columns != position) & (scores > 0)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                columns, scores = columns[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            neighbours[int(ids[position])] = (ids[columns[order]].tolist(), scores[order].astype(float).tolist())
+    return neighbours
 
-        # Extract keywords from the current product
-        product_text = f"{product.name} {product.description or ''}".lower()
-        product_keywords = set(re.findall(r'\w+', product_text))
 
-        # Calculate similarity score based on common keywords
-        common_keywords = target_keywords.intersection(product_keywords)
-        score = len(common_keywords)
+def _affected_positions(matrix: sparse.csr_matrix, dirty_positions: List[int], min_scores: np.ndarray) -> Set[int]:
+    """
+    Rows whose top-k list a changed product may now enter: their similarity to some changed
+    product beats the lowest score currently in their list.
+    """
+    affected: Set[int] = set()
+    transposed = matrix.T.tocsr()
+    for start in range(0, len(dirty_positions), SimilarProductsConfig.BLOCK_ROWS.value):
+        block = dirty_positions[start:start + SimilarProductsConfig.BLOCK_ROWS.value]
+        best = (matrix[block] @ transposed).max(axis=0).toarray().ravel()
+        affected.update(np.flatnonzero(best > min_scores).tolist())
+    return affected
+
+
+def _store_list_bounds(index: Dict, neighbours: Neighbours):
+    """Records the length and lowest score of each written list, by row (ids are ascending)."""
+    for product_id, (similar_ids, scores) in neighbours.items():
+        position = np.searchsorted(index["ids"], product_id)
+        index["list_lengths"][position] = len(similar_ids)
+        index["min_scores"][position] = scores[-1] if scores else 0.0
+
+
+def _build_index(catalog: List[Tuple[int, str]]) -> Tuple[Dict, Neighbours]:
+    """CPU-bound part of a full rebuild; `catalog` is (id, text) in ascending id order."""
+    ids = np.fromiter((product_id for product_id, _ in catalog), dtype=np.int64, count=len(catalog))
+    matrix, vocabulary, idf = fit_tfidf([text for _, text in catalog])
+    index = {
+        "ids": ids,
+        "matrix": matrix,
+        "vocabulary": vocabulary,
+        "idf": idf,
+        "vectorizer": _vectorizer(vocabulary, idf),
+        "list_lengths": np.zeros(len(ids), dtype=np.int32),
+        "min_scores": np.zeros(len(ids), dtype=np.float32),
+        "built_at": time.time(),
+    }
+    neighbours = top_k_neighbours(matrix, ids, list(range(len(ids))), SimilarProductsConfig.TOP_K.value, SimilarProductsConfig.BLOCK_ROWS.value)
+    _store_list_bounds(index, neighbours)
+    return index, neighbours
+
+
+def _apply_changes(index: Dict, changed: List[Tuple[int, str]], dirty: List[int], stale: List[int]) -> Tuple[Dict, Neighbours]:
+    """
+    CPU-bound part of an incremental refresh. The rows of `dirty` products are replaced by the
+    TF-IDF of their new text (`changed`, the ones still active) or dropped. Only those rows are
+    vectorized, with the vocabulary and IDF of the last full build, so the scores of untouched
+    rows do not move and their stored lowest list scores stay exact. Returns a new index; the
+    given one is not modified.
+    """
+    k = SimilarProductsConfig.TOP_K.value
+    keep = ~np.isin(index["ids"], np.asarray(dirty, dtype=np.int64))
+    changed_ids = np.fromiter((product_id for product_id, _ in changed), dtype=np.int64, count=len(changed))
+    vectorizer = index["vectorizer"]
+    if vectorizer is None or not changed:
+        changed_rows = sparse.csr_matrix((len(changed), index["matrix"].shape[1]), dtype=np.float32)
+    else:
+        changed_rows = vectorizer.transform([text for _, text in changed]).tocsr()
 
-        if score > 0:
-            recommendations.append((product, score))
+    ids = np.concatenate([index["ids"][keep], changed_ids])
+    order = np.argsort(ids, kind="stable")
+    index = {
+        **index,
+        "ids": ids[order],
+        "matrix": sparse.vstack([index["matrix"][keep], changed_rows], format="csr")[order],
+        "list_lengths": np.concatenate([index["list_lengths"][keep], np.zeros(len(changed_ids), dtype=np.int32)])[order],
+        "min_scores": np.concatenate([index["min_scores"][keep], np.zeros(len(changed_ids), dtype=np.float32)])[order],
+    }
+    ids, matrix = index["ids"], index["matrix"]
 
-    # Sort recommendations by score in descending order
-    recommendations.sort(key=lambda x: x[1], reverse=True)
+    changed_positions = np.searchsorted(ids, changed_ids).tolist()
+    # Lists shorter than k accept any positive score
+    min_scores = np.where(index["list_lengths"] >= k, index["min_scores"], 0.0).astype(np.float32)
+    targets = set(changed_positions)
+    targets.update(np.flatnonzero(np.isin(ids, np.asarray(stale, dtype=np.int64))).tolist())
+    if changed_positions:
+        targets |= _affected_positions(matrix, changed_positions, min_scores)
+
+    neighbours = top_k_neighbours(matrix, ids, sorted(targets), k, SimilarProductsConfig.BLOCK_ROWS.value)
+    _store_list_bounds(index, neighbours)
+    return index, neighbours
+
+
+def _write_index(index: Dict):
+    """Saves the index as one .npz file, written aside and renamed so readers never see a partial file."""
+    path = ModelPath.SIMILAR_INDEX.value
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    matrix = index["matrix"]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            ids=index["ids"], data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.array(matrix.shape),
+            vocabulary=index["vocabulary"], idf=index["idf"], list_lengths=index["list_lengths"],
+            min_scores=index["min_scores"], built_at=np.array(index["built_at"]),
+        )
+    os.replace(tmp_path, path)
+
+
+def _load_index() -> Dict:
+    with np.load(ModelPath.SIMILAR_INDEX.value, allow_pickle=False) as arrays:
+        index = {name: arrays[name] for name in arrays.files}
+    index["matrix"] = sparse.csr_matrix((index.pop("data"), index.pop("indices"), index.pop("indptr")), shape=tuple(index.pop("shape")))
+    index["built_at"] = float(index["built_at"])
+    index["vectorizer"] = _vectorizer(index["vocabulary"], index["idf"])
+    return index
+
+
+def _index_stamp() -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(ModelPath.SIMILAR_INDEX.value)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# The index of the last build, reloaded when another worker writes a newer one
+similar_index = ModelRegistry("similar_products_index", loader=_load_index, stamp=_index_stamp)
+
+
+async def refresh_similar_products(full: bool = False) -> int:
+    """
+    Brings the product_similar table up to date and returns the number of lists written.
+
+    A full rebuild fits TF-IDF on the whole catalog, recomputes every active product and saves
+    the rows, vocabulary and IDF as the similarity index (ModelPath.SIMILAR_INDEX). It also
+    runs when there is no index yet or it is older than FULL_REBUILD_INTERVAL.
+
+    Otherwise only products queued in product_similar_dirty are handled: just their texts are
+    read and vectorized with the stored vocabulary and IDF, and only their own lists, lists
+    that mention them and lists they now enter are recomputed. Terms first seen since the last
+    full build are ignored until the next one.
+    """
+    pool = await connection_pool.get_pool()
+    async with pool.acquire() as db:
+        if not await db.fetchval("SELECT pg_try_advisory_lock($1)", _REFRESH_LOCK_KEY):
+            return 0
+        dirty: List[int] = []
+        try:
+            index = None
+            if not full:
+                await similar_index.refresh()
+                index = similar_index.model
+                full = index is None or time.time() - index["built_at"] >= SimilarProductsConfig.FULL_REBUILD_INTERVAL.value
+            # Claimed before reading texts, so changes made while this run works are queued again
+            dirty = await similar_crud.claim_dirty_products(db)
+            if not full and not dirty:
+                return 0
+            try:
+                if full:
+                    rows = await similar_crud.get_catalog_texts(db)
+                    catalog = [(row["id"], _product_text(row["name"], row["description"])) for row in rows]
+                    index, neighbours = await run_in_threadpool(_build_index, catalog)
+                    await similar_crud.save_similar_products(db, neighbours, [], keep_only=index["ids"].tolist())
+                else:
+                    rows = await similar_crud.get_catalog_texts(db, dirty)
+                    changed = [(row["id"], _product_text(row["name"], row["description"])) for row in rows]
+                    stale = await similar_crud.get_products_listing_any(db, dirty)
+                    index, neighbours = await run_in_threadpool(_apply_changes, index, changed, dirty, stale)
+                    active = {product_id for product_id, _ in changed}
+                    removed = [product_id for product_id in dirty if product_id not in active]
+                    await similar_crud.save_similar_products(db, neighbours, removed)
+                await run_in_threadpool(_write_index, index)
+                await similar_index.refresh(force=True)
+            except Exception:
+                # Put the claimed work back so the next run retries it
+                await similar_crud.mark_similar_dirty(db, dirty)
+                raise
+        finally:
+            await db.execute("SELECT pg_advisory_unlock($1)", _REFRESH_LOCK_KEY)
+
+    logger.info(f"Similar products {'rebuilt' if full else 'refreshed'}: {len(neighbours)} lists written ({len(dirty)} changed products).")
+    return len(neighbours)
+
+
+async def run_similar_products_refresher():
+    """
+    Background loop: builds the table on first start, then every REFRESH_INTERVAL seconds
+    applies the queued product changes (with a full rebuild once the index is older than
+    FULL_REBUILD_INTERVAL). Workers coordinate through an advisory lock.
+    """
+    try:
+        pool = await connection_pool.get_pool()
+        async with pool.acquire() as db:
+            needs_full_build = not await db.fetchval("SELECT EXISTS (SELECT 1 FROM product_similar)")
+        if needs_full_build:
+            await refresh_similar_products(full=True)
+    except Exception as e:
+        logger.error(f"Initial similar products build failed: {e}", exc_info=True)
 
-    # Return the top N recommended products
-    return [product for product, score in recommendations[:num_recommendations]]
+    while True:
+        await asyncio.sleep(SimilarProductsConfig.REFRESH_INTERVAL.value)
+        try:
+            await refresh_similar_products()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Similar products refresh failed: {e}", exc_info=True)
@@ -0,0 +1,52 @@
+import asyncio
+import re
+from datetime import datetime
+
+from fastapi import Response
+
+from core.utils.responses import NEXT_CURSOR_HEADER
+from router.admin import get_all_products_endpoint
+
+
+class FakeCatalogConnection:
+    """Answers the two queries of crud.product.get_products over an in-memory catalog ordered by id."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        self.listing_queries = []
+
+    async def fetch(self, query, *params):
+        if "sort_value" in query:
+            self.listing_queries.append(query)
+            seek = re.search(r"AND p\.id > \$(\d+)", query)
+            after_id = params[int(seek.group(1)) - 1] if seek else 0
+            ids = [product_id for product_id in self.product_ids if product_id > after_id][:params[-1]]
+            return [{"id": product_id, "sort_value": product_id} for product_id in ids]
+        return [self._product_row(product_id) for product_id in params[0]]
+
+    @staticmethod
+    def _product_row(product_id):
+        now = datetime(2025, 1, 1)
+        return {
+            "id": product_id, "name": f"Laptop {product_id}", "description": None, "price": 100.0, "quantity": 1,
+            "image_urls": None, "is_active": True, "created_at": now, "updated_at": now, "release_date": None,
+            "category_id": None, "category_name": None, "brand_id": None, "brand_name": None,
+            "discount_percent": None, "start_date": None, "end_date": None, "final_price": 100.0,
+        }
+
+
+def test_admin_product_search_pages_follow_the_cursor():
+    db = FakeCatalogConnection(range(1, 6))
+
+    async def fetch_pages():
+        first_response = Response()
+        first = await get_all_products_endpoint(first_response, search="laptop", limit=2, after=None, db=db, admin={})
+        cursor = first_response.headers[NEXT_CURSOR_HEADER]
+        second = await get_all_products_endpoint(Response(), search="laptop", limit=2, after=cursor, db=db, admin={})
+        return first, second
+
+    first, second = asyncio.run(fetch_pages())
+
+    assert [product.id for product in first] == [1, 2]
+    assert [product.id for product in second] == [3, 4]
+    assert all("ORDER BY p.id ASC" in query for query in db.listing_queries)